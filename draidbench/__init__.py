@@ -0,0 +1 @@
+"""Gemeinsame Bausteine für die dRAID-Resilver- und Durchsatz-Benchmarks."""
@@ -0,0 +1,539 @@
+"""Ablauf der Test-Matrix auf asyncio statt blockierender subprocess-Aufrufe.
+
+Jedes Kommando läuft in einer eigenen Prozessgruppe mit Timeout. Bei
+Timeout oder Abbruch wird die ganze Gruppe beendet (SIGTERM, nach
+KILL_GRACE Sekunden SIGKILL), ein hängendes `zpool` blockiert den Lauf
+also nicht mehr. Ausgaben werden zeilenweise gelesen, während sie
+entstehen. Füllen, `zpool events -f`, Fortschritts- und
+Telemetrie-Sampling laufen als Tasks in einer Event-Loop.
+
+run_guarded() fängt SIGINT/SIGTERM ab, bricht den laufenden Task ab,
+beendet alle noch laufenden Kommandos und führt danach das Aufräumen aus.
+Alle Läufe (einzeln, gepackt, verteilt) gehen über run_cell().
+
+Szenario-Aktionen (offline, wipe, replace), Wipe und Löschen des Pools
+und die native Fill-Engine bleiben synchron und laufen per
+asyncio.to_thread(); die Fill-Engine wird bei einem Abbruch über ihr
+stop-Event angehalten (fill_control.py).
+"""
+import asyncio
+import os
+import signal
+import time
+
+from .pool import CMD_TIMEOUT, clear_fill, delete_pool
+from .progress import ProgressSampler, parse_status_json, parse_status_text
+from .resilver_watch import (COMPLETED_BEFORE_POLL, NO_RESILVER, POLL_BACKOFF, POLL_MAX_INTERVAL, POLL_MIN_INTERVAL,
+                             RESILVER_FINISH, RESILVER_START, SCRUB_FINISH, SCRUB_START, START_GRACE, ZPOOL_BIN,
+                             event_id, event_kind, parse_events, redundancy_times, resilver_completed_at,
+                             resilver_in_progress, scrub_in_progress)
+from .shell import CommandError
+from .wipe import wipe_disks
+
+KILL_GRACE = 5
+# kurze Abfragen (status, events) dürfen nicht ewig hängen
+STATUS_TIMEOUT = 30
+# `zpool status -j` kann sehr lange Zeilen liefern
+LINE_LIMIT = 16 * 1024 ** 2
+# so viele Abfragen ohne lesbares JSON, bevor endgültig auf Text umgestellt wird
+JSON_PROBES = 3
+
+_children = set()
+
+
+async def _terminate(proc):
+    if proc.returncode is not None:
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(proc.wait(), KILL_GRACE)
+    except asyncio.TimeoutError:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+
+
+async def kill_children():
+    """Beendet alle noch laufenden Kommandos samt Kindprozessen."""
+    await asyncio.gather(*(_terminate(proc) for proc in list(_children)), return_exceptions=True)
+
+
+async def _pump(stream, lines, on_line, interrupt=None):
+    async for raw in stream:
+        line = raw.decode(errors="replace").rstrip("\n")
+        lines.append(line)
+        if on_line is not None and on_line(line) and interrupt is not None:
+            interrupt()
+            interrupt = None
+
+
+async def run(cmd, check=True, timeout=CMD_TIMEOUT, on_line=None):
+    """Async-Gegenstück zu shell.run_cmd(), gibt stdout zurück.
+
+    `on_line` bekommt jede stdout-Zeile, sobald sie da ist; gibt es True
+    zurück, bekommt die Prozessgruppe einmalig SIGINT (fio z.B. beendet
+    sich dann sauber und schreibt sein Ergebnis). Nach `timeout` Sekunden
+    (None = unbegrenzt) wird die Prozessgruppe beendet und das Kommando
+    gilt als fehlgeschlagen (rc=None).
+    """
+    proc = await asyncio.create_subprocess_shell(cmd, stdout=asyncio.subprocess.PIPE,
+                                                 stderr=asyncio.subprocess.PIPE,
+                                                 start_new_session=True, limit=LINE_LIMIT)
+    _children.add(proc)
+    out, err = [], []
+
+    def interrupt():
+        try:
+            os.killpg(proc.pid, signal.SIGINT)
+        except ProcessLookupError:
+            pass
+
+    async def communicate():
+        await asyncio.gather(_pump(proc.stdout, out, on_line, interrupt), _pump(proc.stderr, err, None))
+        return await proc.wait()
+
+    try:
+        returncode = await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _terminate(proc)
+        print(f"[FEHLER] Timeout nach {timeout} s: {cmd}")
+        if check:
+            raise CommandError(cmd, None, "timeout")
+        return ""
+    except asyncio.CancelledError:
+        await _terminate(proc)
+        raise
+    finally:
+        _children.discard(proc)
+
+    if check and returncode != 0:
+        print(f"[FEHLER] Befehl fehlgeschlagen: {cmd}")
+        print("\n".join(err))
+        raise CommandError(cmd, returncode, "\n".join(err))
+    return "\n".join(out).strip()
+
+
+async def pool_status(pool_name, zpool_bin=None):
+    return await run(f"{zpool_bin or ZPOOL_BIN} status {pool_name}", check=False, timeout=STATUS_TIMEOUT)
+
+
+async def _baseline_eid(zpool_bin):
+    try:
+        output = await run(f"{zpool_bin} events -v -H", timeout=STATUS_TIMEOUT)
+    except (CommandError, OSError):
+        return None
+    eids = [event_id(e) for e in parse_events(output.splitlines())]
+    eids = [e for e in eids if e is not None]
+    return max(eids) if eids else -1
+
+
+async def _follow_events(pool_name, zpool_bin, last_eid, events):
+    """Liest `zpool events -f` und legt (art, zeitstempel) in die Queue."""
+    proc = await asyncio.create_subprocess_exec(zpool_bin, "events", "-f", "-v", "-H",
+                                                stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.DEVNULL,
+                                                start_new_session=True, limit=LINE_LIMIT)
+    _children.add(proc)
+
+    def flush(block, stamp):
+        for event in parse_events(block):
+            kind = event_kind(event)
+            if kind is None or event.get("pool") not in (None, pool_name):
+                continue
+            eid = event_id(event)
+            if eid is not None and eid <= last_eid:
+                continue
+            events.put_nowait((kind, stamp))
+
+    try:
+        block, stamp = [], None
+        async for raw in proc.stdout:
+            line = raw.decode(errors="replace")
+            if not line.strip() or not line[0].isspace():
+                flush(block, stamp)
+                block = []
+                if not line.strip():
+                    continue
+                stamp = time.monotonic()
+            block.append(line)
+        flush(block, stamp)
+        events.put_nowait(None)
+    finally:
+        await _terminate(proc)
+        _children.discard(proc)
+
+
+async def _wait_finish(pool_name, zpool_bin, events, start=RESILVER_START, finish=RESILVER_FINISH,
+                       in_progress=resilver_in_progress):
+    """(start_ts, finish_ts) aus den Events, None, wenn laut Status gar nichts läuft."""
+    start_ts = None
+    while True:
+        try:
+            item = await asyncio.wait_for(events.get(), START_GRACE)
+        except asyncio.TimeoutError:
+            # kein Start-Event: prüfen, ob überhaupt ein Resilver läuft
+            if start_ts is None and not in_progress(await pool_status(pool_name, zpool_bin)):
+                return None
+            continue
+        if item is None:
+            raise RuntimeError("zpool events wurde unerwartet beendet")
+        kind, stamp = item
+        if kind == start and start_ts is None:
+            start_ts = stamp
+        elif kind == finish:
+            return start_ts, stamp
+
+
+async def _poll_until_done(pool_name, zpool_bin, in_progress=resilver_in_progress, start_grace=0.0):
+    """Adaptives Polling von `zpool status`, bis der Vorgang nicht mehr läuft.
+
+    Gibt (first_seen_ts, finish_ts, status) zurück; first_seen_ts ist der
+    erste Poll, der den Vorgang laufen sah, None, wenn er nie gesehen
+    wurde, status der Text des letzten Polls. Mit
+    `start_grace` > 0 zählt "läuft nicht" erst, nachdem der Vorgang einmal
+    lief oder die Frist abgelaufen ist (z.B. für den Scrub nach dem Rebuild).
+    """
+    grace_until = time.monotonic() + start_grace
+    first_seen = None
+    interval = POLL_MIN_INTERVAL
+    while True:
+        status = await pool_status(pool_name, zpool_bin)
+        now = time.monotonic()
+        if in_progress(status):
+            if first_seen is None:
+                first_seen = now
+        elif first_seen is not None or now >= grace_until:
+            return first_seen, now, status
+        await asyncio.sleep(interval)
+        interval = min(POLL_MAX_INTERVAL, interval * POLL_BACKOFF)
+
+
+async def _wait_scrub(pool_name, zpool_bin, events, follower):
+    """(start_ts, finish_ts) des Scrubs nach einem sequentiellen Rebuild, (None, None) ohne Scrub."""
+    print("[INFO] Rebuild abgeschlossen, warte auf den Scrub...")
+    if follower is None:
+        start_ts, finish_ts, _ = await _poll_until_done(pool_name, zpool_bin, scrub_in_progress, START_GRACE)
+    else:
+        start_ts, finish_ts = await _wait_finish(pool_name, zpool_bin, events, SCRUB_START, SCRUB_FINISH,
+                                                 scrub_in_progress) or (None, None)
+    if start_ts is None:
+        print("[WARNUNG] Kein Scrub nach dem Rebuild beobachtet (zfs_rebuild_scrub_enabled?).")
+        return None, None
+    return start_ts, finish_ts
+
+
+async def wait_for_resilver(pool_name, trigger, zpool_bin=None, timeout=None, scrub=False):
+    """Führt `trigger()` (Coroutine-Funktion) aus und misst die Resilver-Dauer.
+
+    `zpool events -f` läuft schon vor dem Trigger, damit kein Event verloren
+    geht; ohne Events wird `zpool status` adaptiv gepollt. Rückgabe ist ein
+    Dict mit duration (s), method ("events", "polling", "polling-completed",
+    wenn der Resilver beim ersten Poll schon fertig war (Dauer bis zu
+    diesem Poll, also eine Obergrenze), oder "none", wenn gar kein
+    Resilver lief; dann ist die Dauer 0), den monotonen
+    Zeitstempeln, dem finalen Status-Text und den Kennzahlen aus
+    redundancy_times(). Mit `scrub` wird anschließend auf den Scrub
+    gewartet.
+    """
+    zpool_bin = zpool_bin or ZPOOL_BIN
+    last_eid = await _baseline_eid(zpool_bin)
+    events = asyncio.Queue()
+    follower = None
+    if last_eid is None:
+        print("[INFO] zpool events nicht verfügbar, nutze adaptives Polling.")
+    else:
+        follower = asyncio.create_task(_follow_events(pool_name, zpool_bin, last_eid, events))
+
+    try:
+        trigger_ts = time.monotonic()
+        trigger_wall = time.time()
+        await trigger()
+        try:
+            if follower is not None:
+                finished = await asyncio.wait_for(_wait_finish(pool_name, zpool_bin, events), timeout)
+                if finished is None:
+                    print("[WARNUNG] Kein Resilver beobachtet (weder Event noch Status), Dauer 0.")
+                    start_ts, finish_ts, method = None, trigger_ts, NO_RESILVER
+                else:
+                    (start_ts, finish_ts), method = finished, "events"
+            else:
+                seen_ts, finish_ts, status = await asyncio.wait_for(_poll_until_done(pool_name, zpool_bin),
+                                                                    timeout)
+                # die Dauer zählt beim Polling ab dem Trigger, der erste Poll ist nur ein Nachweis
+                start_ts, method = None, "polling"
+                if seen_ts is None:
+                    completed = resilver_completed_at(status)
+                    # die Zeitangabe im Status hat nur Sekunden-Auflösung
+                    if completed is not None and completed >= int(trigger_wall):
+                        print("[INFO] Resilver war beim ersten Poll schon abgeschlossen, Dauer bis zu diesem Poll.")
+                        method = COMPLETED_BEFORE_POLL
+                    else:
+                        print("[WARNUNG] Kein Resilver im Status beobachtet, Dauer 0.")
+                        finish_ts, method = trigger_ts, NO_RESILVER
+            scrub_start_ts = scrub_finish_ts = None
+            if scrub:
+                scrub_start_ts, scrub_finish_ts = await asyncio.wait_for(
+                    _wait_scrub(pool_name, zpool_bin, events, follower), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Resilver nicht innerhalb des Timeouts abgeschlossen")
+    finally:
+        if follower is not None:
+            follower.cancel()
+            await asyncio.gather(follower, return_exceptions=True)
+
+    begin = start_ts if start_ts is not None else trigger_ts
+    result = {
+        "duration": finish_ts - begin,
+        "duration_since_trigger": finish_ts - trigger_ts,
+        "method": method,
+        "trigger_ts": trigger_ts,
+        "start_ts": start_ts,
+        "finish_ts": finish_ts,
+        "status": await pool_status(pool_name, zpool_bin),
+    }
+    result.update(redundancy_times(begin, finish_ts, scrub_start_ts, scrub_finish_ts))
+    return result
+
+
+async def _status_sample(sampler):
+    """Ein Fortschritts-Sample, per `zpool status -j`, solange das nicht ausgeschlossen ist.
+
+    Warnungen vor dem JSON werden übersprungen. Erst ein gelesenes JSON
+    legt sampler.use_json auf True fest; auf Text wird endgültig erst nach
+    JSON_PROBES Abfragen ohne JSON umgestellt, bis dahin gilt der Text
+    nur für das jeweilige Sample.
+    """
+    if sampler.use_json is not False:
+        output = await run(f"{sampler.zpool_bin} status -j --json-int -p {sampler.pool_name}",
+                           check=False, timeout=STATUS_TIMEOUT)
+        start = output.find("{")
+        try:
+            if start < 0:
+                raise ValueError("keine JSON-Ausgabe")
+            sample = parse_status_json(output[start:], sampler.pool_name)
+        except ValueError:
+            if sampler.use_json:
+                raise
+            sampler.json_failures += 1
+            if sampler.json_failures >= JSON_PROBES:
+                sampler.use_json = False
+        else:
+            sampler.use_json = True
+            return sample
+    return parse_status_text(await run(f"{sampler.zpool_bin} status -p {sampler.pool_name}",
+                                       check=False, timeout=STATUS_TIMEOUT))
+
+
+async def _sample_progress(sampler):
+    while True:
+        try:
+            sampler.record(await _status_sample(sampler))
+        except (CommandError, ValueError) as e:
+            print(f"[WARNUNG] Fortschritt nicht lesbar: {e}")
+        await asyncio.sleep(sampler.interval)
+
+
+async def _sample_diskstats(collector):
+    with open(collector.diskstats) as f:
+        next_tick = time.monotonic()
+        try:
+            while True:
+                collector.read_once(f)
+                next_tick += collector.interval
+                await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+        finally:
+            # Endstand mitnehmen, damit der letzte Abschnitt nicht fehlt
+            collector.read_once(f)
+
+
+def attach_samples(result, scenario, sampler=None, collector=None, telemetry_path=None):
+    """Übernimmt Fortschritts- und Telemetrie-Zeitreihen ins Ergebnis-Dict."""
+    print(f"[INFO] Resilver abgeschlossen nach {result['duration']:.2f} s ({result['method']}).")
+    if "scrub_s" in result:
+        print(f"[INFO] Redundanz nach {result['redundancy_s']:.2f} s wiederhergestellt, Scrub {result['scrub_s']:.2f} s, "
+              f"verifiziert nach {result['verified_s']:.2f} s.")
+    result["scenario"] = scenario.name
+    if sampler is not None:
+        result["progress"] = sampler.summary()
+    if collector is not None:
+        result["telemetry"] = collector.summary()
+        if telemetry_path:
+            collector.save(telemetry_path)
+            result["telemetry"]["path"] = telemetry_path
+    return result
+
+
+async def simulate_resilver(pool_name, cfg, scenario, timeout=None, progress_interval=1.0,
+                            telemetry_interval=0.0, telemetry_path=None, load=None):
+    """Ausfall laut Szenario, Ersetzen, Warten auf Abschluss; Ergebnis-Dict von wait_for_resilver().
+
+    Mit progress_interval > 0 läuft ein Task mit ProgressSampler, dessen
+    Zeitreihe unter result["progress"] abgelegt wird. Mit
+    telemetry_interval > 0 werden die Disks per /proc/diskstats beobachtet
+    (result["telemetry"], volle Zeitreihe optional als .npz unter
+    telemetry_path). Mit `load` (Optionen für load.BackgroundLoad) läuft die
+    Messung unter fio-Hintergrundlast, siehe load.resilver_under_load().
+    """
+    if load is not None:
+        from .load import resilver_under_load
+        return await resilver_under_load(
+            lambda: simulate_resilver(pool_name, cfg, scenario, timeout, progress_interval, telemetry_interval,
+                                      telemetry_path),
+            cfg["mountpoint"], load)
+    await asyncio.to_thread(scenario.fail, pool_name, cfg)
+
+    tasks = []
+    collector = None
+    if telemetry_interval:
+        # numpy wird nur für die Telemetrie gebraucht
+        from .telemetry import DiskstatsCollector
+        collector = DiskstatsCollector(cfg["used_disks"], interval=telemetry_interval)
+        tasks.append(asyncio.create_task(_sample_diskstats(collector)))
+    sampler = None
+    if progress_interval:
+        sampler = ProgressSampler(pool_name, interval=progress_interval)
+        sampler.begin()
+        tasks.append(asyncio.create_task(_sample_progress(sampler)))
+
+    print("[INFO] Warte auf Resilvering...")
+    try:
+        result = await wait_for_resilver(pool_name, lambda: asyncio.to_thread(scenario.replace, pool_name, cfg),
+                                         timeout=timeout, scrub=scenario.verify_scrub)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.to_thread(scenario.finish, pool_name, cfg)
+    return attach_samples(result, scenario, sampler, collector, telemetry_path)
+
+
+async def create_pool(cfg, wipe=True):
+    """Erstellt den Pool aus einer Konfiguration von generate_*_configs().
+
+    Gibt die Setup-Zeiten in Sekunden zurück (wipe_s, create_s, setup_s).
+    """
+    pool_name = cfg["pool_name"]
+    timings = {"wipe_s": 0.0}
+    start = time.monotonic()
+    if wipe:
+        print(f"[INFO] Wipe alte Metadaten von {len(cfg['used_disks'])} Disks (parallel)...")
+        await asyncio.to_thread(wipe_disks, cfg["used_disks"])
+        timings["wipe_s"] = time.monotonic() - start
+
+    print("[INFO] Erstelle Pool...")
+    created = time.monotonic()
+    await run(cfg["zpool_create_cmd"])
+    print("[INFO] Deaktiviere Kompression...")
+    await run(f"zfs set compression=off {pool_name}")
+    timings["create_s"] = time.monotonic() - created
+    timings["setup_s"] = time.monotonic() - start
+    print(f"[INFO] Setup in {timings['setup_s']:.2f} s (Wipe {timings['wipe_s']:.2f} s).")
+    return timings
+
+
+async def fill_pool(level, numjobs, pool_name, mountpoint, bs="2M", direct=None, engine="fio",
+                    pattern="incompressible", log_dir=None, log_avg_msec=1000, timeout=None, tolerance=None):
+    """Füllt den Pool, bis `zpool list` eine Belegung von `level` (0..1) zeigt.
+
+    Die Steuerung (bytegenaue Aufteilung auf die Jobs, Nachmessen und
+    Nachfüllen) steckt in fill_control.fill_to_level(); engine="fio" oder
+    "native" (fill.py) schreibt. Mit `log_dir` schreibt fio json+ und
+    bw/iops/lat-Logs dorthin (fio_logs.py), `timeout` bricht fio ab. Gibt
+    ein Dict mit Ziel, erreichtem Füllgrad (fill_ratio) und ggf. gemessenem
+    Durchsatz zurück.
+    """
+    from .fill_control import TOLERANCE, fill_to_level
+
+    return await fill_to_level(level, numjobs, pool_name, mountpoint, bs, direct, engine, pattern, log_dir,
+                               log_avg_msec, timeout, TOLERANCE if tolerance is None else tolerance)
+
+
+async def teardown(pool_name, mountpoint):
+    """Füllung entfernen und Pool löschen; Fehler werden gemeldet, nicht geworfen."""
+    try:
+        await asyncio.to_thread(clear_fill, mountpoint)
+        return await asyncio.to_thread(delete_pool, pool_name, mountpoint)
+    except Exception as e:
+        print(f"[WARNUNG] Konnte {pool_name} nicht sauber aufräumen: {e}")
+        return None
+
+
+async def run_cell(cfg, scenario, level, numjobs, fill_opts=None, fill_cache=None, resilver_opts=None,
+                   fill_timeout=None):
+    """Ein Matrix-Punkt: Pool anlegen, füllen, Resilver messen, aufräumen.
+
+    `fill_opts` geht als Keyword-Argumente an fill_pool(), `resilver_opts`
+    an simulate_resilver(). Mit `fill_cache` (fill_cache.FillCache) wird
+    die Füllung wiederverwendet und der Pool nach der Messung
+    zurückgesetzt statt gelöscht.
+    """
+    fill_opts = fill_opts or {}
+    resilver_opts = resilver_opts or {}
+    pool_name = cfg["pool_name"]
+    mountpoint = cfg["mountpoint"]
+    if fill_cache is not None:
+        cached = await fill_cache.prepare(cfg, level, numjobs, fill_opts, timeout=fill_timeout)
+        timings = dict(fill_cache.timings)
+        result = await simulate_resilver(pool_name, cfg, scenario, **resilver_opts)
+        result["fill_cached"] = cached
+        result["fill_numjobs"] = fill_cache.fill_numjobs
+        result["fill_info"] = fill_cache.fill_info
+        # Zurücksetzen auf die gesicherte Füllung statt Löschen, zählt als Teardown
+        timings["teardown_s"] = await fill_cache.restore(cfg)
+        result["timings"] = timings
+        return result
+
+    timings = await create_pool(cfg)
+    fill_info = await fill_pool(level, numjobs, pool_name, mountpoint, timeout=fill_timeout, **fill_opts)
+    result = await simulate_resilver(pool_name, cfg, scenario, **resilver_opts)
+    result["fill_info"] = fill_info
+    await asyncio.to_thread(clear_fill, mountpoint)
+    timings["teardown_s"] = await asyncio.to_thread(delete_pool, pool_name, mountpoint)
+    result["timings"] = timings
+    return result
+
+
+def run_guarded(main, cleanup):
+    """Führt die Coroutine-Funktion `main` in einer neuen Event-Loop aus.
+
+    SIGINT/SIGTERM brechen `main` ab; danach werden alle laufenden
+    Kommandos beendet und `cleanup()` (Coroutine-Funktion) ausgeführt.
+    Gibt (ergebnis, abgebrochen) zurück.
+    """
+    async def guarded():
+        loop = asyncio.get_running_loop()
+        task = asyncio.create_task(main())
+        interrupted = False
+
+        def on_signal():
+            nonlocal interrupted
+            if interrupted:
+                print("[INFO] Aufräumen läuft bereits...")
+                return
+            interrupted = True
+            print("\n[ABBRUCH] Manuell gestoppt. Aufräumen...")
+            task.cancel()
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, on_signal)
+        try:
+            try:
+                return await task, False
+            except asyncio.CancelledError:
+                if not interrupted:
+                    raise
+                return None, True
+            finally:
+                await kill_children()
+                if interrupted:
+                    await cleanup()
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+
+    return asyncio.run(guarded())
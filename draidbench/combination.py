@@ -0,0 +1,220 @@
+"""Durchsatz-Matrix bs x numjobs x iodepth mit fio (Engine für combination_v5.py).
+
+Statt jeden Punkt stur 30 s laufen zu lassen, wird die Bandbreite aus
+fios Statuszeilen (`--eta-newline=1`) jede Sekunde mitgelesen. Sobald
+der Variationskoeffizient (stdev/mean) der letzten `window` Sekunden
+unter `cv` liegt und `min_runtime` erreicht ist, bekommt fio SIGINT,
+beendet sich sauber und schreibt sein json. `max_runtime` ist die
+Obergrenze.
+
+Entlang einer Achse (Standard: numjobs) wird eskaliert: bringt ein
+größerer Wert `patience` mal hintereinander nicht mindestens `min_gain`
+mehr Bandbreite als der bisher beste, werden die restlichen Werte dieser
+Kette übersprungen und als "pruned" vermerkt.
+
+Mit mehreren Zielverzeichnissen (z.B. Mountpoints unabhängiger Pools)
+arbeitet je Ziel ein Task die Ketten parallel ab.
+"""
+import asyncio
+import itertools
+import json
+import math
+import os
+import re
+import statistics
+import time
+
+from . import aio
+from .pool import parse_size
+from .shell import CommandError
+
+AXES = ("bs", "numjobs", "iodepth")
+FIO_ARGS = "--ioengine=sync --filesize=4m:6m --nrfiles=10 --unlink=1"
+
+RATE_RE = re.compile(r"\b([rw])=([\d.]+)([kKMGTP]?i?B)/s")
+
+
+def parse_eta_line(line):
+    """Bandbreite in Bytes/s aus einer fio-Statuszeile, z.B.
+
+    Jobs: 4 (f=4): [W(4)][40.0%][w=512MiB/s][w=256 IOPS][eta 00m:18s]
+
+    Gibt die Summe aus Lesen und Schreiben zurück, None ohne Angabe.
+    """
+    total = None
+    for _, number, unit in RATE_RE.findall(line):
+        power = " KMGTP".index(unit[:-1].rstrip("i").upper() or " ")
+        base = 1024 if unit.endswith("iB") else 1000
+        total = (total or 0) + float(number) * base ** power
+    return total
+
+
+class SteadyState:
+    """Variationskoeffizient der Bandbreite über ein gleitendes Fenster."""
+
+    def __init__(self, cv=0.05, window=5, min_runtime=5.0, ramp=2.0):
+        self.threshold = cv
+        self.window = window
+        self.min_runtime = min_runtime
+        self.ramp = ramp
+        self.samples = []
+
+    def add(self, t, bw):
+        """Nimmt ein Sample auf, gibt True zurück, sobald der Durchsatz stabil ist."""
+        self.samples.append((t, bw))
+        return self.stable(t)
+
+    def cv(self):
+        values = [bw for t, bw in self.samples if t >= self.ramp][-self.window:]
+        if len(values) < self.window or len(values) < 2:
+            return None
+        mean = statistics.fmean(values)
+        if mean <= 0:
+            return None
+        return statistics.pstdev(values) / mean
+
+    def stable(self, t):
+        cv = self.cv()
+        return t >= self.min_runtime and cv is not None and cv <= self.threshold
+
+
+def fio_cmd(operation, bs, numjobs, iodepth, directory, runtime, output, fio_args=FIO_ARGS):
+    # bs/numjobs/iodepth vor --name, damit sie unter "global options" im json stehen
+    return (
+        f"fio --rw={operation if operation != 'all' else 'rw'} {fio_args} --bs={bs} "
+        f"--numjobs={numjobs} --iodepth={iodepth} "
+        f"--directory={directory} --group_reporting=1 "
+        f"--time_based=1 --runtime={math.ceil(runtime)}s --eta=always --eta-newline=1 "
+        f"--name=test_python --output-format=json --output={output}"
+    )
+
+
+def job_bandwidth(result_data):
+    """(bw_bytes, iops) aus fio-json, Lesen und Schreiben summiert."""
+    job = result_data["jobs"][0]
+    bw = sum(job.get(d, {}).get("bw_bytes", 0) for d in ("read", "write"))
+    iops = sum(job.get(d, {}).get("iops", 0.0) for d in ("read", "write"))
+    return bw, iops
+
+
+def job_latency(result_data, percentile="99.000000"):
+    """Größte clat-Perzentile (ns) über Lesen und Schreiben, None ohne Perzentile."""
+    job = result_data["jobs"][0]
+    values = [job.get(d, {}).get("clat_ns", {}).get("percentile", {}).get(percentile) for d in ("read", "write")]
+    values = [v for v in values if v]
+    return max(values) if values else None
+
+
+async def run_point(operation, point, target, result_file, max_runtime=30, cv=0.05, window=5,
+                    min_runtime=5.0, ramp=2.0, fio_args=FIO_ARGS):
+    """Ein fio-Lauf mit Abbruch bei stabilem Durchsatz. Gibt (fio-json, record) zurück."""
+    steady = SteadyState(cv, window, min_runtime, ramp)
+    start = time.monotonic()
+    stopped = []
+
+    def on_line(line):
+        bw = parse_eta_line(line)
+        if bw is None or stopped:
+            return False
+        if steady.add(time.monotonic() - start, bw):
+            stopped.append(time.monotonic() - start)
+            return True
+        return False
+
+    cmd = fio_cmd(operation, point["bs"], point["numjobs"], point["iodepth"], target, max_runtime,
+                  result_file, fio_args)
+    # fio darf nach SIGINT mit rc != 0 enden, entscheidend ist das json
+    await aio.run(cmd, check=False, timeout=max_runtime + 60, on_line=on_line)
+    try:
+        with open(result_file) as f:
+            result_data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise CommandError(cmd, None, f"kein fio-Ergebnis: {e}")
+    bw, iops = job_bandwidth(result_data)
+    record = dict(point, target=target, result_file=result_file, bw_bytes=bw, iops=iops,
+                  lat_p99_ns=job_latency(result_data),
+                  runtime_s=time.monotonic() - start, steady=bool(stopped), cv=steady.cv(), samples=len(steady.samples))
+    return result_data, record
+
+
+def make_chains(bs_list, numjobs_list, iodepth_list, escalate="numjobs"):
+    """Gruppiert die Matrix in Ketten entlang der Eskalationsachse (aufsteigend sortiert)."""
+    values = {"bs": list(bs_list), "numjobs": list(numjobs_list), "iodepth": list(iodepth_list)}
+    if escalate == "none":
+        return [[dict(zip(AXES, combo))] for combo in itertools.product(*(values[a] for a in AXES))]
+    others = [a for a in AXES if a != escalate]
+    steps = sorted(values[escalate], key=parse_size)
+    chains = []
+    for combo in itertools.product(*(values[a] for a in others)):
+        fixed = dict(zip(others, combo))
+        chains.append([dict(fixed, **{escalate: step}) for step in steps])
+    return chains
+
+
+async def run_combinations_async(operation, bs_list, numjobs_list, iodepth_list, targets, dest_folder,
+                                 escalate="numjobs", min_gain=0.05, patience=1, on_result=None, **point_opts):
+    """Arbeitet alle Ketten ab, ein Task pro Ziel.
+
+    Jeder Punkt geht sofort als on_result(record, fio-json) raus, auch
+    übersprungene (pruned=True) und fehlgeschlagene (error, fio-json None).
+    Gehalten wird nichts; zurück kommen nur die Zähler runs/pruned/failed.
+    """
+    chains = asyncio.Queue()
+    for chain in make_chains(bs_list, numjobs_list, iodepth_list, escalate):
+        chains.put_nowait(chain)
+    total = chains.qsize()
+    counts = {"runs": 0, "pruned": 0, "failed": 0}
+
+    def emit(record, result_data=None):
+        if on_result is not None:
+            on_result(record, result_data)
+
+    async def worker(index, target):
+        while not chains.empty():
+            chain = chains.get_nowait()
+            best, stale = None, 0
+            for step, point in enumerate(chain):
+                if stale >= patience:
+                    for skipped in chain[step:]:
+                        print(f"[INFO] Überspringe {skipped} (Bandbreite steigt nicht mehr)")
+                        counts["pruned"] += 1
+                        emit(dict(skipped, target=target, pruned=True))
+                    break
+                suffix = f"_t{index}" if len(targets) > 1 else ""
+                result_file = os.path.join(
+                    dest_folder, f"result_{point['bs']}_{point['numjobs']}_{point['iodepth']}{suffix}.json")
+                print(f"[TEST {target}] bs={point['bs']} numjobs={point['numjobs']} iodepth={point['iodepth']}")
+                try:
+                    result_data, record = await run_point(operation, point, target, result_file, **point_opts)
+                except CommandError as e:
+                    print(f"[FEHLER] {e}")
+                    counts["failed"] += 1
+                    emit(dict(point, target=target, error=str(e)))
+                    continue
+                counts["runs"] += 1
+                emit(record, result_data)
+                cv = f"{record['cv']:.3f}" if record["cv"] is not None else "?"
+                print(f"[INFO] {record['bw_bytes'] / 1024 ** 2:.1f} MiB/s nach {record['runtime_s']:.1f} s "
+                      f"(CV {cv}{', stabil' if record['steady'] else ''})")
+                if best is None or record["bw_bytes"] >= best * (1 + min_gain):
+                    best, stale = record["bw_bytes"], 0
+                else:
+                    stale += 1
+            print(f"[INFO] {total - chains.qsize()}/{total} Ketten gestartet")
+
+    await asyncio.gather(*(worker(i, target) for i, target in enumerate(targets)))
+    return counts
+
+
+def run_combinations(*args, **kwargs):
+    """Synchroner Einstieg; Strg+C beendet alle laufenden fio-Prozesse."""
+    async def main():
+        return await run_combinations_async(*args, **kwargs)
+
+    async def cleanup():
+        pass
+
+    outcome, interrupted = aio.run_guarded(main, cleanup)
+    if interrupted:
+        raise KeyboardInterrupt
+    return outcome
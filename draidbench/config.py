@@ -0,0 +1,94 @@
+"""Standardwerte und Erzeugung der dRAID-Konfigurationen."""
+import re
+
+POOL_NAME = "mypool"
+MOUNTPOINT = "/mnt/draidBenchmark"
+PARITY = 2
+
+SYNTAX_RE = re.compile(r"draid(\d+):(\d+)d:(\d+)s:(\d+)c")
+
+
+def parse_syntax(zfs_syntax):
+    """(parity, data, spares, children) aus "draid2:4d:1s:11c"."""
+    m = SYNTAX_RE.search(zfs_syntax)
+    if not m:
+        raise ValueError(f"Kein dRAID-Layout: {zfs_syntax}")
+    return tuple(int(x) for x in m.groups())
+
+
+def _create_cmd(pool_name, mountpoint, vdev_parts):
+    return (
+        f"zpool create -f -m {mountpoint} -o ashift=12 {pool_name} \\\n  " +
+        " \\\n  ".join(vdev_parts)
+    )
+
+
+def generate_rg_configs(dev_paths, spares=1, pool_name=POOL_NAME, mountpoint=MOUNTPOINT):
+    """Ein dRAID-vdev über alle Disks, jede Datenbreite die die Gruppen glatt teilt."""
+    children = len(dev_paths)
+    parity = PARITY
+    configs = []
+
+    for data in range(1, children - spares - parity + 1):
+        if (children - parity - spares) % data != 0:
+            continue
+
+        vdev_config = f"draid{parity}:{data}d:{spares}s:{children}c"
+        configs.append({
+            "vdevs": 1,
+            "children": children,
+            "spares": spares,
+            "parity": parity,
+            "data": data,
+            "zfs_syntax": vdev_config,
+            "zpool_create_cmd": _create_cmd(pool_name, mountpoint,
+                                            [f"{vdev_config} {' '.join(dev_paths)}"]),
+            "used_disks": list(dev_paths),
+            "pool_name": pool_name,
+            "mountpoint": mountpoint,
+        })
+
+    configs.sort(key=lambda x: x["data"])
+    return configs
+
+
+def generate_draid2_configs(dev_paths, min_children=4, spares=1,
+                            pool_name=POOL_NAME, mountpoint=MOUNTPOINT):
+    """Mehrere gleich große dRAID-vdevs, die letzte Disk bleibt als physische Spare frei."""
+    total_disks = len(dev_paths) - 1
+    parity = PARITY
+    configs = []
+
+    for vdevs in range(1, total_disks + 1):
+        if total_disks % vdevs != 0:
+            continue
+
+        children = total_disks // vdevs
+        if children < min_children:
+            continue
+
+        data = children - parity - spares
+        if data < 1:
+            continue
+
+        vdev_config = f"draid{parity}:{data}d:{spares}s:{children}c"
+        vdev_parts = []
+        for i in range(vdevs):
+            start = i * children
+            vdev_parts.append(f"{vdev_config} {' '.join(dev_paths[start:start + children])}")
+
+        configs.append({
+            "vdevs": vdevs,
+            "children": children,
+            "spares": spares,
+            "parity": parity,
+            "data": data,
+            "zfs_syntax": vdev_config,
+            "zpool_create_cmd": _create_cmd(pool_name, mountpoint, vdev_parts),
+            "used_disks": dev_paths[:total_disks],
+            "spare_disk": dev_paths[total_disks],
+            "pool_name": pool_name,
+            "mountpoint": mountpoint,
+        })
+
+    return configs
@@ -0,0 +1,176 @@
+"""Device-Provider: woher die Disks für die Test-Pools kommen.
+
+  jbod     echte Disks über discovery.get_valid_disk_paths()
+  files    N Sparse-Dateien, ZFS nutzt sie direkt als vdevs
+  loop     N Sparse-Dateien als Loop-Devices, optional über dm-delay
+           gedrosselt
+  dry-run  Stub-Binaries für zpool/zfs/fio & co. (dryrun_stub.py), die
+           vorab aufgezeichnete Ausgaben abspielen; es wird nichts
+           angefasst: der Mountpoint liegt im Stub-Verzeichnis, Wipe und
+           native Füllung schreiben nicht (dry_run_active())
+
+Alle Provider haben setup() -> Liste von Device-Pfaden und cleanup().
+`mountpoint` ist None oder ersetzt den konfigurierten Mountpoint.
+"""
+import os
+import shutil
+import stat
+import sys
+import tempfile
+
+from .discovery import get_valid_disk_paths
+from .shell import run_cmd
+
+PROVIDERS = ("jbod", "files", "loop", "dry-run")
+
+# Kommandos, die der Dry-Run-Modus durch Stubs ersetzt
+STUB_COMMANDS = ("zpool", "zfs", "fio", "wipefs", "sysctl", "fuser", "umount", "smartctl")
+# gesetzt, solange ein DryRunProvider aktiv ist; Python-eigene I/O prüft es
+DRY_RUN_ENV = "DRAIDBENCH_DRY_RUN"
+
+
+def dry_run_active():
+    return os.environ.get(DRY_RUN_ENV) == "1"
+
+
+class JbodProvider:
+    name = "jbod"
+    mountpoint = None
+
+    def setup(self):
+        return get_valid_disk_paths()
+
+    def cleanup(self):
+        pass
+
+
+class SparseFileProvider:
+    """Sparse-Dateien als vdevs, mit loop=True als Loop-Devices.
+
+    `delay_ms` legt über jedes Loop-Device ein dm-delay-Target mit dieser
+    Verzögerung für Lese- und Schreibzugriffe (braucht loop=True).
+    """
+    mountpoint = None
+
+    def __init__(self, count, size="8G", directory="/var/tmp/draidbench-devs", loop=False, delay_ms=0):
+        if delay_ms and not loop:
+            raise ValueError("dm-delay braucht Loop-Devices (--devices loop)")
+        self.count = count
+        self.size = size
+        self.directory = directory
+        self.loop = loop
+        self.delay_ms = delay_ms
+        self.name = "loop" if loop else "files"
+        self.files = []
+        self.loops = []
+        self.mappers = []
+
+    def setup(self):
+        os.makedirs(self.directory, exist_ok=True)
+        paths = []
+        for i in range(self.count):
+            path = os.path.abspath(os.path.join(self.directory, f"disk{i:03d}.img"))
+            run_cmd(f"truncate -s {self.size} {path}")
+            self.files.append(path)
+            paths.append(path)
+
+        if self.loop:
+            paths = []
+            for path in self.files:
+                dev = run_cmd(f"losetup -f --show {path}")
+                self.loops.append(dev)
+                paths.append(dev)
+
+        if self.delay_ms:
+            paths = []
+            for i, dev in enumerate(self.loops):
+                name = f"draidbench-delay{i:03d}"
+                sectors = run_cmd(f"blockdev --getsz {dev}")
+                run_cmd(f"dmsetup create {name} --table '0 {sectors} delay {dev} 0 {self.delay_ms}'")
+                self.mappers.append(name)
+                paths.append(f"/dev/mapper/{name}")
+
+        print(f"[INFO] {len(paths)} {self.name}-Devices angelegt ({self.size} je Device).")
+        return paths
+
+    def cleanup(self):
+        for name in self.mappers:
+            run_cmd(f"dmsetup remove {name}", check=False)
+        for dev in self.loops:
+            run_cmd(f"losetup -d {dev}", check=False)
+        for path in self.files:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self.mappers, self.loops, self.files = [], [], []
+
+
+class DryRunProvider:
+    """Legt Stub-Binaries an und stellt sie in PATH vor die echten Tools.
+
+    Die Stubs simulieren einen Pool mit Resilver von `resilver_seconds`.
+    Mit `canned_dir` werden stattdessen aufgezeichnete Ausgaben abgespielt
+    (Dateinamen siehe dryrun_stub.py). Modulparameter und sysctls landen in
+    einer Fake-Wurzel im Stub-Verzeichnis (tunables.make_fake_root).
+    """
+    name = "dry-run"
+
+    def __init__(self, count, resilver_seconds=2.0, canned_dir=None):
+        self.count = count
+        self.resilver_seconds = resilver_seconds
+        self.canned_dir = canned_dir
+        self.stub_dir = None
+        self.mountpoint = None
+        self.old_env = {}
+
+    def setup(self):
+        self.stub_dir = tempfile.mkdtemp(prefix="draidbench-stubs-")
+        stub = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dryrun_stub.py")
+        for cmd in STUB_COMMANDS:
+            path = os.path.join(self.stub_dir, cmd)
+            with open(path, "w") as f:
+                f.write(f'#!/bin/sh\nexec "{sys.executable}" "{stub}" {cmd} "$@"\n')
+            os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+        from .tunables import ROOT_ENV, make_fake_root
+
+        self.mountpoint = os.path.join(self.stub_dir, "mnt", "draidBenchmark")
+        env = {
+            DRY_RUN_ENV: "1",
+            "PATH": self.stub_dir + os.pathsep + os.environ.get("PATH", ""),
+            "DRYRUN_STATE_DIR": self.stub_dir,
+            "DRYRUN_RESILVER_SECONDS": str(self.resilver_seconds),
+            ROOT_ENV: make_fake_root(os.path.join(self.stub_dir, "sysroot")),
+        }
+        if self.canned_dir:
+            env["DRYRUN_CANNED_DIR"] = os.path.abspath(self.canned_dir)
+        for key, value in env.items():
+            self.old_env[key] = os.environ.get(key)
+            os.environ[key] = value
+
+        print(f"[INFO] Dry-Run: Stubs in {self.stub_dir}")
+        return [f"/dev/disk/by-id/wwn-0x5000dry{i:09x}" for i in range(self.count)]
+
+    def cleanup(self):
+        for key, value in self.old_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        self.old_env = {}
+        if self.stub_dir:
+            shutil.rmtree(self.stub_dir, ignore_errors=True)
+            self.stub_dir = None
+            self.mountpoint = None
+
+
+def make_provider(kind, count=12, size="8G", directory="/var/tmp/draidbench-devs", delay_ms=0,
+                  resilver_seconds=2.0, canned_dir=None):
+    if kind == "jbod":
+        return JbodProvider()
+    if kind in ("files", "loop"):
+        return SparseFileProvider(count, size, directory, loop=(kind == "loop"), delay_ms=delay_ms)
+    if kind == "dry-run":
+        return DryRunProvider(count, resilver_seconds, canned_dir)
+    raise ValueError(f"Unbekannter Device-Provider: {kind}")
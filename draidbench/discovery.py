@@ -0,0 +1,175 @@
+"""Findet die Benchmark-Disks ohne serielle smartctl-Schleife.
+
+Ablauf:
+  1. /dev/disk/by-id/wwn-* einmal auflösen -> Dict {sdX: by-id-Pfad}
+  2. WWN/LUN-ID aus sysfs lesen (device/wwid, sonst device/vpd_pg83)
+  3. nur für Disks, die sysfs nicht beantworten kann, smartctl im Threadpool
+  4. Ergebnis auf Platte cachen, Schlüssel ist die Menge der Devices
+
+Alle Wurzelpfade sind Parameter, damit ein nachgebauter sysfs/by-id-Baum
+in einem Temp-Verzeichnis genutzt werden kann.
+"""
+import hashlib
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+SYSFS_ROOT = "/sys"
+DEV_ROOT = "/dev"
+CACHE_FILE = os.path.expanduser("~/.cache/draidbench/discovery.json")
+SMARTCTL_WORKERS = 16
+# eine hängende Disk darf die Discovery nicht blockieren
+SMARTCTL_TIMEOUT = 30
+
+# "Logical Unit id: 0x5000cca263079194" -> 18 Zeichen, wie im alten Bash-Loop
+LUN_ID_LEN = 18
+
+
+def _is_whole_disk(name):
+    return name.startswith("sd") and not any(c.isdigit() for c in name)
+
+
+def list_block_devices(sysfs_root=SYSFS_ROOT):
+    """Ganze SCSI-Disks (sdX ohne Partitionsnummer) aus /sys/block."""
+    try:
+        names = os.listdir(os.path.join(sysfs_root, "block"))
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in names if _is_whole_disk(n))
+
+
+def resolve_by_id(dev_root=DEV_ROOT, prefix="wwn-"):
+    """Löst alle by-id-Links in einem Durchlauf auf: {sdX: by-id-Pfad}."""
+    by_id_dir = os.path.join(dev_root, "disk", "by-id")
+    mapping = {}
+    try:
+        entries = sorted(os.listdir(by_id_dir))
+    except FileNotFoundError:
+        return mapping
+    for entry in entries:
+        if not entry.startswith(prefix) or "-part" in entry:
+            continue
+        link = os.path.join(by_id_dir, entry)
+        target = os.path.basename(os.path.realpath(link))
+        # erster Treffer gewinnt, wie das "break" im alten Skript
+        mapping.setdefault(target, link)
+    return mapping
+
+
+def parse_vpd_pg83(data):
+    """Sucht den NAA-Designator (Typ 3) der Logical Unit in VPD-Seite 0x83."""
+    if len(data) < 4 or data[1] != 0x83:
+        return None
+    end = min(len(data), 4 + ((data[2] << 8) | data[3]))
+    pos = 4
+    while pos + 4 <= end:
+        code_type = data[pos + 1]
+        length = data[pos + 3]
+        designator = data[pos + 4:pos + 4 + length]
+        association = (code_type >> 4) & 0x3
+        if (code_type & 0x0F) == 3 and association == 0 and designator:
+            return "0x" + designator.hex()
+        pos += 4 + length
+    return None
+
+
+def read_lun_id(name, sysfs_root=SYSFS_ROOT):
+    """LUN-ID im smartctl-Format (0x...) aus sysfs, None wenn nicht lesbar."""
+    device_dir = os.path.join(sysfs_root, "block", name, "device")
+    try:
+        with open(os.path.join(device_dir, "wwid")) as f:
+            wwid = f.read().strip()
+        match = re.match(r"naa\.([0-9a-fA-F]+)$", wwid)
+        if match:
+            return "0x" + match.group(1).lower()
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(device_dir, "vpd_pg83"), "rb") as f:
+            return parse_vpd_pg83(f.read())
+    except OSError:
+        return None
+
+
+def smartctl_lun_id(dev_path, timeout=SMARTCTL_TIMEOUT):
+    try:
+        result = subprocess.run(["smartctl", "-i", dev_path], capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print(f"[WARNUNG] smartctl {dev_path} nach {timeout} s abgebrochen, Disk wird übersprungen.")
+        return None
+    for line in result.stdout.splitlines():
+        if "Logical Unit id" in line:
+            parts = line.split()
+            if len(parts) >= 4:
+                return parts[3]
+    return None
+
+
+def _cache_key(names, by_id):
+    h = hashlib.sha256()
+    for name in names:
+        h.update(f"{name}={by_id.get(name, '')}\n".encode())
+    return h.hexdigest()
+
+
+def _load_cache(cache_file, key):
+    try:
+        with open(cache_file) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("key") != key:
+        return None
+    return data.get("paths")
+
+
+def _store_cache(cache_file, key, paths):
+    os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+    tmp = cache_file + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"key": key, "paths": paths}, f)
+    os.replace(tmp, cache_file)
+
+
+def get_valid_disk_paths(sysfs_root=SYSFS_ROOT, dev_root=DEV_ROOT,
+                         cache_file=CACHE_FILE, use_cache=True,
+                         smartctl=smartctl_lun_id, workers=SMARTCTL_WORKERS):
+    """Gibt die wwn-by-id-Pfade aller Disks mit gültiger LUN-ID zurück.
+
+    Reihenfolge entspricht dem alten `for dev in /dev/sd*`-Glob.
+    """
+    names = list_block_devices(sysfs_root)
+    by_id = resolve_by_id(dev_root)
+    key = _cache_key(names, by_id)
+
+    if use_cache and cache_file:
+        cached = _load_cache(cache_file, key)
+        if cached is not None:
+            print(f"[INFO] {len(cached)} gültige Disks gefunden (Cache).")
+            return cached
+
+    lun_ids = {name: read_lun_id(name, sysfs_root) for name in names}
+    missing = [name for name, lun in lun_ids.items() if lun is None]
+    if missing:
+        print(f"[INFO] {len(missing)} Disks ohne sysfs-ID, frage smartctl...")
+        dev_paths = [os.path.join(dev_root, name) for name in missing]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for name, lun in zip(missing, pool.map(smartctl, dev_paths)):
+                lun_ids[name] = lun
+
+    paths = []
+    for name in names:
+        lun = lun_ids.get(name)
+        if lun and len(lun) == LUN_ID_LEN and name in by_id:
+            paths.append(by_id[name])
+
+    if cache_file:
+        try:
+            _store_cache(cache_file, key, paths)
+        except OSError as e:
+            print(f"[WARNUNG] Discovery-Cache nicht schreibbar: {e}")
+
+    print(f"[INFO] {len(paths)} gültige Disks gefunden.")
+    return paths
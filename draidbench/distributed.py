@@ -0,0 +1,415 @@
+"""Verteilte Test-Matrix über mehrere Storage-Knoten.
+
+Der Koordinator legt die Matrix-Punkte in eine SQLite-Queue, pro Host
+läuft ein Worker, der sich Punkte per Lease holt. Während der Messung
+verlängert ein Heartbeat-Thread den Lease; stirbt ein Knoten, läuft der
+Lease ab und ein anderer Worker übernimmt den Punkt. Ergebnisse landen
+mit Host-Angabe in derselben Datenbank und lassen sich in einen
+JSONL-ResultStore exportieren.
+
+Hintergrundlast (--load*) und Modulparameter (--tunable) legt der
+Koordinator beim Einreihen fest: sie stehen im Punkt und in dessen
+Schlüssel, der Worker setzt vor jedem Punkt dessen Parametersatz (und
+nimmt die Parameter des vorigen zurück, die nicht mehr gesetzt sind).
+
+Jeder Punkt läuft über sweep.run_cell(), die synchrone Hülle um
+aio.run_cell(); ein SIGINT räumt den Pool des laufenden Punkts weg.
+
+Die Datenbank läuft im Rollback-Journal-Modus (journal_mode=DELETE):
+WAL braucht gemeinsamen Speicher über eine mmap der -shm-Datei und geht
+daher nicht über NFS. Das Dateisystem muss funktionierende fcntl-Locks
+haben (lokal oder ein sauber konfiguriertes NFSv4). Zum lokalen Testen
+mehrere Worker mit `--devices dry-run` starten:
+
+    python -m draidbench.distributed enqueue --queue q.db --device-count 12
+    python -m draidbench.distributed worker --queue q.db --devices dry-run &
+    python -m draidbench.distributed worker --queue q.db --devices dry-run &
+    python -m draidbench.distributed export --queue q.db --results all.jsonl
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+from .fill_cache import FillCache
+from .load import load_tag
+from .pool import CACHE_SETTINGS, clear_fill, delete_pool, restore_cache_settings, tune_cache_for_benchmark
+from .scenarios import get_scenario
+from .store import ResultStore, disk_set_hash
+from .sweep import (LAYOUTS, add_load_arguments, build_parser, cell_fill_opts, cell_resilver_opts, cell_tunables,
+                    fill_opts_from_args, load_opts_from_args, make_record, provider_from_args,
+                    resilver_opts_from_args, run_cell)
+from .tunables import Tunables, expand_sets, tunables_tag
+
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cells (
+    key TEXT PRIMARY KEY,
+    disk_count INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    priority REAL NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    record TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+"""
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def remote_cell_key(cell):
+    """Host-unabhängiger Schlüssel: statt Disk-Hash die Anzahl Disks.
+
+    Last und Modulparameter hängen wie bei store.cell_key() als
+    "|load=..." bzw. "|tun=..." an.
+    """
+    key = (f"{cell['zfs_syntax']}|fill={cell['fill']:g}|numjobs={cell['numjobs']}|"
+           f"{cell['scenario']}|disks={cell['disk_count']}")
+    workload = load_tag(cell.get("load"))
+    if workload:
+        key += f"|load={workload}"
+    tunables = tunables_tag(cell.get("tunables"))
+    if tunables:
+        key += f"|tun={tunables}"
+    return key
+
+
+def matrix_cells(scenario, layout, disk_count, fill_levels, numjobs_list, spares=None, load=None,
+                 tunable_sets=None):
+    """Matrix-Punkte für Hosts mit `disk_count` Disks.
+
+    `load` sind die Optionen der Hintergrundlast (sweep.load_opts_from_args,
+    ohne das host-lokale Log-Verzeichnis), `tunable_sets` die Parametersätze
+    (tunables.expand_sets); jeder Punkt kommt mit jedem Satz in die Queue.
+    """
+    scenario = get_scenario(scenario)
+    spares = scenario.spares if spares is None else spares
+    load = {k: v for k, v in load.items() if k not in ("log_root", "log_dir")} if load else None
+    placeholder = [f"disk{i}" for i in range(disk_count)]
+    cells = []
+    for cfg in LAYOUTS[layout](placeholder, spares=spares):
+        for level in fill_levels:
+            for numjobs, settings in itertools.product(numjobs_list or [cfg["vdevs"]], tunable_sets or [None]):
+                cells.append({
+                    "scenario": scenario.name,
+                    "layout": layout,
+                    "spares": spares,
+                    "disk_count": disk_count,
+                    "zfs_syntax": cfg["zfs_syntax"],
+                    "vdevs": cfg["vdevs"],
+                    "fill": level,
+                    "numjobs": numjobs,
+                    "load": load,
+                    "tunables": settings or None,
+                })
+    return cells
+
+
+class Queue:
+    def __init__(self, path):
+        self.path = path
+        self.conn = connect(path)
+
+    def enqueue(self, cells, priority=0.0):
+        """Fügt Punkte hinzu, bereits vorhandene bleiben unverändert. Gibt die Anzahl neuer zurück."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        added = 0
+        for cell in cells:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO cells (key, disk_count, payload, priority, updated) VALUES (?, ?, ?, ?, ?)",
+                (remote_cell_key(cell), cell["disk_count"], json.dumps(cell), cell.get("priority", priority), now))
+            added += cur.rowcount
+        self.conn.execute("COMMIT")
+        return added
+
+    def lease(self, worker, disk_count, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """Holt den nächsten freien oder verwaisten Punkt, None wenn keiner da ist.
+
+        Verwaiste Punkte, die schon `max_attempts` Leases hatten (z.B. weil
+        sie den Knoten jedes Mal abstürzen lassen), werden als failed markiert.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "UPDATE cells SET state = 'failed', error = 'Lease von ' || owner || ' abgelaufen', "
+                "owner = NULL, lease_until = NULL, updated = ? "
+                "WHERE disk_count = ? AND state = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, disk_count, now, max_attempts))
+            row = self.conn.execute(
+                "SELECT key, payload FROM cells WHERE disk_count = ? AND "
+                "(state = 'pending' OR (state = 'leased' AND lease_until < ?)) "
+                "ORDER BY priority DESC, rowid LIMIT 1", (disk_count, now)).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE cells SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated = ? WHERE key = ?", (worker, now + lease_seconds, now, row[0]))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return row[0], json.loads(row[1])
+
+    def open_cells(self, disk_count):
+        """Anzahl noch nicht abgeschlossener Punkte (pending oder leased)."""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM cells WHERE disk_count = ? AND state IN ('pending', 'leased')",
+            (disk_count,)).fetchone()[0]
+
+    def complete(self, key, worker, record):
+        now = time.time()
+        record = dict(record, host=socket.gethostname(), worker=worker, finished_at=now)
+        self.conn.execute("BEGIN IMMEDIATE")
+        # erstes Ergebnis gewinnt, falls ein abgelaufener Lease doppelt gemessen wurde
+        self.conn.execute("INSERT OR IGNORE INTO results (key, host, worker, record, finished_at) "
+                          "VALUES (?, ?, ?, ?, ?)", (key, record["host"], worker, json.dumps(record), now))
+        self.conn.execute("UPDATE cells SET state = 'done', owner = ?, lease_until = NULL, error = NULL, "
+                          "updated = ? WHERE key = ?", (worker, now, key))
+        self.conn.execute("COMMIT")
+
+    def fail(self, key, worker, error, max_attempts=MAX_ATTEMPTS):
+        now = time.time()
+        self.conn.execute(
+            "UPDATE cells SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "owner = NULL, lease_until = NULL, error = ?, updated = ? WHERE key = ? AND owner = ?",
+            (max_attempts, f"{worker}: {error}", now, key, worker))
+
+    def status(self):
+        return dict(self.conn.execute("SELECT state, COUNT(*) FROM cells GROUP BY state").fetchall())
+
+    def results(self):
+        for key, record in self.conn.execute("SELECT key, record FROM results ORDER BY finished_at"):
+            yield key, json.loads(record)
+
+
+class Heartbeat:
+    """Verlängert einen Lease regelmäßig (eigene DB-Verbindung im eigenen Thread)."""
+
+    def __init__(self, path, key, worker, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.key = key
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        conn = connect(self.path)
+        try:
+            while not self._stop.wait(self.lease_seconds / 3):
+                cur = conn.execute(
+                    "UPDATE cells SET lease_until = ? WHERE key = ? AND owner = ? AND state = 'leased'",
+                    (time.time() + self.lease_seconds, self.key, self.worker))
+                if cur.rowcount == 0 and not self.lost:
+                    self.lost = True
+                    print(f"[WARNUNG] Lease verloren: {self.key}")
+        finally:
+            conn.close()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def switch_tunables(tuner, previous, settings, tune_cache=False):
+    """Setzt den Parametersatz eines Punkts, nachdem `previous` (Satz des vorigen Punkts) zurückgenommen ist.
+
+    Parameter, die im neuen Satz fehlen, bekommen ihren Originalwert; mit
+    `tune_cache` werden danach die Cache-Settings erneut gesetzt, falls
+    ein Satz vm.dirty_* überschrieben hatte.
+    """
+    settings = settings or {}
+    stale = [name for name in previous or {} if name not in settings]
+    if stale:
+        tuner.restore(stale)
+        if tune_cache and any(name in CACHE_SETTINGS for name in stale):
+            tune_cache_for_benchmark(tuner)
+    if settings:
+        tuner.apply(settings)
+    return settings
+
+
+def run_worker(args):
+    worker = args.worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    # Last und Modulparameter stehen im Punkt, damit sie Teil des Schlüssels sind
+    if args.load or args.tunable:
+        print("[FEHLER] --load/--tunable gehören zu 'enqueue', der Worker übernimmt sie aus jedem Punkt.")
+        return 1
+    queue = Queue(args.queue)
+    provider = provider_from_args(args)
+    fill_cache = FillCache(args.fill_cache, args.fill_cache_dir) if args.fill_cache else None
+    configs = {}
+    tuner = None
+    try:
+        dev_paths = provider.setup()
+        # Dry-Run: Mountpoint im Stub-Verzeichnis statt des echten
+        args.mountpoint = provider.mountpoint or args.mountpoint
+        tuner = Tunables(args.sysfs_root, args.tunables_state)
+        tuner.recover()
+        if args.tune_cache:
+            tune_cache_for_benchmark(tuner)
+        settings = {}
+        disk_count = len(dev_paths)
+        print(f"[INFO] Worker {worker} mit {disk_count} Disks")
+        while True:
+            leased = queue.lease(worker, disk_count, args.lease_seconds, args.max_attempts)
+            if leased is None:
+                if queue.open_cells(disk_count) == 0:
+                    break
+                time.sleep(POLL_SECONDS)
+                continue
+            key, cell = leased
+            layout_key = (cell["layout"], cell["spares"])
+            if layout_key not in configs:
+                configs[layout_key] = {
+                    c["zfs_syntax"]: c for c in LAYOUTS[cell["layout"]](
+                        dev_paths, spares=cell["spares"], pool_name=args.pool_name, mountpoint=args.mountpoint)
+                }
+            cfg = configs[layout_key][cell["zfs_syntax"]]
+            scenario = get_scenario(cell["scenario"])
+            cache = fill_cache if fill_cache is not None and fill_cache.usable_for(scenario) else None
+
+            resilver_opts = resilver_opts_from_args(args)
+            if cell.get("load"):
+                resilver_opts["load"] = dict(cell["load"], log_root=args.load_log_dir or None)
+
+            print(f"\n[LEASE] {key}")
+            heartbeat = Heartbeat(args.queue, key, worker, args.lease_seconds).start()
+            try:
+                settings = switch_tunables(tuner, settings, cell.get("tunables"), args.tune_cache)
+                result = run_cell(cfg, scenario, cell["fill"], cell["numjobs"],
+                                  cell_fill_opts(fill_opts_from_args(args), key), cache,
+                                  cell_resilver_opts(resilver_opts, key), args.fill_timeout)
+                record = make_record(cfg, cell["fill"], cell["numjobs"], scenario, result)
+                record["disk_hash"] = disk_set_hash(cfg["used_disks"])
+                record.update(cell_tunables(tuner, settings))
+                queue.complete(key, worker, record)
+            except Exception as e:
+                print(f"[FEHLER] Test fehlgeschlagen: {e}")
+                queue.fail(key, worker, str(e), args.max_attempts)
+                if cache is not None:
+                    cache.invalidate()
+                try:
+                    clear_fill(cfg["mountpoint"])
+                    delete_pool(cfg["pool_name"], cfg["mountpoint"])
+                except Exception:
+                    pass
+            finally:
+                heartbeat.stop()
+    except KeyboardInterrupt:
+        # der Lease läuft ab, ein anderer Worker übernimmt den Punkt
+        return 130
+    finally:
+        if fill_cache is not None:
+            asyncio.run(fill_cache.drop())
+        if tuner is not None:
+            if args.tune_cache:
+                restore_cache_settings()
+            tuner.restore()
+        provider.cleanup()
+    print(f"[INFO] Worker {worker}: keine offenen Punkte mehr.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verteilte dRAID-Resilver-Matrix")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("enqueue", help="Matrix-Punkte in die Queue legen")
+    p.add_argument("--queue", required=True)
+    p.add_argument("--scenario", default="worst-case-wipe")
+    p.add_argument("--layout", choices=sorted(LAYOUTS), default="single")
+    p.add_argument("--device-count", type=int, required=True, help="Anzahl Disks pro Host")
+    p.add_argument("--spares", type=int, default=None)
+    p.add_argument("--fill-levels", type=float, nargs="+", default=[0.01])
+    p.add_argument("--numjobs", type=int, nargs="*", default=[1, 4, 8, 16, 32, 64, 128])
+    p.add_argument("--model", default=None,
+                   help="resilver_model.json: kurze vorhergesagte Resilver zuerst vergeben")
+    add_load_arguments(p)
+    # die fio-Logs der Last schreibt jeder Worker lokal (worker --load-log-dir)
+    p.set_defaults(load_log_dir="")
+
+    p = sub.add_parser("worker", help="Punkte abarbeiten", parents=[build_parser(add_help=False)],
+                       conflict_handler="resolve")
+    p.add_argument("--queue", required=True)
+    p.add_argument("--worker-id", default=None)
+    p.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS)
+    p.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+
+    p = sub.add_parser("status", help="Zustand der Queue")
+    p.add_argument("--queue", required=True)
+
+    p = sub.add_parser("export", help="Ergebnisse in einen JSONL-ResultStore schreiben")
+    p.add_argument("--queue", required=True)
+    p.add_argument("--results", required=True)
+
+    args = parser.parse_args(argv)
+    if args.command == "enqueue":
+        try:
+            tunable_sets = expand_sets(args.tunable) if args.tunable else None
+        except ValueError as e:
+            print(f"[FEHLER] {e}")
+            return 1
+        cells = matrix_cells(args.scenario, args.layout, args.device_count, args.fill_levels,
+                             args.numjobs, args.spares, load_opts_from_args(args), tunable_sets)
+        if args.model:
+            from .resilver_model import ResilverModel
+            model = ResilverModel.load(args.model)
+            predicted = model.predict(cells)
+            for cell, seconds in zip(cells, predicted):
+                cell["priority"] = -float(seconds)
+        added = Queue(args.queue).enqueue(cells)
+        print(f"[INFO] {added} neue von {len(cells)} Matrix-Punkten eingereiht.")
+        return 0
+    if args.command == "worker":
+        return run_worker(args)
+    if args.command == "status":
+        for state, count in sorted(Queue(args.queue).status().items()):
+            print(f"{state:8s} {count}")
+        return 0
+    if args.command == "export":
+        store = ResultStore(args.results)
+        exported = 0
+        for key, record in Queue(args.queue).results():
+            if not store.is_done(key):
+                store.append(key, record)
+                exported += 1
+        print(f"[INFO] {exported} Ergebnisse nach {args.results} exportiert.")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
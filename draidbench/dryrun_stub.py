@@ -0,0 +1,332 @@
+"""Stub für zpool/zfs/fio & co. im Dry-Run-Modus (siehe devices.DryRunProvider).
+
+Aufruf: dryrun_stub.py <kommando> [argumente...]
+
+Ohne aufgezeichnete Ausgaben werden Pools simuliert (Zustand je
+Poolname, damit auch mehrere Pools parallel laufen können): `zpool online`
+bzw. `zpool replace` startet einen Resilver, der DRYRUN_RESILVER_SECONDS
+dauert und über `zpool status` sowie `zpool events -f` sichtbar ist.
+Nach `zpool replace -s` folgt wie bei ZFS ein Scrub gleicher Dauer,
+`zpool scrub` startet ihn sofort. Zeitbasierte fio-Läufe (Hintergrundlast,
+--time_based) laufen bis SIGINT und schreiben bw/iops/lat-Logs und
+Latenz-Histogramme; solange ein Resilver oder Scrub läuft, sinkt ihr
+Durchsatz auf LOAD_RESILVER_SHARE und die Latenz steigt entsprechend.
+
+Mit DRYRUN_CANNED_DIR wird, falls vorhanden, die Datei
+"<kommando>_<unterkommando>.txt" ausgegeben (für `zpool events -f`:
+"zpool_events_follow.txt"), z.B. um echte Event-Streams abzuspielen.
+Ein aufgezeichneter Event-Stream wird im Takt seiner Zeitstempel
+wiedergegeben (gestaucht um DRYRUN_REPLAY_SCALE) und bleibt danach wie
+`zpool events -f` offen.
+"""
+import json
+import os
+import re
+import signal
+import sys
+import time
+
+# liegt neben dem Stub; der Stub läuft als Skript ohne Paket-Kontext
+from fio_logs import FIO_IO_U_PLAT_NR, plat_val_to_idx
+
+STATE_DIR = os.environ.get("DRYRUN_STATE_DIR", "/tmp")
+RESILVER_SECONDS = float(os.environ.get("DRYRUN_RESILVER_SECONDS", "2"))
+CANNED_DIR = os.environ.get("DRYRUN_CANNED_DIR")
+REPLAY_SCALE = float(os.environ.get("DRYRUN_REPLAY_SCALE", "1"))
+EVENT_TIME_RE = re.compile(r"^(\w{3}\s+\d+\s+\d{4}\s+\d\d:\d\d:\d\d)(\.\d+)?\s")
+POOL_BYTES = 64 * 1024 ** 3
+LOAD_BW_KIB = 200 * 1024
+LOAD_LAT_NS = 400_000
+LOAD_RESILVER_SHARE = 0.5
+# Anteil der I/Os je Vielfaches der Grundlatenz im Histogramm
+LOAD_LAT_SPREAD = ((1, 0.9), (2, 0.09), (8, 0.01))
+
+
+def _state(name):
+    return os.path.join(STATE_DIR, name)
+
+
+def _canned(cmd, sub):
+    if not CANNED_DIR:
+        return None
+    path = os.path.join(CANNED_DIR, f"{cmd}_{sub}.txt")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read()
+
+
+def _resilver_start(pool):
+    try:
+        with open(_state(f"resilver.{pool}")) as f:
+            return float(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _scrub_start(pool):
+    try:
+        with open(_state(f"scrub.{pool}")) as f:
+            return float(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _stamp(name, value):
+    tmp = _state(f"{name}.tmp")
+    with open(tmp, "w") as f:
+        f.write(repr(value))
+    os.replace(tmp, _state(name))
+
+
+def _pools():
+    return sorted(name[len("pool."):] for name in os.listdir(STATE_DIR) if name.startswith("pool."))
+
+
+def _pool_name(args):
+    # zpool create -f -m MP -o ashift=12 NAME vdevs... / zpool online NAME disk
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in ("-m", "-o", "-O", "-R"):
+            skip = True
+        elif not arg.startswith("-"):
+            return arg
+    return "pool"
+
+
+def _status_text(pool):
+    start = _resilver_start(pool)
+    scrub = _scrub_start(pool)
+    lines = [f"  pool: {pool}", " state: ONLINE"]
+    if scrub is not None and scrub <= time.time():
+        if time.time() - scrub < RESILVER_SECONDS:
+            lines.append(f"  scan: scrub in progress since {time.ctime(scrub)}")
+        else:
+            lines.append(f"  scan: scrub repaired 0B in 00:00:{int(RESILVER_SECONDS):02d} with 0 errors")
+    elif start is not None and time.time() - start < RESILVER_SECONDS:
+        frac = (time.time() - start) / RESILVER_SECONDS
+        total = 10 * 1024 ** 3
+        done = int(total * frac)
+        rate = int(total / RESILVER_SECONDS)
+        if scrub is not None:
+            # sequentieller Rebuild (replace -s): Format von OpenZFS 2.2
+            scan = [f"  scan: resilver (draid2:4d:7c:1s-0) in progress since {time.ctime(start)}",
+                    f"\t{done} / {total} scanned at {rate}/s, {done} / {total} issued {rate}/s"]
+        else:
+            scan = [f"  scan: resilver in progress since {time.ctime(start)}",
+                    f"\t{done} scanned at {rate}/s, {done} issued at {rate}/s, {total} total"]
+        lines += scan + [
+            f"\t{done // 10} resilvered, {frac * 100:.2f}% done, 00:00:{int(RESILVER_SECONDS * (1 - frac)):02d} to go",
+        ]
+    elif start is not None:
+        lines.append(f"  scan: resilvered 1G in 00:00:{int(RESILVER_SECONDS):02d} with 0 errors "
+                     f"on {time.ctime(start + RESILVER_SECONDS)}")
+    lines += ["config:", "", f"\t{pool}  ONLINE  0 0 0", "", "errors: No known data errors"]
+    return "\n".join(lines)
+
+
+def _event(name, pool, eid):
+    return (
+        f"{time.strftime('%b %d %Y %H:%M:%S')}.000000000 sysevent.fs.zfs.{name}\n"
+        f"        class = \"sysevent.fs.zfs.{name}\"\n"
+        f"        pool = \"{pool}\"\n"
+        f"        eid = {eid}\n\n"
+    )
+
+
+def _events_follow():
+    # alle Pools, deren Resilver nach dem Start des Streams beginnt
+    launched = time.time()
+    deadline = launched + 3600
+    seen = set()
+    eid = 0
+    while time.time() < deadline:
+        for pool in _pools():
+            for kind, start in (("resilver", _resilver_start(pool)), ("scrub", _scrub_start(pool))):
+                if start is None or start < launched - 0.05:
+                    continue
+                for name, at in ((f"{kind}_start", start), (f"{kind}_finish", start + RESILVER_SECONDS)):
+                    if (pool, name) not in seen and time.time() >= at:
+                        seen.add((pool, name))
+                        eid += 1
+                        sys.stdout.write(_event(name, pool, eid))
+                        sys.stdout.flush()
+        time.sleep(0.01)
+
+
+def _event_time(block):
+    match = EVENT_TIME_RE.match(block)
+    if match is None:
+        return None
+    stamp = time.mktime(time.strptime(" ".join(match.group(1).split()), "%b %d %Y %H:%M:%S"))
+    return stamp + float(match.group(2) or 0)
+
+
+def _replay_events(canned):
+    previous = None
+    for block in re.split(r"\n\s*\n", canned):
+        if not block.strip():
+            continue
+        stamp = _event_time(block)
+        if stamp is not None:
+            if previous is not None:
+                time.sleep(max(0.0, stamp - previous) * REPLAY_SCALE)
+            previous = stamp
+        sys.stdout.write(block.strip("\n") + "\n\n")
+        sys.stdout.flush()
+    time.sleep(3600)
+
+
+def zpool(args):
+    sub = args[0] if args else ""
+    rest = args[1:]
+    if sub == "events" and "-f" in rest:
+        canned = _canned("zpool", "events_follow")
+        if canned is not None:
+            _replay_events(canned)
+            return 0
+        _events_follow()
+        return 0
+    canned = _canned("zpool", sub)
+    if canned is not None:
+        sys.stdout.write(canned)
+        return 0
+    if sub == "create":
+        open(_state(f"pool.{_pool_name(rest)}"), "w").close()
+        # Mountpoint nur im Stub-Verzeichnis anlegen (DryRunProvider.mountpoint)
+        if "-m" in rest and rest.index("-m") + 1 < len(rest):
+            mountpoint = os.path.abspath(rest[rest.index("-m") + 1])
+            if mountpoint.startswith(os.path.abspath(STATE_DIR) + os.sep):
+                os.makedirs(mountpoint, exist_ok=True)
+        return 0
+    if sub == "destroy":
+        pool = _pool_name(rest)
+        for name in (f"pool.{pool}", f"resilver.{pool}", f"scrub.{pool}"):
+            try:
+                os.unlink(_state(name))
+            except OSError:
+                pass
+        return 0
+    if sub in ("online", "replace"):
+        pool = _pool_name(rest)
+        now = time.time()
+        _stamp(f"resilver.{pool}", now)
+        if sub == "replace" and "-s" in rest:
+            _stamp(f"scrub.{pool}", now + RESILVER_SECONDS)
+        else:
+            try:
+                os.unlink(_state(f"scrub.{pool}"))
+            except OSError:
+                pass
+        return 0
+    if sub == "scrub":
+        _stamp(f"scrub.{_pool_name(rest)}", time.time())
+        return 0
+    if sub == "status":
+        if "-j" in rest:
+            print("invalid option 'j'", file=sys.stderr)
+            return 2
+        print(_status_text(rest[-1] if rest else "mypool"))
+        return 0
+    if sub == "list":
+        pools = _pools()
+        wanted = _pool_name(rest)
+        if wanted != "pool":
+            if wanted not in pools:
+                print(f"cannot open '{wanted}': no such pool", file=sys.stderr)
+                return 1
+            pools = [wanted]
+        if not pools:
+            print("no pools available", file=sys.stderr)
+            return 1
+        for pool in pools:
+            print(pool if "name" in rest else f"{POOL_BYTES}\t{POOL_BYTES // 100}")
+        return 0
+    # events (ohne -f), offline, checkpoint, export, import, ...
+    return 0
+
+
+def zfs(args):
+    sub = args[0] if args else ""
+    canned = _canned("zfs", sub)
+    if canned is not None:
+        sys.stdout.write(canned)
+        return 0
+    if sub == "list":
+        print(POOL_BYTES)
+    return 0
+
+
+def _scan_running():
+    now = time.time()
+    for pool in _pools():
+        for start in (_resilver_start(pool), _scrub_start(pool)):
+            if start is not None and start <= now < start + RESILVER_SECONDS:
+                return True
+    return False
+
+
+def _fio_load(args):
+    opts = dict(arg[2:].split("=", 1) for arg in args if arg.startswith("--") and "=" in arg)
+    logs = {kind: opts.get(f"write_{kind}_log") for kind in ("bw", "iops", "lat")}
+    numjobs = int(opts.get("numjobs", 1))
+    deadline = time.time() + float(opts.get("runtime", "3600").rstrip("s"))
+    stopped = []
+    signal.signal(signal.SIGINT, lambda *_: stopped.append(True))
+    files = {kind: open(f"{base}_{kind}.1.log", "w") for kind, base in logs.items() if base}
+    if opts.get("write_hist_log"):
+        files["hist"] = open(f"{opts['write_hist_log']}_clat_hist.1.log", "w")
+    try:
+        while not stopped and time.time() < deadline:
+            share = LOAD_RESILVER_SHARE if _scan_running() else 1.0
+            bw = int(LOAD_BW_KIB * share)
+            t_ms = int(time.time() * 1000) if opts.get("log_unix_epoch") == "1" else 0
+            values = {"bw": bw, "iops": bw // 4, "lat": int(LOAD_LAT_NS / share)}
+            for kind, f in files.items():
+                if kind == "hist":
+                    bins = [0] * FIO_IO_U_PLAT_NR
+                    for factor, share_ios in LOAD_LAT_SPREAD:
+                        bins[plat_val_to_idx(values["lat"] * factor)] += int(values["iops"] * share_ios)
+                    f.write(f"{t_ms}, 1, 4096, {', '.join(map(str, bins))}\n")
+                else:
+                    f.write(f"{t_ms}, {values[kind]}, 1, 4096, 0\n")
+                f.flush()
+            print(f"Jobs: {numjobs} (f={numjobs}): [w({numjobs})][w={bw // 1024}MiB/s][w={bw // 4} IOPS]"
+                  f"[eta 99h:59m:59s]", flush=True)
+            time.sleep(1)
+    finally:
+        for f in files.values():
+            f.close()
+    if opts.get("output"):
+        with open(opts["output"], "w") as f:
+            json.dump({"jobs": [{"write": {"bw_bytes": 0, "iops": 0.0, "io_bytes": 0}}]}, f)
+    return 0
+
+
+def fio(args):
+    if "--time_based=1" in args and _canned("fio", "run") is None:
+        return _fio_load(args)
+    canned = _canned("fio", "run")
+    for arg in args:
+        if arg.startswith("--output="):
+            with open(arg.split("=", 1)[1], "w") as f:
+                json.dump({"jobs": [{"write": {"bw_bytes": 0, "iops": 0.0, "io_bytes": 0}}]}, f)
+    sys.stdout.write(canned if canned is not None else "filljob: (dry-run) fio übersprungen\n")
+    return 0
+
+
+def main(argv):
+    cmd, args = argv[0], argv[1:]
+    handler = {"zpool": zpool, "zfs": zfs, "fio": fio}.get(cmd)
+    if handler is None:
+        canned = _canned(cmd, args[0] if args else "")
+        if canned is not None:
+            sys.stdout.write(canned)
+        return 0
+    return handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,176 @@
+"""Eingebaute Füll-Engine als Alternative zu fio.
+
+Jeder Worker-Thread schreibt eine Datei mit exakt vorgegebener Größe.
+Der Schreibpuffer wird pro Worker einmal als anonymes mmap angelegt
+(seitenausgerichtet, passt für O_DIRECT) und für alle Writes
+wiederverwendet. os.write gibt das GIL frei, daher reichen Threads.
+
+Muster:
+  zeros          nur Nullen (komprimierbar)
+  random         einmal Zufallsdaten, danach wiederholt (nicht komprimierbar,
+                 aber deduplizierbar)
+  incompressible Zufallsdaten, zusätzlich bekommt jeder 4K-Sektor pro Write
+                 einen eigenen Zähler -> weder komprimier- noch deduplizierbar
+"""
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .devices import dry_run_active
+
+PATTERNS = ("zeros", "random", "incompressible")
+BLOCK_SIZE = 2 * 1024 ** 2
+ALIGN = 4096
+
+
+def split_bytes(total_bytes, numjobs):
+    """Verteilt total_bytes exakt auf numjobs Dateien."""
+    base, rest = divmod(total_bytes, numjobs)
+    return [base + (1 if i < rest else 0) for i in range(numjobs)]
+
+
+def _make_buffer(block_size, pattern):
+    buf = mmap.mmap(-1, block_size)
+    if pattern != "zeros":
+        buf[:] = os.urandom(block_size)
+    return buf
+
+
+def _stamp(buf, counter):
+    # 8 Byte Zähler am Anfang jedes Sektors, der Rest des Puffers bleibt unverändert
+    packed = struct.pack("<Q", counter)
+    for off in range(0, len(buf), ALIGN):
+        buf[off:off + 8] = packed
+
+
+def _open(path, direct):
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    if direct and hasattr(os, "O_DIRECT"):
+        try:
+            return os.open(path, flags | os.O_DIRECT, 0o644), True
+        except OSError:
+            # tmpfs & co. lehnen O_DIRECT ab
+            pass
+    return os.open(path, flags, 0o644), False
+
+
+def _clear_direct(fd):
+    fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) & ~os.O_DIRECT)
+
+
+class _Worker(threading.Thread):
+    def __init__(self, path, size, block_size, pattern, direct, job_index):
+        super().__init__(daemon=True)
+        self.path = path
+        self.size = size
+        self.block_size = block_size
+        self.pattern = pattern
+        self.direct = direct
+        self.job_index = job_index
+        self.written = 0
+        self.used_direct = False
+        self.error = None
+        self.stop_flag = False
+
+    def run(self):
+        try:
+            self._write()
+        except BaseException as e:
+            self.error = e
+
+    def _write(self):
+        buf = _make_buffer(self.block_size, self.pattern)
+        view = memoryview(buf)
+        fd, self.used_direct = _open(self.path, self.direct)
+        counter = self.job_index << 40
+        try:
+            direct = self.used_direct
+            while self.written < self.size and not self.stop_flag:
+                remaining = self.size - self.written
+                chunk = min(self.block_size, remaining)
+                if direct and chunk % ALIGN:
+                    # O_DIRECT verlangt ausgerichtete Längen, Rest gepuffert schreiben
+                    _clear_direct(fd)
+                    direct = False
+                if self.pattern == "incompressible":
+                    _stamp(buf, counter)
+                    counter += 1
+                n = os.write(fd, view[:chunk])
+                if n <= 0:
+                    raise OSError(f"write() lieferte {n} für {self.path}")
+                self.written += n
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+            view.release()
+            buf.close()
+
+
+def native_fill(directory, total_bytes, numjobs, pattern="incompressible",
+                block_size=BLOCK_SIZE, direct=True, report_interval=1.0,
+                prefix="fillfile_", report=None, stop=None):
+    """Schreibt total_bytes verteilt auf numjobs Dateien in `directory`.
+
+    `report(written_bytes, bytes_per_s)` wird im Abstand report_interval
+    aufgerufen, Standard ist eine Konsolenzeile. Ist `stop` (threading.Event)
+    gesetzt, hören alle Worker nach dem laufenden Write auf. Gibt ein Dict mit
+    geschriebenen Bytes, Dauer, Durchsatz und Bytes pro Job zurück.
+    """
+    if pattern not in PATTERNS:
+        raise ValueError(f"Unbekanntes Muster: {pattern}")
+    if block_size % ALIGN:
+        raise ValueError(f"block_size muss ein Vielfaches von {ALIGN} sein")
+    if report is None:
+        def report(written, rate):
+            print(f"[FILL] {written / 1024 ** 3:8.2f} GiB  {rate / 1024 ** 2:8.1f} MiB/s", flush=True)
+
+    sizes = split_bytes(total_bytes, numjobs)
+    if dry_run_active():
+        print(f"[INFO] Dry-Run: native Füllung mit {total_bytes} Bytes übersprungen.")
+        return {"bytes": 0, "seconds": 0.0, "bytes_per_s": 0.0, "per_job_bytes": [0] * len(sizes),
+                "direct": False}
+    workers = [
+        _Worker(os.path.join(directory, f"{prefix}{i}"), size, block_size, pattern, direct, i)
+        for i, size in enumerate(sizes)
+    ]
+    start = time.monotonic()
+    for w in workers:
+        w.start()
+
+    last_bytes, last_time = 0, start
+    try:
+        while any(w.is_alive() for w in workers):
+            if stop is not None and stop.is_set():
+                for w in workers:
+                    w.stop_flag = True
+            for w in workers:
+                w.join(timeout=report_interval / len(workers))
+            now = time.monotonic()
+            if now - last_time >= report_interval:
+                written = sum(w.written for w in workers)
+                report(written, (written - last_bytes) / (now - last_time))
+                last_bytes, last_time = written, now
+    except KeyboardInterrupt:
+        for w in workers:
+            w.stop_flag = True
+        for w in workers:
+            w.join()
+        print("[ABBRUCH] Füllen wurde manuell abgebrochen.")
+        raise
+
+    errors = [w.error for w in workers if w.error is not None]
+    if errors:
+        raise Exception(f"Füllen fehlgeschlagen: {errors[0]}")
+
+    seconds = time.monotonic() - start
+    written = sum(w.written for w in workers)
+    return {
+        "bytes": written,
+        "seconds": seconds,
+        "bytes_per_s": written / seconds if seconds > 0 else 0.0,
+        "per_job_bytes": [w.written for w in workers],
+        "direct": all(w.used_direct for w in workers),
+    }
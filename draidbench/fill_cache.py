@@ -0,0 +1,155 @@
+"""Wiederverwendung einer Pool-Füllung über mehrere Messungen.
+
+Statt für jeden Matrix-Punkt neu zu füllen, wird pro (Konfiguration,
+Füllstand) einmal gefüllt und der Zustand gesichert:
+
+  checkpoint  `zpool checkpoint`, nach der Messung export und
+              `zpool import --rewind-to-checkpoint`. Schnell, aber mit
+              Checkpoint sind attach/replace verboten, daher nur für
+              Szenarien mit offline/online.
+  send        `zfs send` des gefüllten Pools in eine Datei, vor jeder
+              Messung frischer Pool + `zfs receive -F`. Funktioniert mit
+              allen Szenarien und bleibt über Läufe hinweg erhalten.
+
+prepare(), restore() und drop() sind Coroutinen und laufen in der
+Event-Loop von aio.run_cell().
+"""
+import asyncio
+import os
+import shlex
+import time
+
+from . import aio
+from .pool import clear_fill, delete_pool
+from .store import disk_set_hash
+
+MODES = ("checkpoint", "send")
+SNAPSHOT = "fillcache"
+
+
+def fill_tag(fill_opts=None):
+    """Parameter, die den Inhalt der Füllung bestimmen (engine, bs, Muster), als Namensteil."""
+    opts = fill_opts or {}
+    return f"{opts.get('engine') or 'fio'}-{opts.get('bs') or '2M'}-{opts.get('pattern') or 'incompressible'}"
+
+
+class FillCache:
+    def __init__(self, mode, cache_dir=".", import_dir=None):
+        if mode not in MODES:
+            raise ValueError(f"Unbekannter Fill-Cache-Modus: {mode}")
+        self.mode = mode
+        self.cache_dir = cache_dir
+        # None: Verzeichnisse der Pool-Devices (by-id, Image-Dateien, /dev/mapper, ...)
+        self.import_dir = import_dir
+        self.current = None   # (zfs_syntax, level, fill_tag) der gerade gesicherten Füllung
+        self.cfg = None
+        self.pool_ready = False
+        self.fill_numjobs = None
+        self.fill_info = None
+        # Setup-Zeiten des letzten prepare() wie aio.create_pool(), 0 bei wiederverwendetem Pool
+        self.timings = None
+
+    def usable_for(self, scenario):
+        return self.mode != "checkpoint" or getattr(scenario, "supports_checkpoint", True)
+
+    def stream_path(self, cfg, level, fill_opts=None):
+        name = f"{cfg['zfs_syntax']}_fill{level:g}_{fill_tag(fill_opts)}_{disk_set_hash(cfg['used_disks'])}.zstream"
+        return os.path.join(self.cache_dir, name.replace(":", "-"))
+
+    def import_dirs(self, cfg):
+        if self.import_dir:
+            return [self.import_dir]
+        return sorted({os.path.dirname(disk) for disk in cfg["used_disks"]})
+
+    async def prepare(self, cfg, level, numjobs, fill_opts=None, timeout=None):
+        """Sorgt für einen gefüllten Pool. Gibt True zurück, wenn die Füllung aus dem Cache kam.
+
+        `fill_opts` und `timeout` werden an aio.fill_pool() durchgereicht.
+        Die Setup-Zeiten stehen danach in `timings`.
+        """
+        pool_name = cfg["pool_name"]
+        key = (cfg["zfs_syntax"], level, fill_tag(fill_opts))
+        stream = self.stream_path(cfg, level, fill_opts)
+        self.timings = {"wipe_s": 0.0, "create_s": 0.0, "setup_s": 0.0}
+        if self.current == key:
+            if self.pool_ready:
+                return True
+            if self.mode == "send":
+                self.timings = await aio.create_pool(cfg)
+                await self._receive(cfg, stream)
+                self.pool_ready = True
+                return True
+
+        await self.drop()
+        self.timings = await aio.create_pool(cfg)
+        if self.mode == "send" and os.path.exists(stream):
+            await self._receive(cfg, stream)
+            self.fill_numjobs = None
+            self.fill_info = None
+            cached = True
+        else:
+            self.fill_info = await aio.fill_pool(level, numjobs, pool_name, cfg["mountpoint"], timeout=timeout,
+                                                 **(fill_opts or {}))
+            self.fill_numjobs = numjobs
+            cached = False
+            if self.mode == "checkpoint":
+                print("[INFO] Setze Pool-Checkpoint nach dem Füllen...")
+                await aio.run(f"zpool checkpoint {pool_name}")
+            else:
+                await self._send(cfg, stream)
+        self.current = key
+        self.cfg = cfg
+        self.pool_ready = True
+        return cached
+
+    async def _send(self, cfg, stream):
+        pool_name = cfg["pool_name"]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        print(f"[INFO] Sichere Füllung nach {stream}...")
+        await aio.run(f"zfs snapshot {pool_name}@{SNAPSHOT}")
+        # Streams großer Füllungen brauchen länger als CMD_TIMEOUT
+        await aio.run(f"zfs send {pool_name}@{SNAPSHOT} > {stream}.tmp && mv {stream}.tmp {stream}", timeout=None)
+
+    async def _receive(self, cfg, stream):
+        pool_name = cfg["pool_name"]
+        print(f"[INFO] Spiele Füllung aus {stream} ein...")
+        start = time.monotonic()
+        await aio.run(f"zfs receive -F {pool_name} < {stream}", timeout=None)
+        self.timings["receive_s"] = time.monotonic() - start
+
+    async def restore(self, cfg):
+        """Nach einer Messung: Pool auf den gefüllten Zustand zurücksetzen. Gibt die Dauer in s zurück."""
+        pool_name = cfg["pool_name"]
+        start = time.monotonic()
+        if self.mode == "checkpoint":
+            print("[INFO] Spule Pool auf Checkpoint zurück...")
+            await aio.run(f"zpool export {pool_name}")
+            dirs = " ".join(f"-d {shlex.quote(d)}" for d in self.import_dirs(cfg))
+            await aio.run(f"zpool import --rewind-to-checkpoint {dirs} {pool_name}")
+            # der Checkpoint wird beim Rewind verbraucht, für die nächste Messung neu setzen
+            await aio.run(f"zpool checkpoint {pool_name}")
+        else:
+            # der Resilver hat Labels verändert, frischer Pool ist sauberer als Rollback
+            await asyncio.to_thread(delete_pool, pool_name, cfg["mountpoint"])
+            self.pool_ready = False
+        return time.monotonic() - start
+
+    def invalidate(self):
+        """Nach einem Fehler: Pool-Zustand ist unbekannt, nächstes prepare() baut neu."""
+        self.pool_ready = False
+        if self.mode == "checkpoint":
+            self.current = None
+
+    async def drop(self, cfg=None):
+        """Füllung verwerfen und Pool löschen (Stream-Dateien bleiben erhalten)."""
+        if self.current is None:
+            return
+        cfg = self.cfg or cfg
+        pool_name = cfg["pool_name"]
+        if self.mode == "checkpoint" and self.pool_ready:
+            await aio.run(f"zpool checkpoint -d {pool_name}", check=False)
+        await asyncio.to_thread(clear_fill, cfg["mountpoint"])
+        await asyncio.to_thread(delete_pool, pool_name, cfg["mountpoint"])
+        self.current = None
+        self.cfg = None
+        self.pool_ready = False
@@ -0,0 +1,222 @@
+"""Füllstand über die tatsächliche Belegung des Pools steuern.
+
+Der Füllstand `level` bezieht sich auf `zpool list -p`: Ziel ist
+allocated = level * size. Darin stecken Parität, dRAID-Padding und
+Metadaten, die `zfs list -o available` nicht sieht. Die erste Runde
+schreibt die Schätzung level * available (wie bisher), bytegenau auf die
+Jobs verteilt (auf bs abgerundet, kein Aufrunden auf ganze GiB pro Job).
+Während des Schreibens wird die Belegung abgefragt und das Schreiben
+gestoppt, sobald das Ziel erreicht ist. Nach `zpool sync` wird nachgemessen:
+fehlt mehr als `tolerance` (Anteil der Pool-Größe), wird mit dem gemessenen
+Verhältnis Belegung/geschriebene Bytes nachgefüllt (Dateien
+fillfile_r<runde>_<job>); liegt die Belegung darüber, werden Füll-Dateien
+entsprechend gekürzt. Die erste Runde zielt auf FIRST_ROUND der Schätzung,
+damit meist nur nachgefüllt werden muss. Höchstens `max_rounds` Runden.
+
+Das Ergebnis enthält Ziel- und erreichten Füllgrad (fill_ratio), die
+Belegung und die einzelnen Runden.
+"""
+import asyncio
+import os
+import shlex
+import threading
+
+from . import aio
+from .fill import ALIGN, native_fill
+from .pool import CMD_TIMEOUT, fio_fill_cmd, fio_fill_info, parse_size
+from .shell import CommandError
+
+TOLERANCE = 0.005
+MAX_ROUNDS = 4
+FIRST_ROUND = 0.95
+POLL_INTERVAL = 1.0
+PREFIX = "fillfile_"
+
+
+async def allocation(pool_name):
+    """(size, allocated) in Bytes laut `zpool list -Hp`."""
+    output = await aio.run(f"zpool list -Hp -o size,allocated {shlex.quote(pool_name)}",
+                           timeout=aio.STATUS_TIMEOUT)
+    size, allocated = output.split()[:2]
+    return int(size), int(allocated)
+
+
+async def settled_allocation(pool_name):
+    """Belegung nach `zpool sync`, damit offene Transaktionsgruppen mitzählen."""
+    await aio.run(f"zpool sync {shlex.quote(pool_name)}", check=False, timeout=CMD_TIMEOUT)
+    return await allocation(pool_name)
+
+
+def split_jobs(total_bytes, numjobs, unit):
+    """(jobs, bytes_pro_job): gleich große Dateien in ganzen `unit`.
+
+    Reicht total_bytes nicht für eine Einheit pro Job, schreiben entsprechend
+    weniger Jobs. (0, 0), wenn nicht einmal eine Einheit zu schreiben ist.
+    """
+    blocks = total_bytes // unit
+    if blocks == 0:
+        return 0, 0
+    jobs = min(numjobs, blocks)
+    return jobs, blocks // jobs * unit
+
+
+def fill_files(mountpoint):
+    try:
+        return sorted(os.path.join(mountpoint, n) for n in os.listdir(mountpoint) if n.startswith(PREFIX))
+    except OSError:
+        return []
+
+
+def written_bytes(mountpoint):
+    """Summe der Füll-Dateien auf dem Mountpoint."""
+    total = 0
+    for path in fill_files(mountpoint):
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+def trim_fill(mountpoint, nbytes, bs_bytes):
+    """Kürzt Füll-Dateien (zuletzt geschriebene zuerst) um insgesamt ~nbytes, in ganzen Blöcken."""
+    remaining = nbytes // bs_bytes * bs_bytes
+    trimmed = 0
+    for path in reversed(fill_files(mountpoint)):
+        if remaining <= 0:
+            break
+        size = os.path.getsize(path)
+        cut = min(size, remaining)
+        os.truncate(path, size - cut)
+        remaining -= cut
+        trimmed += cut
+    return trimmed
+
+
+async def _watch(pool_name, target, stop, poll_interval):
+    """Setzt `stop`, sobald die Belegung das Ziel erreicht."""
+    while not stop.is_set():
+        await asyncio.sleep(poll_interval)
+        try:
+            _, allocated = await allocation(pool_name)
+        except Exception:
+            continue
+        if allocated >= target:
+            print(f"[INFO] Ziel-Belegung erreicht ({allocated} Bytes), stoppe das Füllen.")
+            stop.set()
+
+
+async def _write_round(engine, jobs, per_job, prefix, mountpoint, bs, direct, pattern, log_dir, log_avg_msec,
+                       timeout, stop):
+    if engine == "native":
+        writing = asyncio.ensure_future(asyncio.to_thread(
+            native_fill, mountpoint, jobs * per_job, jobs, pattern=pattern, block_size=parse_size(bs),
+            direct=direct is not False, prefix=prefix, stop=stop))
+        try:
+            return await asyncio.shield(writing)
+        except asyncio.CancelledError:
+            # der Thread lässt sich nicht abbrechen: Schreiber anhalten und auf sie warten,
+            # sonst halten sie beim Aufräumen noch Dateien auf dem Mountpoint offen
+            stop.set()
+            await asyncio.gather(writing, return_exceptions=True)
+            raise
+
+    cmd = fio_fill_cmd(per_job, jobs, mountpoint, bs, bool(direct), log_dir, log_avg_msec, prefix)
+    print(f"[INFO] Starte fio mit {jobs} Jobs, je {per_job} Bytes...")
+
+    def on_line(line):
+        print(line)
+        return stop.is_set()
+
+    try:
+        await aio.run(cmd, timeout=timeout, on_line=on_line)
+    except CommandError:
+        # nach SIGINT endet fio u.U. mit rc != 0, das ist dann gewollt
+        if not stop.is_set():
+            raise
+    return fio_fill_info(jobs * per_job, jobs, per_job, log_dir)
+
+
+async def fill_to_level(level, numjobs, pool_name, mountpoint, bs="2M", direct=None, engine="fio",
+                        pattern="incompressible", log_dir=None, log_avg_msec=1000, timeout=None,
+                        tolerance=TOLERANCE, max_rounds=MAX_ROUNDS, poll_interval=POLL_INTERVAL):
+    """Füllt den Pool, bis allocated/size innerhalb von `tolerance` um `level` liegt.
+
+    `direct=None` wählt selbst: native schreibt mit O_DIRECT (gepuffert, wo
+    das Dateisystem es ablehnt), fio gepuffert.
+    """
+    print(f"[INFO] Fülle Pool zu {int(level * 100)}% mit {engine}, numjobs={numjobs}...")
+    bs_bytes = parse_size(bs)
+    size, allocated = await allocation(pool_name)
+    start_alloc = allocated
+    target = int(level * size)
+    available = int(await aio.run(f"zfs list -Hp -o available {shlex.quote(pool_name)}"))
+    # Rohbytes pro geschriebenem Byte; erst geschätzt, ab der zweiten Runde gemessen
+    inflation = (size - allocated) / available if available else 1.0
+    first_estimate = None
+    info = {"engine": engine, "target_bytes": 0}
+    rounds = []
+
+    for r in range(max_rounds):
+        missing = target - allocated
+        if abs(missing) <= tolerance * size:
+            break
+        if missing < 0:
+            trimmed = trim_fill(mountpoint, int(-missing / inflation), bs_bytes)
+            if not trimmed:
+                break
+            print(f"[INFO] Belegung {allocated / size:.2%} über Ziel, kürze Füll-Dateien um {trimmed} Bytes.")
+            size, allocated = await settled_allocation(pool_name)
+            rounds.append({"trimmed_bytes": trimmed, "allocated_bytes": allocated})
+            continue
+        logical = int(missing / inflation * (FIRST_ROUND if r == 0 else 1.0))
+        # fio schreibt ganze Blöcke, die native Engine auch Reste (in 4K-Sektoren)
+        jobs, per_job = split_jobs(logical, numjobs, ALIGN if engine == "native" else bs_bytes)
+        if not jobs:
+            break
+        if first_estimate is None:
+            first_estimate = int(missing / inflation)
+            print(f"[INFO] Zielgröße gesamt: {first_estimate} Bytes, erste Runde {jobs} Jobs je {per_job} Bytes")
+        else:
+            print(f"[INFO] Fülle nach (Runde {r + 1}): {jobs * per_job} Bytes, Belegung "
+                  f"{allocated / size:.2%} statt {level:.2%}")
+        before = written_bytes(mountpoint)
+        stop = threading.Event()
+        watcher = asyncio.ensure_future(_watch(pool_name, target, stop, poll_interval))
+        try:
+            round_info = await _write_round(engine, jobs, per_job, PREFIX if r == 0 else f"{PREFIX}r{r}_",
+                                            mountpoint, bs, direct, pattern, log_dir if r == 0 else None,
+                                            log_avg_msec, timeout, stop)
+        finally:
+            stop.set()
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+        size, allocated = await settled_allocation(pool_name)
+        rounds.append({"jobs": jobs, "per_job_bytes": per_job, "written_bytes": written_bytes(mountpoint) - before,
+                       "allocated_bytes": allocated})
+        if len(rounds) == 1:
+            info = dict(round_info, engine=engine, target_bytes=first_estimate)
+        written = written_bytes(mountpoint)
+        if written <= 0 or allocated <= start_alloc:
+            print("[WARNUNG] Belegung lässt sich nicht aus den geschriebenen Bytes ableiten, kein Nachfüllen.")
+            break
+        inflation = (allocated - start_alloc) / written
+
+    ratio = allocated / size if size else 0.0
+    within = abs(allocated - target) <= tolerance * size
+    if not within:
+        print(f"[WARNUNG] Füllgrad {ratio:.2%} liegt außerhalb von {level:.2%} ± {tolerance:.2%}.")
+    else:
+        print(f"[INFO] Füllgrad {ratio:.2%} (Ziel {level:.2%}).")
+    info.update({
+        "bytes": written_bytes(mountpoint) or info.get("bytes", 0),
+        "target_ratio": level,
+        "fill_ratio": ratio,
+        "tolerance": tolerance,
+        "within_tolerance": within,
+        "pool_size_bytes": size,
+        "allocated_bytes": allocated,
+        "allocated_before_bytes": start_alloc,
+        "rounds": rounds,
+    })
+    return info
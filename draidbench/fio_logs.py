@@ -0,0 +1,296 @@
+"""Strukturierte fio-Ergebnisse: json+-Zusammenfassung und Zeitreihen aus den Logs.
+
+fio schreibt mit --write_bw_log/--write_iops_log/--write_lat_log pro Job
+eine Datei "<prefix>_<typ>.<job>.log" mit Zeilen
+
+    zeit_ms, wert, richtung, blockgröße, offset[, priorität]
+
+(bw in KiB/s, Latenz in ns, mit --log_avg_msec bereits gemittelt). Die
+Dateien werden zeilenweise gelesen und pro Sekunde zusammengefasst. Für
+bw/iops bleibt der Speicherbedarf proportional zur Laufzeit, für die
+Latenz-Perzentile werden die Logs aller Jobs zeitlich gemischt gelesen
+und nur die Samples der laufenden Sekunde gehalten. Die json+-Ausgabe
+wird Job für Job dekodiert (die Latenz-Bins machen sie groß).
+
+Perzentile über gemittelte Latenz-Logs sind Perzentile von Mittelwerten.
+Für echte Perzentile eines Zeitfensters schreibt fio mit
+--write_hist_log/--log_hist_msec "<prefix>_clat_hist.<job>.log" mit Zeilen
+
+    zeit_ms, richtung, blockgröße, bin0, bin1, ... bin1855
+
+(Anzahl I/Os je Latenz-Bin seit der vorigen Zeile, Bin-Grenzen wie
+fios io_u_plat). Die Bins der Zeilen im Fenster werden addiert und die
+Perzentile aus dem gemeinsamen Histogramm gelesen.
+"""
+import glob
+import heapq
+import json
+import math
+import os
+import re
+from array import array
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+# Bin-Aufteilung von fios Latenz-Histogramm (io_u_plat): 64 Bins je Zweierpotenz
+FIO_IO_U_PLAT_BITS = 6
+FIO_IO_U_PLAT_VAL = 1 << FIO_IO_U_PLAT_BITS
+FIO_IO_U_PLAT_NR = 29 * FIO_IO_U_PLAT_VAL
+# Lesepuffer für die json+-Ausgabe, wächst bei großen Jobs geometrisch
+JSON_CHUNK = 1 << 20
+
+
+def fio_log_args(log_dir, prefix="fill", avg_msec=1000):
+    """Zusätzliche fio-Argumente für json+-Ausgabe und Zeitreihen-Logs."""
+    base = os.path.join(log_dir, prefix)
+    return (
+        f"--output-format=json+ --output={base}.json "
+        f"--write_bw_log={base} --write_iops_log={base} --write_lat_log={base} "
+        f"--log_avg_msec={avg_msec} "
+    )
+
+
+def hist_log_args(log_dir, prefix="fill", hist_msec=1000):
+    """fio-Argumente für Latenz-Histogramme (clat) alle `hist_msec` ms."""
+    return f"--write_hist_log={os.path.join(log_dir, prefix)} --log_hist_msec={hist_msec} "
+
+
+def plat_val_to_idx(value):
+    """Bin-Index einer Latenz (ns) wie fios plat_val_to_idx()."""
+    value = int(value)
+    msb = value.bit_length() - 1 if value > 0 else 0
+    if msb <= FIO_IO_U_PLAT_BITS:
+        return value
+    error_bits = msb - FIO_IO_U_PLAT_BITS
+    index = ((error_bits + 1) << FIO_IO_U_PLAT_BITS) + ((FIO_IO_U_PLAT_VAL - 1) & (value >> error_bits))
+    return min(index, FIO_IO_U_PLAT_NR - 1)
+
+
+def plat_idx_to_val(index, edge=0.5):
+    """Latenz (ns) zu einem Bin-Index; edge=0 Untergrenze, 0.5 Mitte, 1 Obergrenze."""
+    if index < (FIO_IO_U_PLAT_VAL << 1):
+        return float(index)
+    error_bits = (index >> FIO_IO_U_PLAT_BITS) - 1
+    base = 1 << (error_bits + FIO_IO_U_PLAT_BITS)
+    return base + (index % FIO_IO_U_PLAT_VAL + edge) * (1 << error_bits)
+
+
+def iter_hist_log(path):
+    """Liefert (zeit_ms, richtung, bins) je Zeile eines clat_hist-Logs."""
+    with open(path) as f:
+        for line in f:
+            parts = line.split(",")
+            if len(parts) < 4:
+                continue
+            try:
+                yield int(parts[0]), int(parts[1]), [int(v) for v in parts[3:] if v.strip()]
+            except ValueError:
+                continue
+
+
+def merge_hist(paths, t0_ms=None, t1_ms=None, direction=None):
+    """Summe der Histogramm-Zeilen mit zeit_ms in [t0_ms, t1_ms] über alle Jobs."""
+    total = None
+    for path in paths:
+        for t_ms, ddir, bins in iter_hist_log(path):
+            if direction is not None and ddir != direction:
+                continue
+            if (t0_ms is not None and t_ms < t0_ms) or (t1_ms is not None and t_ms > t1_ms):
+                continue
+            if total is None:
+                total = [0] * len(bins)
+            for i, n in enumerate(bins[:len(total)]):
+                total[i] += n
+    return total or []
+
+
+def hist_percentiles(bins, percentiles=PERCENTILES):
+    """{p: Latenz in ns} aus einem (ggf. vergröberten) Histogramm, None ohne I/Os.
+
+    Mit --log_hist_coarseness fasst fio je 2^c Bins zusammen, das ergibt
+    sich aus der Bin-Anzahl.
+    """
+    count = sum(bins)
+    if not count:
+        return {p: None for p in percentiles}
+    stride = max(1, FIO_IO_U_PLAT_NR // len(bins))
+    result = {}
+    for p in percentiles:
+        rank = p / 100.0 * count
+        seen = 0
+        for i, n in enumerate(bins):
+            seen += n
+            if n and seen >= rank:
+                break
+        low = plat_idx_to_val(i * stride, edge=0.0)
+        high = plat_idx_to_val(i * stride + stride - 1, edge=1.0)
+        result[p] = (low + high) / 2
+    return result
+
+
+def iter_log(path):
+    """Liefert (zeit_ms, wert, richtung) je Logzeile, ohne die Datei ganz zu laden."""
+    with open(path) as f:
+        for line in f:
+            parts = line.split(",")
+            if len(parts) < 3:
+                continue
+            try:
+                yield int(parts[0]), int(parts[1]), int(parts[2])
+            except ValueError:
+                continue
+
+
+def log_files(log_dir, prefix, kind):
+    # lat-Logs heißen <prefix>_lat.N.log, dazu gibt es _clat/_slat
+    pattern = os.path.join(log_dir, f"{prefix}_{kind}.*.log")
+
+    def job_number(path):
+        match = re.search(r"\.(\d+)\.log$", path)
+        return int(match.group(1)) if match else 0
+    return sorted(glob.glob(pattern), key=job_number)
+
+
+def _job_means(path, direction):
+    """Mittelwert pro Sekunde für einen Job: {sekunde: (summe, anzahl)}."""
+    buckets = {}
+    for t_ms, value, ddir in iter_log(path):
+        if direction is not None and ddir != direction:
+            continue
+        sec = t_ms // 1000
+        s, n = buckets.get(sec, (0, 0))
+        buckets[sec] = (s + value, n + 1)
+    return buckets
+
+
+def summed_series(paths, direction=1):
+    """Summe über alle Jobs der jeweiligen Sekundenmittel (für bw und iops)."""
+    total = {}
+    for path in paths:
+        for sec, (s, n) in _job_means(path, direction).items():
+            total[sec] = total.get(sec, 0.0) + s / n
+    if not total:
+        return [], []
+    seconds = list(range(min(total), max(total) + 1))
+    return seconds, [total.get(sec, 0.0) for sec in seconds]
+
+
+def percentile(sorted_values, p):
+    """Perzentil mit linearer Interpolation auf einer sortierten Folge."""
+    if not sorted_values:
+        return math.nan
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def latency_series(paths, direction=1, percentiles=PERCENTILES):
+    """Latenz-Perzentile pro Sekunde über alle (gemittelten) Samples aller Jobs."""
+    seconds = []
+    result = {p: [] for p in percentiles}
+    current, values = None, array("d")
+
+    def emit(sec, values):
+        # Sekunden ohne Samples zwischen zwei Messungen bleiben als nan erhalten
+        while seconds and seconds[-1] + 1 < sec:
+            seconds.append(seconds[-1] + 1)
+            for p in percentiles:
+                result[p].append(math.nan)
+        seconds.append(sec)
+        ordered = sorted(values)
+        for p in percentiles:
+            result[p].append(percentile(ordered, p))
+
+    # jedes Job-Log ist zeitlich sortiert, gemischt ergibt sich die Gesamtfolge
+    for t_ms, value, ddir in heapq.merge(*(iter_log(path) for path in paths)):
+        if direction is not None and ddir != direction:
+            continue
+        sec = t_ms // 1000
+        if sec != current:
+            if current is not None:
+                emit(current, values)
+            current, values = sec, array("d")
+        values.append(value)
+    if current is not None:
+        emit(current, values)
+    return seconds, result
+
+
+def iter_json_jobs(f):
+    """Liefert die Einträge von "jobs" einer fio-json(+)-Ausgabe einzeln.
+
+    Gehalten werden nur der aktuelle Job und der Lesepuffer; Text vor dem
+    JSON (fio-Warnungen) und der Kopf werden übersprungen.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    while True:
+        idx = buf.find('"jobs"')
+        start = buf.find("[", idx) if idx >= 0 else -1
+        if start >= 0:
+            buf = buf[start + 1:]
+            break
+        chunk = f.read(JSON_CHUNK)
+        if not chunk:
+            return
+        buf = (buf[idx:] if idx >= 0 else buf[-len('"jobs"'):]) + chunk
+    while True:
+        buf = buf.lstrip(" \t\r\n,")
+        if buf.startswith("]"):
+            return
+        try:
+            job, end = decoder.raw_decode(buf)
+        except ValueError:
+            chunk = f.read(max(JSON_CHUNK, len(buf)))
+            if not chunk:
+                raise
+            buf += chunk
+            continue
+        yield job
+        buf = buf[end:]
+
+
+def summarize_json(path, direction="write"):
+    """Gesamtwerte aus einer fio-json(+)-Ausgabe über alle Jobs."""
+    bw_bytes = iops = 0.0
+    io_bytes = 0
+    percentiles = {}
+    with open(path) as f:
+        for job in iter_json_jobs(f):
+            stats = job.get(direction, {})
+            bw_bytes += stats.get("bw_bytes", 0)
+            iops += stats.get("iops", 0.0)
+            io_bytes += stats.get("io_bytes", 0)
+            for key, value in stats.get("clat_ns", {}).get("percentile", {}).items():
+                percentiles.setdefault(float(key), []).append(value)
+    return {
+        "bw_bytes": bw_bytes,
+        "iops": iops,
+        "io_bytes": io_bytes,
+        # bei mehreren Jobs ohne group_reporting: schlechtester Job
+        "clat_percentiles_ns": {f"{p:g}": max(v) for p, v in sorted(percentiles.items())},
+    }
+
+
+def parse_fio_run(log_dir, prefix="fill", direction=1):
+    """Zusammenfassung und Zeitreihen eines fio-Laufs mit fio_log_args().
+
+    Zeitreihen: sekundenweise bw_bytes (Summe aller Jobs), iops und
+    Latenz-Perzentile in µs.
+    """
+    result = {}
+    json_path = os.path.join(log_dir, f"{prefix}.json")
+    if os.path.exists(json_path):
+        result["summary"] = summarize_json(json_path, "write" if direction == 1 else "read")
+
+    seconds, bw_kib = summed_series(log_files(log_dir, prefix, "bw"), direction)
+    _, iops = summed_series(log_files(log_dir, prefix, "iops"), direction)
+    lat_seconds, lat = latency_series(log_files(log_dir, prefix, "lat"), direction)
+    result["timeseries"] = {
+        "t_s": seconds,
+        "bw_bytes": [v * 1024 for v in bw_kib],
+        "iops": iops,
+        "lat_t_s": lat_seconds,
+        **{f"lat_p{p:g}_us": [v / 1000 for v in values] for p, values in lat.items()},
+    }
+    return result
@@ -0,0 +1,55 @@
+"""Balkendiagramme aus der fio-Ergebnistabelle (fio_table-CSV).
+
+Einziges Modul, das pandas/matplotlib/seaborn braucht; es wird erst bei
+Bedarf importiert (fio_sweep --report, combination_v5.py).
+"""
+import os
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+
+def load_results(csv_path):
+    """Gemessene Zeilen (ohne übersprungene/fehlgeschlagene), Bandbreiten in MB/s."""
+    df = pd.read_csv(csv_path)
+    df = df[df["pruned"].isna() & df["error"].isna()].copy()
+    df["Read Bandwidth (MB/s)"] = df["read_bw_bytes"] / (1024 * 1024)
+    df["Write Bandwidth (MB/s)"] = df["write_bw_bytes"] / (1024 * 1024)
+    df["Label"] = [f"NJ: {int(nj)}, BS: {int(bs)}B, IO-D: {int(iod)}"
+                   for nj, bs, iod in zip(df["numjobs"], df["bs_bytes"], df["iodepth"])]
+    return df
+
+
+def plot_bandwidth(csv_path, img_dir=None):
+    """Ein Diagramm pro Operation; Wiederholungen werden gemittelt (Fehlerbalken von seaborn)."""
+    df = load_results(csv_path)
+    if df.empty:
+        print("Nicht genug Daten für das Diagramm. PNG-Datei wird nicht gespeichert.")
+        return []
+    img_dir = img_dir or os.path.dirname(os.path.abspath(csv_path))
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    paths = []
+    for operation, rows in df.groupby("operation", sort=False):
+        fig, ax = plt.subplots(figsize=(20, 8))
+        df_melted = rows.melt(id_vars=["Label"],
+                              value_vars=["Read Bandwidth (MB/s)", "Write Bandwidth (MB/s)"],
+                              var_name="Operation", value_name="Bandwidth (MB/s)")
+        sns.barplot(data=df_melted, x="Label", y="Bandwidth (MB/s)", hue="Operation", dodge=True, ax=ax)
+
+        ax.set_title(f"FIO Benchmark: {operation} Ergebnisse", fontsize=14)
+        ax.set_xlabel("NumJobs, BlockSize, IO Depth", fontsize=12)
+        ax.set_ylabel("Bandwidth (MB/s)", fontsize=12)
+        ax.legend(title="Operation")
+        plt.xticks(rotation=45, fontsize=10, ha="right")
+        plt.subplots_adjust(bottom=0.3)
+        plt.tight_layout()
+
+        img_path = os.path.join(img_dir, f"{base}_{operation}_chart.png")
+        plt.savefig(img_path, dpi=300)
+        plt.close(fig)
+        print(f"Balkendiagramm gespeichert unter: {img_path}")
+        paths.append(img_path)
+    return paths
@@ -0,0 +1,243 @@
+"""Nicht-interaktiver fio-Sweep aus einer Spezifikationsdatei (TOML oder YAML).
+
+    python -m draidbench.fio_sweep sweep.toml [--report] [--plan]
+
+Beispiel (sweep.toml):
+
+    name = "nvme-matrix"
+    dest = "/root/fio_benchmark/justusresults/combination_results_%Y%m%d"
+    targets = ["/mnt/draidBenchmark/testbereichjustus"]
+    operations = ["write", "randread", "rw"]
+    rwmixread = 70                      # nur für rw/randrw
+    ioengine = "libaio"
+    direct = 1
+    bs = { min = "4k", max = "1m" }     # Verdopplung von min bis max
+    numjobs = [1, 2, 4, 8, 16]
+    iodepth = [1, 8]
+    max_runtime = 30
+    repetitions = 3
+    mode = "grid"                       # oder "search"
+
+Für mode = "search" (genau ein Ziel) zusätzlich:
+
+    objective = "lat"                   # "bw" oder "lat"
+    bw_floor = "500M"                   # Untergrenze in Bytes/s für "lat"
+    stride = 4                          # Abstand im Startgitter
+    eta = 3                             # 1/eta überlebt jede Runde
+    beam = 2                            # nur um die besten N wird verfeinert
+
+Listen werden übernommen, Tabellen {min, max, factor} werden geometrisch
+aufgezählt. `dest` darf strftime-Platzhalter enthalten. Jede Operation und
+Wiederholung läuft durch combination.run_combinations (bzw. search.run_search)
+und schreibt in eine gemeinsame CSV (fio_table). pandas/matplotlib/seaborn
+werden nur für --report geladen; der Sweep selbst braucht nur die Stdlib
+(YAML zusätzlich PyYAML).
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from .combination import fio_cmd, make_chains, run_combinations
+from .fio_table import FioTable
+from .pool import parse_size
+from .search import OBJECTIVES
+
+MODES = ("grid", "search")
+MIXED = ("rw", "randrw", "readwrite")
+DEFAULTS = {
+    "name": "fio-sweep",
+    "dest": "fio_sweep_%Y%m%d",
+    "targets": ["/mnt/draidBenchmark/testbereichjustus"],
+    "operations": ["write"],
+    "rwmixread": 50,
+    "ioengine": "sync",
+    "direct": 0,
+    "fio_args": "--filesize=4m:6m --nrfiles=10 --unlink=1",
+    "bs": ["4k"],
+    "numjobs": [1],
+    "iodepth": [1],
+    "max_runtime": 30,
+    "min_runtime": 5,
+    "cv": 0.05,
+    "repetitions": 1,
+    "mode": "grid",
+    "escalate": "numjobs",
+    "min_gain": 0.05,
+    "objective": "bw",
+    "bw_floor": "0",
+    "stride": 4,
+    "eta": 3,
+    "beam": 2,
+}
+
+
+def load_spec(path):
+    """Liest TOML (tomllib) oder YAML (.yaml/.yml, PyYAML) und ergänzt Standardwerte."""
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("YAML-Spezifikation braucht PyYAML (pip install pyyaml) – oder TOML verwenden.")
+        with open(path) as f:
+            data = yaml.safe_load(f) or {}
+    else:
+        import tomllib
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    return normalize_spec(data)
+
+
+def normalize_spec(data):
+    unknown = sorted(set(data) - set(DEFAULTS))
+    if unknown:
+        raise ValueError(f"Unbekannte Schlüssel in der Spezifikation: {', '.join(unknown)}")
+    spec = dict(DEFAULTS, **data)
+    for key in ("targets", "operations"):
+        if isinstance(spec[key], str):
+            spec[key] = [spec[key]]
+    if spec["mode"] not in MODES:
+        raise ValueError(f"Unbekannter Modus: {spec['mode']} (verfügbar: {', '.join(MODES)})")
+    spec["bs"] = expand_axis(spec["bs"], sizes=True)
+    spec["numjobs"] = expand_axis(spec["numjobs"])
+    spec["iodepth"] = expand_axis(spec["iodepth"])
+    if spec["repetitions"] < 1:
+        raise ValueError("repetitions muss >= 1 sein")
+    if spec["objective"] not in OBJECTIVES:
+        raise ValueError(f"Unbekanntes Ziel: {spec['objective']} (verfügbar: {', '.join(OBJECTIVES)})")
+    spec["bw_floor"] = parse_size(spec["bw_floor"])
+    if spec["eta"] < 2 or spec["stride"] < 1 or spec["beam"] < 1:
+        raise ValueError("eta muss >= 2, stride und beam >= 1 sein")
+    if spec["mode"] == "search" and len(spec["targets"]) > 1:
+        raise ValueError(f"mode = \"search\" misst nur ein Ziel, angegeben sind {len(spec['targets'])}")
+    return spec
+
+
+def _format_size(n):
+    for unit, factor in (("m", 1024 ** 2), ("k", 1024)):
+        if n >= factor and n % factor == 0:
+            return f"{n // factor}{unit}"
+    return str(n)
+
+
+def expand_axis(value, sizes=False):
+    """Liste oder {min, max, factor=2} -> Liste von fio-Werten als Strings."""
+    if isinstance(value, dict):
+        low, high = parse_size(value["min"]), parse_size(value["max"])
+        factor = value.get("factor", 2)
+        if low < 1 or factor <= 1 or high < low:
+            raise ValueError(f"Ungültiger Bereich: {value}")
+        values = []
+        while low <= high:
+            values.append(low)
+            low = int(low * factor)
+        return [_format_size(v) if sizes else str(v) for v in values]
+    if not isinstance(value, list):
+        value = [value]
+    return [str(v) for v in value]
+
+
+def fio_args(spec, operation):
+    args = f"--ioengine={spec['ioengine']} --direct={int(spec['direct'])} {spec['fio_args']}".strip()
+    if operation in MIXED:
+        args += f" --rwmixread={spec['rwmixread']}"
+    return args
+
+
+def runs(spec, dest):
+    """(operation, Wiederholung, Ergebnisordner) in Ausführungsreihenfolge."""
+    for repetition in range(1, spec["repetitions"] + 1):
+        for operation in spec["operations"]:
+            folder = os.path.join(dest, operation if spec["repetitions"] == 1 else f"{operation}_rep{repetition}")
+            yield operation, repetition, folder
+
+
+def print_plan(spec):
+    points = sum(len(chain) for chain in make_chains(spec["bs"], spec["numjobs"], spec["iodepth"], "none"))
+    for operation, repetition, folder in runs(spec, datetime.now().strftime(spec["dest"])):
+        print(f"[PLAN] {operation} (Wiederholung {repetition}): {points} Punkte -> {folder}")
+        example = fio_cmd(operation, spec["bs"][0], spec["numjobs"][0], spec["iodepth"][0], spec["targets"][0],
+                          spec["max_runtime"], os.path.join(folder, "result.json"), fio_args(spec, operation))
+        print(f"        z.B. {example}")
+
+
+def run_spec(spec, table_path=None):
+    """Führt den Sweep aus; gibt den Pfad der Ergebnis-CSV zurück."""
+    dest = datetime.now().strftime(spec["dest"])
+    os.makedirs(dest, exist_ok=True)
+    table = FioTable(table_path or os.path.join(dest, f"{spec['name']}.csv"))
+    print(f"[INFO] Sweep '{spec['name']}': Ergebnisse nach {table.path}")
+
+    for operation, repetition, folder in runs(spec, dest):
+        os.makedirs(folder, exist_ok=True)
+        mix = spec["rwmixread"] if operation in MIXED else None
+
+        def store(record, result_data, operation=operation, repetition=repetition, mix=mix):
+            table.add(result_data, operation=operation, repetition=repetition, rwmixread=mix, **record)
+
+        print(f"\n[INFO] {operation}, Wiederholung {repetition}/{spec['repetitions']}")
+        if spec["mode"] == "search":
+            from .search import run_search
+
+            best, final, _ = run_search(operation, spec["bs"], spec["numjobs"], spec["iodepth"],
+                                        spec["targets"][0], folder, spec["objective"], spec["bw_floor"],
+                                        on_result=store, fio_args=fio_args(spec, operation),
+                                        stride=spec["stride"], eta=spec["eta"], beam=spec["beam"],
+                                        min_runtime=spec["min_runtime"], max_runtime=spec["max_runtime"],
+                                        log_path=os.path.join(folder, "search_log.jsonl"))
+            print(f"[INFO] Bestes Ergebnis: {best} mit {final['bw_bytes'] / 1024 ** 2:.1f} MiB/s")
+        else:
+            counts = run_combinations(operation, spec["bs"], spec["numjobs"], spec["iodepth"], spec["targets"],
+                                      folder, escalate=spec["escalate"], min_gain=spec["min_gain"],
+                                      on_result=store, max_runtime=spec["max_runtime"],
+                                      min_runtime=spec["min_runtime"], cv=spec["cv"],
+                                      fio_args=fio_args(spec, operation))
+            print(f"[INFO] {counts['runs']} Läufe, {counts['pruned']} übersprungen, "
+                  f"{counts['failed']} fehlgeschlagen")
+    return table.path
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="fio-Sweep aus TOML/YAML-Spezifikation")
+    parser.add_argument("spec", help="Spezifikation (.toml, .yaml/.yml)")
+    parser.add_argument("--dest", default=None, help="überschreibt 'dest' aus der Spezifikation")
+    parser.add_argument("--targets", nargs="+", default=None, help="überschreibt 'targets'")
+    parser.add_argument("--plan", action="store_true", help="nur Ablauf und Beispiel-Kommando ausgeben")
+    parser.add_argument("--report", action="store_true", help="danach Diagramm erzeugen (pandas/seaborn)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        spec = load_spec(args.spec)
+        if args.targets:
+            # erneut prüfen: im Suchmodus ist nur ein Ziel erlaubt
+            spec = normalize_spec(dict(spec, targets=args.targets))
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"[FEHLER] {e}")
+        return 2
+    if args.dest:
+        spec["dest"] = args.dest
+
+    if args.plan:
+        print_plan(spec)
+        return 0
+    try:
+        csv_path = run_spec(spec)
+    except KeyboardInterrupt:
+        print("\n[ABBRUCH] Sweep unterbrochen, bisherige Ergebnisse bleiben in der CSV.")
+        return 130
+    print(f"[INFO] CSV-Datei gespeichert unter: {csv_path}")
+    if args.report:
+        try:
+            from .fio_report import plot_bandwidth
+        except ImportError as e:
+            print(f"[WARNUNG] Kein Diagramm ({e}); die CSV ist vollständig.")
+            return 1
+        plot_bandwidth(csv_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Spaltenweise Ergebnistabelle für fio-Läufe, zeilenweise fortgeschrieben.
+
+Jeder fertige Lauf wird sofort als eine CSV-Zeile angehängt (mit fsync),
+das fio-json wird dafür einzeln gelesen und gleich wieder verworfen. Der
+Speicherbedarf bleibt damit auch bei tausenden Läufen konstant, und ein
+abgebrochener Sweep ist bis zum letzten fertigen Lauf auswertbar.
+
+Pro Richtung (read/write) über alle Jobs: Bandbreite, IOPS, Bytes und
+clat-Mittelwert/-Perzentile. Mit json+ (--output-format=json+) werden die
+Latenz-Histogramme aller Jobs exakt zusammengeführt, sonst gilt bei
+mehreren Jobs der schlechteste Job (wie fio_logs.summarize_json).
+
+to_parquet() wandelt die CSV bei Bedarf um (braucht pyarrow).
+"""
+import csv
+import json
+import os
+import time
+
+from .pool import parse_size
+
+DIRECTIONS = ("read", "write")
+PERCENTILES = (50.0, 99.0, 99.9)
+META = ("operation", "rwmixread", "bs", "bs_bytes", "numjobs", "iodepth", "repetition", "target", "runtime_s",
+        "steady", "cv", "pruned", "error", "result_file", "finished_at")
+STATS = ("bw_bytes", "iops", "io_bytes", "lat_mean_ns") + tuple(f"lat_p{p:g}_ns" for p in PERCENTILES)
+COLUMNS = META + tuple(f"{d}_{s}" for d in DIRECTIONS for s in STATS)
+
+
+def _bins_percentile(bins, p):
+    total = sum(bins.values())
+    if not total:
+        return None
+    threshold = total * p / 100.0
+    seen = 0
+    for value in sorted(bins):
+        seen += bins[value]
+        if seen >= threshold:
+            return value
+    return max(bins)
+
+
+def direction_stats(jobs, direction):
+    """Kennzahlen einer Richtung über alle Jobs eines fio-json."""
+    stats = {"bw_bytes": 0, "iops": 0.0, "io_bytes": 0}
+    bins = {}
+    have_bins = bool(jobs)
+    percentiles = {p: [] for p in PERCENTILES}
+    weighted_mean = ios = 0
+    for job in jobs:
+        d = job.get(direction, {})
+        stats["bw_bytes"] += d.get("bw_bytes", 0)
+        stats["iops"] += d.get("iops", 0.0)
+        stats["io_bytes"] += d.get("io_bytes", 0)
+        clat = d.get("clat_ns", {})
+        n = d.get("total_ios", 0)
+        if n:
+            weighted_mean += clat.get("mean", 0.0) * n
+            ios += n
+        if "bins" in clat:
+            for value, count in clat["bins"].items():
+                bins[int(value)] = bins.get(int(value), 0) + count
+        else:
+            have_bins = False
+        for p in PERCENTILES:
+            value = clat.get("percentile", {}).get(f"{p:.6f}")
+            if value:
+                percentiles[p].append(value)
+
+    stats["lat_mean_ns"] = weighted_mean / ios if ios else None
+    for p in PERCENTILES:
+        if have_bins and bins:
+            stats[f"lat_p{p:g}_ns"] = _bins_percentile(bins, p)
+        else:
+            # ohne Histogramm: schlechtester Job
+            stats[f"lat_p{p:g}_ns"] = max(percentiles[p]) if percentiles[p] else None
+    return stats
+
+
+def fio_row(result_data=None, **meta):
+    """Eine Tabellenzeile aus einem fio-json (dict) und Metadaten des Laufs."""
+    row = {column: None for column in COLUMNS}
+    row.update({k: v for k, v in meta.items() if k in row})
+    if row["bs"] is not None:
+        row["bs_bytes"] = parse_size(row["bs"])
+    if result_data is not None:
+        jobs = result_data.get("jobs", [])
+        for direction in DIRECTIONS:
+            for key, value in direction_stats(jobs, direction).items():
+                row[f"{direction}_{key}"] = value
+    row["finished_at"] = row["finished_at"] or time.time()
+    return row
+
+
+class FioTable:
+    """Hängt Zeilen an eine CSV-Datei an; der Kopf wird nur bei neuer Datei geschrieben."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "w", newline="") as f:
+                csv.writer(f).writerow(COLUMNS)
+
+    def append(self, row):
+        with open(self.path, "a", newline="") as f:
+            csv.DictWriter(f, COLUMNS).writerow({k: "" if v is None else v for k, v in row.items()})
+            f.flush()
+            os.fsync(f.fileno())
+        self.rows += 1
+
+    def add(self, result_data=None, **meta):
+        """fio_row() + append() in einem Schritt."""
+        self.append(fio_row(result_data, **meta))
+
+    def add_file(self, result_file, **meta):
+        """Liest ein fio-json von Platte (Warnungen vor dem JSON werden übersprungen)."""
+        with open(result_file) as f:
+            text = f.read()
+        self.add(json.loads(text[text.index("{"):]), result_file=result_file, **meta)
+
+
+def to_parquet(csv_path, parquet_path=None):
+    """Schreibt die CSV-Tabelle als Parquet (pyarrow nur hier nötig)."""
+    from pyarrow import csv as pa_csv, parquet as pq
+
+    parquet_path = parquet_path or os.path.splitext(csv_path)[0] + ".parquet"
+    pq.write_table(pa_csv.read_csv(csv_path), parquet_path)
+    return parquet_path
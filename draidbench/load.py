@@ -0,0 +1,247 @@
+"""Resilver unter Last: fio-Hintergrundlast während Ausfall und Resilver.
+
+Die Last nutzt dieselben Parameter wie combination_v5.py/fio_sweep
+(rw, bs, numjobs, iodepth, rwmixread, ioengine, direct) und läuft in
+einem eigenen Verzeichnis auf dem Pool, zeitbasiert bis sie gestoppt wird.
+Ablauf pro Messung:
+
+    Last starten -> Einschwingen (ramp_s) -> Basislinie (baseline_s)
+    -> Ausfall + Resilver (wie ohne Last) -> ggf. Scrub -> Last stoppen
+
+fio schreibt bw/iops-Logs und Latenz-Histogramme (--write_hist_log) mit
+Unix-Zeitstempeln (--log_unix_epoch). Daraus werden für jede Phase
+mittlere Bandbreite und IOPS gebildet, die Latenz-Perzentile kommen aus
+dem über die Phase addierten Histogramm (fio_logs.merge_hist), nicht aus
+Sekundenmitteln. "degradation" setzt die Resilver-Phase ins
+Verhältnis zur Basislinie vor dem Ausfall (bw_ratio < 1 = Einbruch,
+lat_p99_ratio > 1 = längere Latenzen).
+"""
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from . import aio
+from .combination import parse_eta_line
+from .devices import dry_run_active
+from .fio_logs import fio_log_args, hist_log_args, hist_percentiles, log_files, merge_hist, summed_series
+from .fio_sweep import MIXED
+
+PREFIX = "load"
+LOAD_DIR = "bgload"
+DEFAULTS = {
+    "rw": "randrw",
+    "bs": "4k",
+    "numjobs": 4,
+    "iodepth": 8,
+    "rwmixread": 70,
+    "ioengine": "psync",
+    "direct": 0,
+    "size": "1g",
+    "ramp_s": 5.0,
+    "baseline_s": 30.0,
+    "log_avg_msec": 1000,
+    "log_hist_msec": 1000,
+}
+# fio läuft zeitbasiert, bis stop() es per SIGINT beendet
+MAX_RUNTIME = 7 * 24 * 3600
+START_TIMEOUT = 600
+STOP_TIMEOUT = 60
+PERCENTILES = (50.0, 99.0)
+# weniger Log-Intervalle in der Basislinie geben keinen belastbaren Vergleich
+MIN_BASELINE_SAMPLES = 3
+
+
+def load_tag(opts):
+    """Kurzer Name der Last für Schlüssel und Auswertung, z.B. "randrw70-4k-j4-d8-psync-direct0-1g".
+
+    Enthält alle Parameter, die die Last verändern; Ramp, Basislinie und
+    Log-Intervalle gehören nicht dazu.
+    """
+    if not opts:
+        return None
+    opts = dict(DEFAULTS, **opts)
+    rw = f"{opts['rw']}{opts['rwmixread']}" if opts["rw"] in MIXED else opts["rw"]
+    return (f"{rw}-{opts['bs']}-j{opts['numjobs']}-d{opts['iodepth']}-{opts['ioengine']}"
+            f"-direct{int(opts['direct'])}-{opts['size']}")
+
+
+def load_cmd(opts, directory, log_dir):
+    mix = f"--rwmixread={opts['rwmixread']} " if opts["rw"] in MIXED else ""
+    return (
+        f"fio --name={PREFIX} --directory={directory} --rw={opts['rw']} {mix}"
+        f"--bs={opts['bs']} --numjobs={opts['numjobs']} --iodepth={opts['iodepth']} "
+        f"--ioengine={opts['ioengine']} --direct={opts['direct']} --size={opts['size']} "
+        f"--time_based=1 --runtime={MAX_RUNTIME}s --group_reporting=1 --eta=always --eta-newline=1 "
+        f"--log_unix_epoch=1 {fio_log_args(log_dir, PREFIX, opts['log_avg_msec'])}"
+        f"{hist_log_args(log_dir, PREFIX, opts['log_hist_msec'])}"
+    )
+
+
+def window_stats(log_dir, t0, t1, prefix=PREFIX, hist_msec=DEFAULTS["log_hist_msec"]):
+    """Kennzahlen für [t0, t1) (Unix-Zeit), Lesen und Schreiben zusammen.
+
+    Bandbreite und IOPS sind Mittelwerte der vollen Sekunden, die
+    Perzentile kommen aus den Histogramm-Intervallen, die ganz im Fenster
+    liegen.
+    """
+    def inside(sec):
+        return t0 <= sec and sec + 1 <= t1
+
+    stats = {"seconds": 0, "bw_bytes": None, "iops": None}
+    for kind, scale in (("bw", 1024), ("iops", 1)):
+        total = None
+        for direction in (0, 1):
+            seconds, values = summed_series(log_files(log_dir, prefix, kind), direction)
+            # fio loggt Millisekunden seit 1970, summed_series bildet daraus Sekunden
+            selected = [v for sec, v in zip(seconds, values) if inside(sec)]
+            if selected:
+                stats["seconds"] = max(stats["seconds"], len(selected))
+                total = (total or 0.0) + statistics.fmean(selected) * scale
+        stats[kind if kind == "iops" else "bw_bytes"] = total
+    # eine Histogramm-Zeile zählt die I/Os der hist_msec davor
+    bins = merge_hist(log_files(log_dir, prefix, "clat_hist"), t0 * 1000 + hist_msec, t1 * 1000)
+    stats["lat_ios"] = sum(bins)
+    for p, value in hist_percentiles(bins, PERCENTILES).items():
+        stats[f"lat_p{p:g}_us"] = value / 1000 if value is not None else None
+    return stats
+
+
+def _ratio(a, b):
+    return a / b if a is not None and b else None
+
+
+def degradation(baseline, during):
+    """Verhältnis Resilver-Phase zu Basislinie."""
+    return {
+        "bw_ratio": _ratio(during["bw_bytes"], baseline["bw_bytes"]),
+        "iops_ratio": _ratio(during["iops"], baseline["iops"]),
+        **{f"lat_p{p:g}_ratio": _ratio(during[f"lat_p{p:g}_us"], baseline[f"lat_p{p:g}_us"])
+           for p in PERCENTILES},
+    }
+
+
+class BackgroundLoad:
+    """fio-Hintergrundlast auf `mountpoint`, gesteuert aus der Event-Loop."""
+
+    def __init__(self, mountpoint, opts=None):
+        self.opts = dict(DEFAULTS, **{k: v for k, v in (opts or {}).items() if k != "log_dir"})
+        self.directory = os.path.join(mountpoint, LOAD_DIR)
+        self.log_dir = (opts or {}).get("log_dir")
+        self.own_log_dir = self.log_dir is None
+        self.running = asyncio.Event()
+        self.stopping = False
+        self.task = None
+
+    def _on_line(self, line):
+        bw = parse_eta_line(line)
+        if bw:
+            self.running.set()
+        return self.stopping
+
+    async def start(self):
+        """Startet fio und wartet, bis die ersten I/Os laufen (Dateien angelegt)."""
+        if self.own_log_dir:
+            self.log_dir = tempfile.mkdtemp(prefix="draidbench-load-")
+        os.makedirs(self.log_dir, exist_ok=True)
+        try:
+            os.mkdir(self.directory)
+        except FileExistsError:
+            pass
+        except FileNotFoundError:
+            # Dry-Run: kein gemounteter Pool, der Stub braucht das Verzeichnis nicht
+            if not dry_run_active():
+                raise
+        print(f"[INFO] Starte Hintergrundlast {load_tag(self.opts)} in {self.directory}...")
+        # nach SIGINT endet fio u.U. mit rc != 0, daher check=False
+        self.task = asyncio.create_task(aio.run(load_cmd(self.opts, self.directory, self.log_dir), check=False,
+                                                timeout=None, on_line=self._on_line))
+        running = asyncio.create_task(self.running.wait())
+        try:
+            done, _ = await asyncio.wait({self.task, running}, timeout=START_TIMEOUT,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            running.cancel()
+        if self.task in done:
+            output = (await self.task).splitlines()
+            self.task = None
+            raise RuntimeError(f"Hintergrundlast hat sich vorzeitig beendet: {output[-1] if output else '-'}")
+        if not done:
+            await self.stop()
+            raise RuntimeError(f"Hintergrundlast liefert nach {START_TIMEOUT} s keinen Durchsatz")
+
+    async def stop(self):
+        """Beendet fio per SIGINT (mit der nächsten Statuszeile), notfalls hart."""
+        if self.task is None:
+            return
+        self.stopping = True
+        try:
+            await asyncio.wait_for(self.task, STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            print("[WARNUNG] Hintergrundlast reagiert nicht auf SIGINT, wird beendet.")
+        finally:
+            self.task = None
+            await asyncio.to_thread(shutil.rmtree, self.directory, True)
+
+    def cleanup(self):
+        if self.own_log_dir and self.log_dir:
+            shutil.rmtree(self.log_dir, ignore_errors=True)
+
+
+async def resilver_under_load(simulate, mountpoint, opts=None):
+    """Führt `simulate()` (Coroutine-Funktion, aio.simulate_resilver) unter Hintergrundlast aus.
+
+    Ergänzt das Ergebnis um "workload" (load_tag) und "load" mit den
+    Kennzahlen der Phasen baseline/resilver(/scrub) und der Degradation.
+    """
+    load = BackgroundLoad(mountpoint, opts)
+    try:
+        try:
+            await load.start()
+            ramp_s, baseline_s = load.opts["ramp_s"], load.opts["baseline_s"]
+            await asyncio.sleep(ramp_s)
+            baseline_start = time.time()
+            print(f"[INFO] Basislinie unter Last: {baseline_s:g} s...")
+            await asyncio.sleep(baseline_s)
+            baseline_end = time.time()
+            # monotone Zeitstempel der Resilver-Messung in Unix-Zeit umrechnen
+            offset = time.time() - time.monotonic()
+            result = await simulate()
+        finally:
+            await load.stop()
+
+        begin = (result["start_ts"] if result.get("start_ts") is not None else result["trigger_ts"]) + offset
+        finish = result["finish_ts"] + offset
+        hist_msec = load.opts["log_hist_msec"]
+        phases = {
+            "baseline": window_stats(load.log_dir, baseline_start, baseline_end, hist_msec=hist_msec),
+            "resilver": window_stats(load.log_dir, begin, finish, hist_msec=hist_msec),
+        }
+        if "scrub_s" in result:
+            phases["scrub"] = window_stats(load.log_dir, begin + result["verified_s"] - result["scrub_s"],
+                                           begin + result["verified_s"], hist_msec=hist_msec)
+        if phases["baseline"]["seconds"] < MIN_BASELINE_SAMPLES:
+            print(f"[WARNUNG] Basislinie mit nur {phases['baseline']['seconds']} Samples "
+                  f"(mindestens {MIN_BASELINE_SAMPLES}), die Degradation ist nicht belastbar; "
+                  f"--load-baseline erhöhen.")
+        result["workload"] = load_tag(load.opts)
+        result["load"] = dict(phases, params=load.opts,
+                              degradation=degradation(phases["baseline"], phases["resilver"]))
+        print_degradation(result["load"])
+    finally:
+        load.cleanup()
+    return result
+
+
+def _fmt(value, unit="", scale=1.0, digits=1):
+    return f"{value / scale:.{digits}f}{unit}" if value is not None else "-"
+
+
+def print_degradation(load):
+    base, during, deg = load["baseline"], load["resilver"], load["degradation"]
+    print(f"[INFO] Last vorher {_fmt(base['bw_bytes'], ' MiB/s', 1024 ** 2)}, p99 {_fmt(base['lat_p99_us'], ' µs')}"
+          f" | während Resilver {_fmt(during['bw_bytes'], ' MiB/s', 1024 ** 2)}, "
+          f"p99 {_fmt(during['lat_p99_us'], ' µs')} | Bandbreite x{_fmt(deg['bw_ratio'], digits=2)}, "
+          f"p99 x{_fmt(deg['lat_p99_ratio'], digits=2)}")
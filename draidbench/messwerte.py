@@ -0,0 +1,310 @@
+"""Parser und Index für die Text-Logs der Resilver-Messungen (messwerte/).
+
+Ein Block im Log sieht so aus (alte Skripte ohne Numjobs, "Konfiguration"
+statt "Config"):
+
+    --- Config: draid2:3d:0s:119c | Fill: 0% | Numjobs: 4 ---
+    VDEVs: 1, Data: 3, Children: 119
+    Resilver-Zeit: 0.23 Sekunden
+    <zpool status, ~120 Zeilen>
+
+parse_logs() liest beliebig viele Logs in einem Durchgang zeilenweise und
+liefert pro Block einen Datensatz: Layout, Füllstand, Numjobs, Dauer,
+Pool-Zustand und die Zeilen der Disks (Zustand und READ/WRITE/CKSUM).
+Index legt das in einer SQLite-Datei ab (Tabellen runs und disks, Index
+auf dem Layout). Unveränderte Logs (Größe, mtime) werden beim nächsten
+`index` übersprungen, Abfragen lesen die Status-Dumps nie wieder:
+
+    python -m draidbench.messwerte index messwerte/*.log
+    python -m draidbench.messwerte query --layout draid2:3d:0s:119c
+    python -m draidbench.messwerte export --dest messwerte_table [--parquet]
+
+export schreibt runs.csv und disks.csv (spaltenweise auswertbar, Parquet
+über fio_table.to_parquet).
+"""
+import argparse
+import csv
+import glob
+import os
+import re
+import sqlite3
+import sys
+
+from .config import parse_syntax
+
+HEADER_RE = re.compile(r"^--- (?:Konfiguration|Config): (\S+) \| Fill: ([\d.]+)%(?: \| Numjobs: (\d+))? ---")
+SHAPE_RE = re.compile(r"^VDEVs: (\d+), Data: (\d+), Children: (\d+)")
+TIME_RE = re.compile(r"^Resilver-Zeit: ([\d.]+) Sekunden")
+STATE_RE = re.compile(r"^\s*state: (\S+)")
+SCAN_RE = re.compile(r"^\s*scan: (.*)")
+ERRORS_RE = re.compile(r"^errors: (.*)")
+DEVICE_RE = re.compile(r"^\t\s*(\S+)\s+([A-Z]+)(?:\s+(\S+)\s+(\S+)\s+(\S+))?")
+STAMP_RE = re.compile(r"(\d{8}_\d{6})")
+INTERIOR_RE = re.compile(r"^(draid\d+:|raidz\d?|mirror|spare-|replacing-|spares$|logs$|cache$|special$)")
+
+RUN_COLUMNS = ("id", "source", "offset", "stamp", "zfs_syntax", "parity", "data", "spares", "children", "vdevs",
+               "fill", "numjobs", "duration", "pool_state", "scan", "errors", "disks", "disks_online",
+               "disks_not_online", "read_errors", "write_errors", "cksum_errors")
+DISK_COLUMNS = ("run_id", "name", "state", "read_errors", "write_errors", "cksum_errors")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    stamp TEXT,
+    zfs_syntax TEXT NOT NULL,
+    parity INTEGER, data INTEGER, spares INTEGER, children INTEGER, vdevs INTEGER,
+    fill REAL, numjobs INTEGER, duration REAL,
+    pool_state TEXT, scan TEXT, errors TEXT,
+    disks INTEGER, disks_online INTEGER, disks_not_online INTEGER,
+    read_errors INTEGER, write_errors INTEGER, cksum_errors INTEGER
+);
+CREATE TABLE IF NOT EXISTS disks (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    name TEXT NOT NULL,
+    state TEXT NOT NULL,
+    read_errors INTEGER, write_errors INTEGER, cksum_errors INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_layout ON runs (zfs_syntax, fill, numjobs);
+CREATE INDEX IF NOT EXISTS runs_source ON runs (source);
+CREATE INDEX IF NOT EXISTS disks_run ON disks (run_id);
+"""
+
+
+def counter(value):
+    """zpool-Fehlerzähler ("0", "12", "1.5K") als int."""
+    if value is None or value == "-":
+        return None
+    units = {"K": 10 ** 3, "M": 10 ** 6, "G": 10 ** 9}
+    if value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _new_run(source, offset, header):
+    run = {
+        "source": source,
+        "offset": offset,
+        "stamp": (STAMP_RE.search(os.path.basename(source)) or [None, None])[1],
+        "zfs_syntax": header.group(1),
+        "fill": float(header.group(2)) / 100,
+        "numjobs": int(header.group(3)) if header.group(3) else None,
+        "vdevs": None,
+        "duration": None,
+        "pool_state": None,
+        "scan": None,
+        "errors": None,
+        "device_rows": [],
+    }
+    try:
+        run["parity"], run["data"], run["spares"], run["children"] = parse_syntax(run["zfs_syntax"])
+    except ValueError:
+        run["parity"] = run["data"] = run["spares"] = run["children"] = None
+    return run
+
+
+def _finish(run):
+    """Trennt Pool-/vdev-Zeilen von den Disks und zählt zusammen."""
+    rows = run.pop("device_rows")
+    # erste Zeile nach NAME ist der Pool selbst
+    leaves = [r for r in rows[1:] if not INTERIOR_RE.match(r["name"])]
+    run["device_list"] = leaves
+    run["disks"] = len(leaves)
+    run["disks_online"] = sum(1 for d in leaves if d["state"] in ("ONLINE", "AVAIL", "INUSE"))
+    run["disks_not_online"] = run["disks"] - run["disks_online"]
+    for key in ("read_errors", "write_errors", "cksum_errors"):
+        run[key] = sum(d[key] or 0 for d in leaves)
+    return run
+
+
+def parse_log(path):
+    """Datensätze eines Logs, in einem Durchgang; `offset` ist die Byte-Position des Blocks."""
+    run = None
+    in_config = False
+    offset = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            line = raw.decode(errors="replace").rstrip("\n")
+            start, offset = offset, offset + len(raw)
+            m = HEADER_RE.match(line)
+            if m:
+                if run is not None:
+                    yield _finish(run)
+                run = _new_run(path, start, m)
+                in_config = False
+                continue
+            if run is None:
+                continue
+            if in_config:
+                m = DEVICE_RE.match(line)
+                if m and m.group(1) != "NAME":
+                    run["device_rows"].append({
+                        "name": m.group(1),
+                        "state": m.group(2),
+                        "read_errors": counter(m.group(3)),
+                        "write_errors": counter(m.group(4)),
+                        "cksum_errors": counter(m.group(5)),
+                    })
+                    continue
+                if line.strip() and not line.startswith("\t"):
+                    in_config = False
+            if line.startswith("config:"):
+                in_config = True
+            elif (m := TIME_RE.match(line)):
+                run["duration"] = float(m.group(1))
+            elif (m := SHAPE_RE.match(line)):
+                run["vdevs"] = int(m.group(1))
+            elif (m := STATE_RE.match(line)):
+                run["pool_state"] = m.group(1)
+            elif (m := SCAN_RE.match(line)):
+                run["scan"] = m.group(1)
+            elif (m := ERRORS_RE.match(line)):
+                run["errors"] = m.group(1)
+    if run is not None:
+        yield _finish(run)
+
+
+def parse_logs(paths):
+    for path in paths:
+        yield from parse_log(path)
+
+
+class Index:
+    """SQLite-Ablage der geparsten Logs, abfragbar nach Layout/Füllstand/Numjobs."""
+
+    def __init__(self, path="messwerte.sqlite"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def _unchanged(self, path, st):
+        row = self.conn.execute("SELECT size, mtime FROM files WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[0] == st.st_size and row[1] == st.st_mtime
+
+    def update(self, paths):
+        """Indiziert neue oder geänderte Logs. Gibt (Dateien, Blöcke) zurück."""
+        files = runs = 0
+        for path in paths:
+            path = os.path.abspath(path)
+            st = os.stat(path)
+            if self._unchanged(path, st):
+                continue
+            with self.conn:
+                self.conn.execute("DELETE FROM disks WHERE run_id IN (SELECT id FROM runs WHERE source = ?)",
+                                  (path,))
+                self.conn.execute("DELETE FROM runs WHERE source = ?", (path,))
+                for run in parse_log(path):
+                    cur = self.conn.execute(
+                        f"INSERT INTO runs ({', '.join(RUN_COLUMNS[1:])}) "
+                        f"VALUES ({', '.join('?' * (len(RUN_COLUMNS) - 1))})",
+                        [run[c] for c in RUN_COLUMNS[1:]])
+                    self.conn.executemany(
+                        "INSERT INTO disks VALUES (?, ?, ?, ?, ?, ?)",
+                        [(cur.lastrowid, d["name"], d["state"], d["read_errors"], d["write_errors"],
+                          d["cksum_errors"]) for d in run["device_list"]])
+                    runs += 1
+                self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (path, st.st_size, st.st_mtime))
+            files += 1
+        return files, runs
+
+    def query(self, layout=None, fill=None, numjobs=None):
+        """Datensätze (dicts) nach Layout (zfs_syntax), Füllstand und Numjobs gefiltert."""
+        where, params = [], []
+        for column, value in (("zfs_syntax", layout), ("fill", fill), ("numjobs", numjobs)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        sql = f"SELECT {', '.join(RUN_COLUMNS)} FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        for row in self.conn.execute(sql + " ORDER BY zfs_syntax, fill, numjobs, id", params):
+            yield dict(zip(RUN_COLUMNS, row))
+
+    def disks(self, run_id):
+        for row in self.conn.execute(f"SELECT {', '.join(DISK_COLUMNS)} FROM disks WHERE run_id = ?", (run_id,)):
+            yield dict(zip(DISK_COLUMNS, row))
+
+    def layouts(self):
+        return self.conn.execute(
+            "SELECT zfs_syntax, COUNT(*), AVG(duration) FROM runs GROUP BY zfs_syntax ORDER BY data").fetchall()
+
+    def export(self, dest, parquet=False):
+        """runs.csv und disks.csv nach `dest` (optional zusätzlich Parquet)."""
+        os.makedirs(dest, exist_ok=True)
+        written = []
+        for name, columns in (("runs", RUN_COLUMNS), ("disks", DISK_COLUMNS)):
+            path = os.path.join(dest, f"{name}.csv")
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(self.conn.execute(f"SELECT {', '.join(columns)} FROM {name}"))
+            written.append(path)
+            if parquet:
+                from .fio_table import to_parquet
+                written.append(to_parquet(path))
+        return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index der Resilver-Text-Logs")
+    parser.add_argument("--db", default="messwerte.sqlite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("index", help="Logs einlesen (unveränderte werden übersprungen)")
+    p.add_argument("logs", nargs="*", default=["messwerte/*.log"])
+    p = sub.add_parser("query", help="Messungen eines Layouts ausgeben")
+    p.add_argument("--layout", default=None)
+    p.add_argument("--fill", type=float, default=None, help="0..1")
+    p.add_argument("--numjobs", type=int, default=None)
+    p.add_argument("--disks", action="store_true", help="Disks mit Zustand != ONLINE oder Fehlern zeigen")
+    sub.add_parser("layouts", help="Layouts mit Anzahl und mittlerer Dauer")
+    p = sub.add_parser("export", help="runs.csv/disks.csv schreiben")
+    p.add_argument("--dest", default="messwerte_table")
+    p.add_argument("--parquet", action="store_true")
+    args = parser.parse_args(argv)
+
+    index = Index(args.db)
+    if args.command == "index":
+        paths = sorted({p for pattern in args.logs for p in (glob.glob(pattern) or [pattern])})
+        missing = [p for p in paths if not os.path.exists(p)]
+        if missing:
+            print(f"[FEHLER] Nicht gefunden: {', '.join(missing)}")
+            return 1
+        files, runs = index.update(paths)
+        print(f"[INFO] {files} von {len(paths)} Logs neu eingelesen, {runs} Messungen indiziert ({args.db}).")
+        return 0
+    if args.command == "layouts":
+        for syntax, count, mean in index.layouts():
+            print(f"{syntax:24s} {count:5d} Messungen, Mittel {mean if mean is not None else float('nan'):.2f} s")
+        return 0
+    if args.command == "export":
+        for path in index.export(args.dest, args.parquet):
+            print(f"[INFO] Geschrieben: {path}")
+        return 0
+
+    for run in index.query(args.layout, args.fill, args.numjobs):
+        nj = run["numjobs"] if run["numjobs"] is not None else "-"
+        duration = f"{run['duration']:.2f} s" if run["duration"] is not None else "-"
+        print(f"{run['zfs_syntax']:24s} Fill {run['fill']:.0%} NJ {nj!s:>4}  {duration:>10}  "
+              f"{run['pool_state'] or '?'}  {run['disks_online']}/{run['disks']} online  "
+              f"Fehler R/W/C {run['read_errors']}/{run['write_errors']}/{run['cksum_errors']}  "
+              f"{os.path.basename(run['source'])}")
+        if args.disks:
+            for disk in index.disks(run["id"]):
+                if disk["state"] not in ("ONLINE", "AVAIL") or any(
+                        disk[k] for k in ("read_errors", "write_errors", "cksum_errors")):
+                    print(f"    {disk['name']:28s} {disk['state']:9s} "
+                          f"{disk['read_errors']}/{disk['write_errors']}/{disk['cksum_errors']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
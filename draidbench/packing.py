@@ -0,0 +1,201 @@
+"""Mehrere Pools gleichzeitig auf disjunkten Disk-Gruppen.
+
+Bei schmalen dRAID-Breiten (z.B. draid2:4d:1s:11c) bleibt der Großteil
+eines 120-Disk-Gehäuses sonst ungenutzt. Die Disks werden in Gruppen zu
+`group_size` aufgeteilt, jede Gruppe bekommt einen eigenen Pool
+(POOL_NAME + Index) und Mountpoint, und alle Gruppen arbeiten dieselbe
+Matrix gemeinsam ab: jede Gruppe läuft als Task in derselben Event-Loop,
+holt sich den nächsten freien Matrix-Punkt und läuft über aio.run_cell()
+create -> fill -> resilver auf ihrem Pool.
+
+Mit `isolate` liegen Gruppen nach Möglichkeit ganz auf einem HBA bzw.
+einem Enclosure, damit sich zwei Pools nicht denselben Engpass teilen.
+Jeder Datensatz bekommt unter "packing" Metadaten zur Konkurrenz: wie
+viele andere Gruppen während des Resilvers aktiv waren und wie viele
+davon am selben HBA/Enclosure hingen.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+from . import aio
+from .store import cell_key, disk_set_hash
+from .sweep import LAYOUTS, cell_fill_opts, cell_resilver_opts, cell_workload, make_record, write_log_entry
+
+ISOLATION = ("hba", "enclosure", "none")
+UNKNOWN = "unknown"
+
+
+def disk_topology(dev_path, sysfs_root="/sys"):
+    """HBA (PCI-Adresse vor "hostN") und Enclosure einer Disk laut sysfs.
+
+    Das Enclosure kommt aus dem enclosure_device-Link der SES-Treiber,
+    sonst aus dem SAS-Expander im Gerätepfad. Für Dateien und unbekannte
+    Devices ist beides "unknown".
+    """
+    name = os.path.basename(os.path.realpath(dev_path))
+    block = os.path.join(sysfs_root, "block", name)
+    if not os.path.exists(block):
+        return {"hba": UNKNOWN, "enclosure": UNKNOWN}
+    parts = os.path.realpath(block).split(os.sep)
+
+    hba = UNKNOWN
+    for i, part in enumerate(parts):
+        if part.startswith("host") and part[4:].isdigit():
+            hba = parts[i - 1] if i and parts[i - 1].count(":") == 2 else part
+            break
+
+    enclosure = None
+    try:
+        for entry in os.listdir(os.path.join(block, "device")):
+            if entry.startswith("enclosure_device:"):
+                slot = os.path.realpath(os.path.join(block, "device", entry))
+                enclosure = os.path.basename(os.path.dirname(slot))
+                break
+    except OSError:
+        pass
+    if enclosure is None:
+        enclosure = next((p for p in parts if p.startswith("expander-")), hba)
+    return {"hba": hba, "enclosure": enclosure}
+
+
+def partition_disks(dev_paths, group_size, isolate="hba", max_groups=None, sysfs_root="/sys"):
+    """Teilt die Disks in disjunkte Gruppen zu je `group_size`.
+
+    Mit isolate="hba"/"enclosure" wird pro Domäne gruppiert, eine Gruppe
+    überspannt also nie zwei HBAs bzw. Enclosures; Reste einer Domäne
+    bleiben ungenutzt. Gruppen werden reihum aus den Domänen gezogen, so
+    dass bei `max_groups` möglichst viele verschiedene Domänen belegt sind.
+    Gibt Dicts mit index, disks, domain, hba und enclosure zurück.
+    """
+    if isolate not in ISOLATION:
+        raise ValueError(f"Unbekannte Isolation: {isolate} (verfügbar: {', '.join(ISOLATION)})")
+    topology = {path: disk_topology(path, sysfs_root) for path in dev_paths}
+
+    domains = OrderedDict()
+    for path in dev_paths:
+        domain = "all" if isolate == "none" else topology[path][isolate]
+        domains.setdefault(domain, []).append(path)
+
+    per_domain = []
+    for domain, disks in domains.items():
+        chunks = [disks[i:i + group_size] for i in range(0, len(disks) - group_size + 1, group_size)]
+        per_domain.append([(domain, chunk) for chunk in chunks])
+
+    groups = []
+    while any(per_domain):
+        for chunks in per_domain:
+            if chunks:
+                domain, disks = chunks.pop(0)
+                groups.append({
+                    "index": len(groups),
+                    "disks": disks,
+                    "domain": domain,
+                    "hba": sorted({topology[d]["hba"] for d in disks}),
+                    "enclosure": sorted({topology[d]["enclosure"] for d in disks}),
+                })
+    if max_groups:
+        groups = groups[:max_groups]
+    unused = len(dev_paths) - sum(len(g["disks"]) for g in groups)
+    print(f"[INFO] {len(groups)} Gruppen zu {group_size} Disks "
+          f"({len(domains)} Domänen, Isolation: {isolate}, {unused} Disks ungenutzt).")
+    return groups
+
+
+class ContentionTracker:
+    """Merkt sich, wann welche Gruppe einen Matrix-Punkt bearbeitet."""
+
+    def __init__(self):
+        self._running = {}
+        self._finished = []
+
+    def begin(self, group):
+        token = object()
+        self._running[token] = (group, time.monotonic())
+        return token
+
+    def end(self, token):
+        group, start = self._running.pop(token)
+        self._finished.append((group, start, time.monotonic()))
+
+    def overlapping(self, group, start, end):
+        """Andere Gruppen, die im Zeitfenster [start, end] aktiv waren."""
+        windows = self._finished + [(g, s, float("inf")) for g, s in self._running.values()]
+        return {g["index"]: g for g, s, e in windows if g is not group and s < end and e > start}.values()
+
+
+def contention_info(group, groups, isolate, others):
+    others = list(others)
+    return {
+        "group": group["index"],
+        "groups": len(groups),
+        "isolate": isolate,
+        "hba": group["hba"],
+        "enclosure": group["enclosure"],
+        "concurrent": len(others),
+        "shared_hba": sum(1 for g in others if set(g["hba"]) & set(group["hba"])),
+        "shared_enclosure": sum(1 for g in others if set(g["enclosure"]) & set(group["enclosure"])),
+    }
+
+
+async def run_packed(groups, layout, scenario, spares, fill_levels, numjobs_list, logfile, fill_opts=None,
+                     store=None, resilver_opts=None, fill_timeout=None, pool_name="mypool",
+                     mountpoint="/mnt/draidBenchmark", isolate="hba"):
+    """Arbeitet die Matrix parallel auf allen Gruppen ab (ein Task je Gruppe).
+
+    Abbruch und Aufräumen übernimmt der Aufrufer, z.B. aio.run_guarded()
+    mit teardown_groups().
+    """
+    configs = [
+        LAYOUTS[layout](group["disks"], spares=spares, pool_name=f"{pool_name}{group['index']}",
+                        mountpoint=f"{mountpoint}{group['index']}")
+        for group in groups
+    ]
+    cells = asyncio.Queue()
+    for c, cfg in enumerate(configs[0]):
+        for level in fill_levels:
+            for numjobs in (numjobs_list or [cfg["vdevs"]]):
+                keys = [cell_key(group_cfgs[c], level, numjobs, scenario.name, workload=cell_workload(resilver_opts))
+                        for group_cfgs in configs]
+                if store is not None and any(store.is_done(k) for k in keys):
+                    print(f"[INFO] Überspringe (bereits gemessen): {keys[0]}")
+                    continue
+                cells.put_nowait((c, level, numjobs))
+    print(f"[INFO] {cells.qsize()} Matrix-Punkte auf {len(groups)} Pools.")
+
+    tracker = ContentionTracker()
+
+    async def worker(group):
+        while True:
+            try:
+                c, level, numjobs = cells.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            cfg = configs[group["index"]][c]
+            key = cell_key(cfg, level, numjobs, scenario.name, disk_set_hash(cfg["used_disks"]),
+                           cell_workload(resilver_opts))
+            print(f"\n[TEST {cfg['pool_name']}] {cfg['zfs_syntax']} | {int(level*100)}% Füllstand | Numjobs: {numjobs}")
+            token = tracker.begin(group)
+            try:
+                result = await aio.run_cell(cfg, scenario, level, numjobs, cell_fill_opts(fill_opts, key),
+                                            None, cell_resilver_opts(resilver_opts, key), fill_timeout)
+                others = tracker.overlapping(group, result["trigger_ts"], result["finish_ts"])
+                result["packing"] = contention_info(group, groups, isolate, others)
+                if store is not None:
+                    store.append(key, make_record(cfg, level, numjobs, scenario, result))
+                write_log_entry(logfile, cfg, level, numjobs, result["duration"], result["status"])
+            except Exception as e:
+                print(f"[FEHLER] {cfg['pool_name']}: Test fehlgeschlagen: {e}")
+                await aio.teardown(cfg["pool_name"], cfg["mountpoint"])
+            finally:
+                tracker.end(token)
+
+    await asyncio.gather(*(worker(group) for group in groups))
+
+
+async def teardown_groups(groups, pool_name="mypool", mountpoint="/mnt/draidBenchmark"):
+    """Nach einem Abbruch: Füllung und Pool aller Gruppen entfernen."""
+    print("[ABBRUCH] Lösche alle Gruppen-Pools...")
+    await asyncio.gather(*(aio.teardown(f"{pool_name}{group['index']}", f"{mountpoint}{group['index']}")
+                           for group in groups))
@@ -0,0 +1,151 @@
+"""Lebenszyklus eines Test-Pools: leeren, löschen, Cache-Settings, fio-Füllkommando.
+
+Angelegt und gefüllt wird über aio.create_pool() und aio.fill_pool().
+"""
+import os
+import re
+import shlex
+import signal
+import time
+
+from .config import MOUNTPOINT, POOL_NAME
+from .fio_logs import fio_log_args, parse_fio_run
+from .resilver_watch import ZPOOL_BIN
+from .shell import run_cmd, run_status
+
+# obere Grenze für einzelne zpool/zfs-Kommandos beim Auf- und Abbau
+CMD_TIMEOUT = 600
+
+
+# caching ausstellen um geschwindigkeit nicht zu verzerren
+CACHE_SETTINGS = {
+    "vm.dirty_ratio": 2,
+    "vm.dirty_background_ratio": 1,
+    "vm.dirty_expire_centisecs": 100,
+    "vm.dirty_writeback_centisecs": 100,
+}
+# merkt sich die Werte vor tune_cache_for_benchmark(), siehe tunables.py
+_cache_tunables = None
+
+
+def parse_size(size):
+    """fio-Größenangabe ("2M", "128k", "4096") in Bytes."""
+    size = str(size).strip()
+    units = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+    if size and size[-1].lower() in units:
+        return int(float(size[:-1]) * units[size[-1].lower()])
+    return int(size)
+
+
+def tune_cache_for_benchmark(tunables=None):
+    """Senkt vm.dirty_*; die vorherigen Werte merkt sich `tunables` (tunables.Tunables)."""
+    global _cache_tunables
+    from .tunables import Tunables
+
+    _cache_tunables = tunables or Tunables()
+    print("[INFO] Setze aggressive Cache-Settings...")
+    for key, value in CACHE_SETTINGS.items():
+        try:
+            _cache_tunables.apply({key: value})
+        except (OSError, ValueError) as e:
+            print(f"[WARNUNG] {key} nicht gesetzt: {e}")
+
+
+def restore_cache_settings():
+    """Stellt die Werte von vor tune_cache_for_benchmark() wieder her."""
+    if _cache_tunables is None:
+        return
+    print("[INFO] Stelle Cache-Settings zurück...")
+    _cache_tunables.restore(CACHE_SETTINGS)
+
+
+class PoolTeardownError(Exception):
+    """Der Pool ist nach dem Löschen noch vorhanden."""
+
+
+def fio_fill_cmd(per_job_bytes, numjobs, mountpoint=MOUNTPOINT, bs="2M", direct=False,
+                 log_dir=None, log_avg_msec=1000, prefix="fillfile_"):
+    """fio-Kommando zum Füllen: numjobs Dateien <prefix><job> mit je per_job_bytes."""
+    fio_cmd = (
+        f"fio --name=filljob "
+        f"--rw=write "
+        f"--bs={bs} "
+        f"--numjobs={numjobs} "
+        f"--iodepth=64 "
+        f"--size={per_job_bytes} "
+        f"--directory={mountpoint} "
+        f"--filename_format='{prefix}$jobnum' "
+        f"{'--direct=1 ' if direct else ''}"
+        f"--ioengine=libaio "
+        f"{fio_log_args(log_dir, avg_msec=log_avg_msec) if log_dir else ''}"
+        f"--eta=always --eta-newline=1 "
+        f"--group_reporting"
+    )
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    return fio_cmd
+
+
+def fio_fill_info(fill_size_bytes, numjobs, per_job_bytes, log_dir=None):
+    info = {"engine": "fio", "target_bytes": fill_size_bytes, "bytes": per_job_bytes * numjobs}
+    if log_dir:
+        info["fio"] = parse_fio_run(log_dir)
+        info["log_dir"] = log_dir
+    return info
+
+
+def clear_fill(mountpoint=MOUNTPOINT):
+    print("[INFO] Entferne Dummy-Dateien...")
+    run_cmd(f"rm -f {mountpoint}/fillfile_*", check=False)
+
+
+def is_mounted(mountpoint):
+    try:
+        with open("/proc/self/mounts") as f:
+            return any(line.split()[1] == mountpoint for line in f if len(line.split()) > 1)
+    except OSError:
+        return False
+
+
+def pool_exists(pool_name):
+    """Ein hängendes `zpool list` (Timeout) zählt als vorhanden, damit delete_pool weiter versucht."""
+    returncode = run_status(f"{ZPOOL_BIN} list -H -o name {shlex.quote(pool_name)}", timeout=CMD_TIMEOUT)
+    return returncode is None or returncode == 0
+
+
+def kill_mount_users(mountpoint):
+    """Beendet alle Prozesse mit offenen Dateien auf dem Mountpoint, außer dem eigenen.
+
+    `fuser -km` träfe auch den Benchmark selbst, wenn er dort noch eine
+    Datei offen hat.
+    """
+    output = run_cmd(f"fuser -m {shlex.quote(mountpoint)}", check=False, timeout=CMD_TIMEOUT)
+    for pid in {int(pid) for pid in re.findall(r"\d+", output)} - {os.getpid()}:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def delete_pool(pool_name=POOL_NAME, mountpoint=MOUNTPOINT, retries=3):
+    """Löscht den Pool und prüft danach, dass er wirklich weg ist.
+
+    Prozesse auf dem Mountpoint werden nur beendet, wenn er noch gemountet
+    ist. Jeder Schritt hat einen Timeout. Gibt die Dauer in Sekunden zurück,
+    wirft PoolTeardownError, wenn der Pool nach allen Versuchen noch existiert.
+    """
+    print("[INFO] Lösche Pool...")
+    start = time.monotonic()
+    for attempt in range(retries):
+        if is_mounted(mountpoint):
+            kill_mount_users(mountpoint)
+            run_cmd(f"umount -f {mountpoint}", check=False, timeout=CMD_TIMEOUT)
+        if not pool_exists(pool_name):
+            break
+        run_cmd(f"{ZPOOL_BIN} destroy -f {pool_name}", check=False, timeout=CMD_TIMEOUT)
+        if not pool_exists(pool_name):
+            break
+        time.sleep(1 + attempt)
+    else:
+        raise PoolTeardownError(f"Pool {pool_name} nach {retries} Versuchen noch vorhanden")
+    return time.monotonic() - start
@@ -0,0 +1,220 @@
+"""Zeitreihe des Resilver-Fortschritts aus `zpool status`.
+
+Ausgewertet wird der scan-Block, z.B.
+
+      scan: resilver in progress since Tue Apr  1 11:21:12 2025
+            1.23T scanned at 2.34G/s, 456G issued at 1.11G/s, 5.67T total
+            89.0G resilvered, 12.34% done, 01:23:45 to go
+
+ab OpenZFS 2.2 "2.59T / 8.02T scanned at 1.2G/s, 1.35T / 8.02T issued at
+600M/s" ohne "total", beim sequentiellen dRAID-Rebuild mit dem Top-Level-
+vdev in Klammern ("scan: resilver (draid2:4d:11c:1s-0) in progress") und
+"issued 5.04G/s" ohne "at". Mit `-p` stehen exakte Bytezahlen da, oder
+`zpool status -j` (ab OpenZFS 2.3). Phasen: "rebuild" (sequentieller
+dRAID-Rebuild), "resilver" (healing) und "scrub" (Prüfung nach dem Rebuild).
+"""
+import json
+import re
+import time
+
+from .resilver_watch import ZPOOL_BIN
+
+UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4, "P": 1024 ** 5}
+
+# "(vdev)" hinter der Art kennzeichnet den sequentiellen Rebuild eines dRAID-vdevs
+SCAN_RE = re.compile(r"scan:\s+(resilver|rebuild|scrub)\s+(\([^)]*\)\s+)?in progress")
+# "X scanned at R/s" bzw. "X / Y scanned at R/s", "at" fehlt beim Rebuild
+_AMOUNT = r"([\d.]+)([KMGTP]?)B?(?:\s*/\s*([\d.]+)([KMGTP]?)B?)?\s+{}(?:\s+(?:at\s+)?([\d.]+)([KMGTP]?)B?/s)?"
+SCANNED_RE = re.compile(_AMOUNT.format("scanned"))
+ISSUED_RE = re.compile(_AMOUNT.format("issued"))
+TOTAL_RE = re.compile(r"([\d.]+)([KMGTP]?)B?\s+total")
+RESILVERED_RE = re.compile(r"([\d.]+)([KMGTP]?)B?\s+(?:resilvered|repaired)")
+DONE_RE = re.compile(r"([\d.]+)%\s+done")
+TO_GO_RE = re.compile(r"(?:(\d+)\s+days?\s+)?(\d+):(\d+):(\d+)\s+to go")
+
+FIELDS = ("t", "scanned", "issued", "total", "resilvered", "pct")
+
+
+def to_bytes(number, unit):
+    if number is None:
+        return None
+    return int(float(number) * UNITS[unit or ""])
+
+
+def parse_status_text(status):
+    """Fortschritt aus dem Text von `zpool status [-p]`, None wenn kein Scan läuft."""
+    match = SCAN_RE.search(status)
+    if not match:
+        return None
+    block = status[match.start():]
+    # der scan-Block endet vor "config:"
+    block = block.split("config:", 1)[0]
+    sample = {"phase": "rebuild" if match.group(2) else match.group(1)}
+    total = None
+    for name, regex in (("scanned", SCANNED_RE), ("issued", ISSUED_RE)):
+        m = regex.search(block)
+        if m:
+            sample[name] = to_bytes(m.group(1), m.group(2))
+            sample["scan_rate" if name == "scanned" else "issue_rate"] = to_bytes(m.group(5), m.group(6))
+            total = total or to_bytes(m.group(3), m.group(4))
+    m = TOTAL_RE.search(block)
+    if m:
+        total = to_bytes(m.group(1), m.group(2))
+    if total is not None or "scanned" in sample:
+        sample["total"] = total
+    m = RESILVERED_RE.search(block)
+    if m:
+        sample["resilvered"] = to_bytes(m.group(1), m.group(2))
+    m = DONE_RE.search(block)
+    if m:
+        sample["pct"] = float(m.group(1))
+    m = TO_GO_RE.search(block)
+    if m:
+        days, h, mi, s = (int(x) if x else 0 for x in m.groups())
+        sample["eta_s"] = ((days * 24 + h) * 60 + mi) * 60 + s
+    return sample
+
+
+def _num(stats, *keys):
+    for key in keys:
+        try:
+            return int(stats[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def _active_rebuild(node):
+    """Erste laufende "rebuild_stats" (sequentieller Rebuild) irgendwo unter `node`."""
+    if isinstance(node, dict):
+        stats = node.get("rebuild_stats")
+        if isinstance(stats, dict) and str(stats.get("state", "")).upper() == "ACTIVE":
+            return stats
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = _active_rebuild(child)
+        if found is not None:
+            return found
+    return None
+
+
+def parse_status_json(text, pool_name):
+    """Fortschritt aus `zpool status -j --json-int`, None wenn kein Scan läuft.
+
+    Ein sequentieller Rebuild steht nicht in scan_stats, sondern als
+    "rebuild_stats" am dRAID-vdev; er wird als Phase "rebuild" gemeldet.
+    """
+    data = json.loads(text)
+    pool = data.get("pools", {}).get(pool_name, {})
+    stats = pool.get("scan_stats") or {}
+    if str(stats.get("state", "")).upper() == "SCANNING":
+        function = str(stats.get("function", "")).lower()
+        total = _num(stats, "to_examine")
+        sample = {
+            "phase": "scrub" if function == "scrub" else "resilver",
+            "scanned": _num(stats, "examined"),
+            "issued": _num(stats, "issued"),
+            "total": total,
+            "resilvered": _num(stats, "processed"),
+        }
+    else:
+        stats = _active_rebuild(pool.get("vdevs"))
+        if stats is None:
+            return None
+        sample = {
+            "phase": "rebuild",
+            "scanned": _num(stats, "bytes_scanned", "vrs_bytes_scanned"),
+            "issued": _num(stats, "bytes_issued", "vrs_bytes_issued"),
+            "total": _num(stats, "bytes_est", "vrs_bytes_est"),
+            "resilvered": _num(stats, "bytes_rebuilt", "vrs_bytes_rebuilt"),
+        }
+    if sample["total"] and sample["issued"] is not None:
+        sample["pct"] = 100.0 * sample["issued"] / sample["total"]
+    return sample
+
+
+class ProgressSampler:
+    """Sammelt die Samples von `zpool status` als Spalten-Zeitreihe.
+
+    Abgefragt wird im festen Takt von aio._sample_progress(). Pro Phase
+    werden eigene Spalten geführt: series[phase][feld] -> Liste. `t` ist
+    Sekunden seit begin(). Mit live=True wird pro Tick eine
+    Fortschrittszeile mit ETA ausgegeben.
+    """
+
+    def __init__(self, pool_name, interval=1.0, zpool_bin=None, live=True):
+        self.pool_name = pool_name
+        self.interval = interval
+        self.zpool_bin = zpool_bin or ZPOOL_BIN
+        self.live = live
+        self.series = {}
+        self.use_json = None
+        self.json_failures = 0
+        self._t0 = None
+
+    def record(self, sample):
+        """Hängt ein geparstes Sample an die Zeitreihe an (None wird ignoriert)."""
+        if sample is None:
+            return None
+        t = time.monotonic() - self._t0
+        columns = self.series.setdefault(sample["phase"], {f: [] for f in FIELDS})
+        sample["t"] = t
+        for f in FIELDS:
+            columns[f].append(sample.get(f))
+        if self.live:
+            self._print(sample)
+        return sample
+
+    def _print(self, sample):
+        eta = sample.get("eta_s")
+        if eta is None:
+            eta = self.eta(sample["phase"])
+        pct = sample.get("pct")
+        issued = (sample.get("issued") or 0) / 1024 ** 3
+        rate = self.rate(sample["phase"], window=5)
+        eta_text = f"{eta:.0f} s" if eta is not None else "?"
+        print(f"[RESILVER] {sample['phase']:8s} {pct if pct is not None else 0:6.2f}%  "
+              f"{issued:9.2f} GiB issued  {rate / 1024 ** 2 if rate else 0:8.1f} MiB/s  "
+              f"ETA {eta_text}", flush=True)
+
+    def rate(self, phase, window=None):
+        """Issue-Rate in Bytes/s über die letzten `window` Samples (None = ganze Phase)."""
+        columns = self.series.get(phase)
+        if not columns:
+            return None
+        points = [(t, v) for t, v in zip(columns["t"], columns["issued"]) if v is not None]
+        if window:
+            points = points[-window:]
+        if len(points) < 2 or points[-1][0] <= points[0][0]:
+            return None
+        return (points[-1][1] - points[0][1]) / (points[-1][0] - points[0][0])
+
+    def eta(self, phase):
+        columns = self.series.get(phase)
+        rate = self.rate(phase, window=10)
+        if not columns or not rate or not columns["total"] or columns["total"][-1] is None:
+            return None
+        return max(0.0, (columns["total"][-1] - (columns["issued"][-1] or 0)) / rate)
+
+    def begin(self):
+        """Setzt den Zeitnullpunkt."""
+        self._t0 = time.monotonic()
+
+    def summary(self):
+        """Pro Phase: Dauer laut Samples, mittlere Issue-Rate, letzte Werte."""
+        phases = {}
+        for phase, columns in self.series.items():
+            t = columns["t"]
+            phases[phase] = {
+                "samples": len(t),
+                "first_t": t[0],
+                "last_t": t[-1],
+                "mean_issue_rate": self.rate(phase),
+                "issued": columns["issued"][-1],
+                "total": columns["total"][-1],
+            }
+        return {"interval": self.interval, "phases": phases, "series": self.series}
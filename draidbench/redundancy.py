@@ -0,0 +1,77 @@
+"""Vergleich der Szenarien nach Zeit bis zur wiederhergestellten Redundanz.
+
+Hauptkennzahl ist redundancy_s: ab Beginn des Resilvers, bis alle Daten
+wieder redundant liegen. Beim heilenden Resilver (worst-case*,
+best-case-spare) ist das die Resilver-Dauer, beim sequentiellen Rebuild
+(sequential-rebuild) das Ende des Rebuilds; der anschließende Scrub zählt
+erst in verified_s. Pro (Layout, Füllstand, Numjobs, Hintergrundlast,
+Modulparameter) eine Zeile je Szenario, mit Verhältnis zum Vergleichsszenario:
+
+    python -m draidbench.redundancy resilver_results.jsonl --baseline best-case-spare
+"""
+import argparse
+import statistics
+import sys
+from collections import OrderedDict
+
+from .store import ResultStore
+
+CELL_KEYS = ("zfs_syntax", "fill", "numjobs", "workload", "tunables_tag")
+
+
+def redundancy_of(record):
+    """(redundancy_s, verified_s, scrub_s) eines Datensatzes; ältere haben nur "duration"."""
+    redundancy = record.get("redundancy_s", record["duration"])
+    return redundancy, record.get("verified_s", redundancy), record.get("scrub_s")
+
+
+def group_cells(records):
+    """{(Layout, Füllstand, Numjobs, Last, Parameter): {Szenario: [(redundancy, verified, scrub), ...]}}"""
+    cells = OrderedDict()
+    for record in records:
+        # Wiederholungs-Zusammenfassungen nicht doppelt zählen
+        if "duration" not in record or "repetition" in record or record.get("duration") is None:
+            continue
+        cell = tuple(record.get(k) for k in CELL_KEYS)
+        cells.setdefault(cell, OrderedDict()).setdefault(record.get("scenario"), []).append(redundancy_of(record))
+    return cells
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return statistics.fmean(values) if values else None
+
+
+def report(records, baseline="best-case-spare"):
+    """Tabelle pro Matrix-Punkt und Szenario; Rückgabe als Liste von Dicts."""
+    print(f"{'Layout':<24} {'Fill':>6} {'NJ':>4}  {'Szenario':<20} {'n':>3} {'Redundanz':>10} {'Scrub':>9} "
+          f"{'verifiziert':>11} {'vs. ' + baseline:>12}  Last / Parameter")
+    rows = []
+    for (syntax, fill, numjobs, workload, tunables), scenarios in group_cells(records).items():
+        base = scenarios.get(baseline)
+        base_mean = _mean(r for r, _, _ in base) if base else None
+        for scenario, samples in scenarios.items():
+            redundancy = _mean(r for r, _, _ in samples)
+            verified = _mean(v for _, v, _ in samples)
+            scrub = _mean(s for _, _, s in samples)
+            ratio = redundancy / base_mean if base_mean else None
+            print(f"{syntax!s:<24} {fill!s:>6} {numjobs!s:>4}  {scenario!s:<20} {len(samples):>3} "
+                  f"{redundancy:>9.2f}s {(f'{scrub:.2f}s' if scrub is not None else '-'):>9} {verified:>10.2f}s "
+                  f"{(f'{ratio:.2f}x' if ratio is not None else '-'):>12}  {workload or '-'} {tunables or ''}")
+            rows.append({"zfs_syntax": syntax, "fill": fill, "numjobs": numjobs, "workload": workload,
+                         "tunables_tag": tunables, "scenario": scenario, "n": len(samples),
+                         "redundancy_s": redundancy, "scrub_s": scrub, "verified_s": verified, "ratio": ratio})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zeit bis zur wiederhergestellten Redundanz je Szenario")
+    parser.add_argument("results", nargs="?", default="resilver_results.jsonl")
+    parser.add_argument("--baseline", default="best-case-spare", help="Vergleichsszenario für das Verhältnis")
+    args = parser.parse_args(argv)
+    report(ResultStore(args.results).records(), args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Wiederholungen eines Matrix-Punkts bis zu einem engen Konfidenzintervall.
+
+Ein Punkt wird mindestens `min_runs` mal gemessen und dann so lange
+wiederholt, bis das 95%-Konfidenzintervall (Student-t) der Resilver-Dauer
+relativ zum Mittelwert schmaler als `rel_width` ist, höchstens `max_runs`
+mal. Ausreißer (robuster z-Wert über Median/MAD > OUTLIER_Z nach
+Iglewicz/Hoaglin und mehr als 10% vom Median entfernt) werden markiert
+und gehen nicht ins Intervall ein, bleiben aber gespeichert.
+
+Jede Messung landet als eigener Datensatz (Schlüssel "<cell_key>|rep=N")
+im ResultStore, zum Schluss eine Zusammenfassung unter dem Schlüssel des
+Punkts selbst. Ein abgebrochener Lauf setzt mit den vorhandenen Messungen
+fort. Auswertung pro (Datendisks, Füllstand, Numjobs):
+
+    python -m draidbench.repeat resilver_results.jsonl
+"""
+import argparse
+import math
+import statistics
+import sys
+from collections import OrderedDict
+
+from .store import ResultStore
+
+OUTLIER_Z = 3.5
+OUTLIER_MIN_DEV = 0.1
+# zweiseitige 95%-Quantile der t-Verteilung für df = 1..30
+T95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+       2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+       2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+
+def t95(df):
+    if df < 1:
+        return math.inf
+    if df <= len(T95):
+        return T95[df - 1]
+    z = 1.959964
+    return z + (z ** 3 + z) / (4 * df)
+
+
+def outlier_flags(samples):
+    """True für Ausreißer laut robustem z-Wert (0.6745 * |x - Median| / MAD)."""
+    if len(samples) < 3:
+        return [False] * len(samples)
+    median = statistics.median(samples)
+    mad = statistics.median(abs(x - median) for x in samples)
+    # Streuung unter OUTLIER_MIN_DEV des Medians ist Messrauschen, kein Ausreißer
+    far = [abs(x - median) > OUTLIER_MIN_DEV * abs(median) for x in samples]
+    if mad == 0:
+        return far
+    return [f and 0.6745 * abs(x - median) / mad > OUTLIER_Z for x, f in zip(samples, far)]
+
+
+def summarize(samples):
+    """Mittelwert, Median, 95%-KI und relative KI-Breite ohne Ausreißer."""
+    flags = outlier_flags(samples)
+    inliers = [x for x, flag in zip(samples, flags) if not flag]
+    summary = {
+        "n": len(samples),
+        "samples": list(samples),
+        "outliers": [i for i, flag in enumerate(flags) if flag],
+        "mean": None, "median": None, "stdev": None,
+        "ci_low": None, "ci_high": None, "rel_width": None,
+    }
+    if not inliers:
+        return summary
+    mean = statistics.fmean(inliers)
+    summary.update(mean=mean, median=statistics.median(inliers))
+    if len(inliers) >= 2:
+        stdev = statistics.stdev(inliers)
+        half = t95(len(inliers) - 1) * stdev / math.sqrt(len(inliers))
+        summary.update(stdev=stdev, ci_low=mean - half, ci_high=mean + half,
+                       rel_width=2 * half / mean if mean > 0 else None)
+    return summary
+
+
+class RepetitionController:
+    """Entscheidet nach jeder Messung, ob der Punkt noch einmal laufen muss."""
+
+    def __init__(self, rel_width=0.1, min_runs=3, max_runs=10):
+        if min_runs < 2 or max_runs < min_runs:
+            raise ValueError("Es muss 2 <= min_runs <= max_runs gelten.")
+        self.rel_width = rel_width
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.samples = []
+
+    def add(self, duration):
+        self.samples.append(duration)
+
+    def summary(self):
+        return summarize(self.samples)
+
+    def converged(self):
+        s = self.summary()
+        inliers = s["n"] - len(s["outliers"])
+        return inliers >= self.min_runs and s["rel_width"] is not None and s["rel_width"] <= self.rel_width
+
+    def more(self):
+        """True, solange weitere Messungen nötig sind."""
+        return len(self.samples) < self.max_runs and not self.converged()
+
+    def result(self):
+        """Zusammenfassung mit Abbruchgrund für den Datensatz."""
+        return dict(self.summary(), converged=self.converged(), target_rel_width=self.rel_width,
+                    max_runs=self.max_runs)
+
+
+def sample_key(key, n):
+    return f"{key}|rep={n}"
+
+
+def stored_samples(store, key):
+    """Bereits gespeicherte Messungen eines Punkts (Dauer nach Wiederholungsnummer)."""
+    prefix = f"{key}|rep="
+    samples = {}
+    for record in store.records():
+        if record.get("key", "").startswith(prefix) and "duration" in record:
+            samples[int(record["key"][len(prefix):])] = record["duration"]
+    return [samples[n] for n in sorted(samples)]
+
+
+def print_progress(controller):
+    s = controller.summary()
+    width = f"{s['rel_width']:.1%}" if s["rel_width"] is not None else "?"
+    flagged = f", Ausreißer: {s['outliers']}" if s["outliers"] else ""
+    print(f"[INFO] {s['n']} Messungen, Mittel {s['mean']:.2f} s, "
+          f"KI-Breite {width} (Ziel {controller.rel_width:.0%}){flagged}")
+
+
+GROUP_KEYS = ("scenario", "zfs_syntax", "data", "fill", "numjobs", "workload", "tunables_tag")
+
+
+def group_durations(records):
+    """Alle Einzelmessungen gruppiert nach Szenario/Layout/Datendisks/Füllstand/Numjobs/Last/Parametern."""
+    groups = OrderedDict()
+    for record in records:
+        if "duration" not in record or "repetition" in record:
+            continue
+        group = tuple(record.get(k) for k in GROUP_KEYS)
+        groups.setdefault(group, []).append(record["duration"])
+    return groups
+
+
+def report(records, rel_width=0.1):
+    """Tabelle mit n/Mittel/Median/KI pro Punkt; markiert Punkte mit zu breitem KI."""
+    print(f"{'Layout':<24} {'Data':>4} {'Fill':>6} {'NJ':>4} {'n':>3} {'Mittel':>9} {'Median':>9} "
+          f"{'95%-KI':>21} {'Breite':>7}  Ausreißer  Last / Parameter")
+    rows = []
+    for (scenario, syntax, data, fill, numjobs, workload, tunables), samples in group_durations(records).items():
+        s = summarize(samples)
+        ci = f"[{s['ci_low']:.2f}, {s['ci_high']:.2f}]" if s["ci_low"] is not None else "-"
+        width = f"{s['rel_width']:.1%}" if s["rel_width"] is not None else "-"
+        stable = s["rel_width"] is not None and s["rel_width"] <= rel_width
+        outliers = ", ".join(f"{samples[i]:.2f}" for i in s["outliers"]) or "-"
+        mean = f"{s['mean']:9.2f}" if s["mean"] is not None else f"{'-':>9}"
+        median = f"{s['median']:9.2f}" if s["median"] is not None else f"{'-':>9}"
+        print(f"{syntax:<24} {data!s:>4} {fill!s:>6} {numjobs!s:>4} {s['n']:>3} {mean} {median} "
+              f"{ci:>21} {width:>7}{' ' if stable else '*'} {outliers:<10} {workload or '-'} {tunables or ''}")
+        rows.append(dict(s, scenario=scenario, zfs_syntax=syntax, data=data, fill=fill, numjobs=numjobs,
+                         workload=workload, tunables_tag=tunables, stable=stable))
+    print(f"* KI breiter als {rel_width:.0%} des Mittelwerts: weitere Wiederholungen sinnvoll")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wiederholungen und Konfidenzintervalle der Resilver-Zeiten")
+    parser.add_argument("results", nargs="?", default="resilver_results.jsonl")
+    parser.add_argument("--rel-width", type=float, default=0.1, help="Ziel-Breite des KI relativ zum Mittel")
+    args = parser.parse_args(argv)
+    report(ResultStore(args.results).records(), args.rel_width)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""Analytisches Modell der Resilver-Zeit eines dRAID-Layouts.
+
+Für einen Ausfall in draid<p>:<d>d:<s>s:<c>c mit A Bytes Rohbelegung
+(inkl. Parität, laut `zpool list`) gilt pro Disk:
+
+  verlorene Bytes     L = A / (c - s)
+  Lesen pro Disk      L * d / (c - s - 1)     (d Spalten je Stripe, über alle
+                                               überlebenden Disks verteilt)
+  Schreiben pro Disk  L / (c - s - 1)          bei verteilter Spare,
+                      L                        bei Resilver auf eine Disk
+
+Der Engpass max(Lesen, Schreiben) / disk_bw ergibt die reine
+Transferzeit. Ein heilender Resilver geht die Blockzeiger durch und zahlt
+zusätzlich pro Stripe (A / ((d + p) * RECORDSIZE)) eine Positionierung,
+verteilt auf die lesenden Disks; ein sequentieller Rebuild liest
+dagegen die belegten Bereiche am Stück. Merkmale pro Messung:
+
+  [1, Transfer (heilend), Transfer (sequentiell), Stripes (heilend)]
+
+Die Koeffizienten werden mit NumPy-Least-Squares bestimmt, mit einer
+schwachen Ridge-Bindung an die physikalischen Startwerte PRIOR, damit
+Merkmale ohne Streuung in den Daten (z.B. nur 0%-Messungen) nicht
+beliebig werden. Die Güte wird per k-facher Kreuzvalidierung gegen das
+Mittelwert-Modell geprüft:
+
+    python -m draidbench.resilver_model fit --logs messwerte/*.log --results resilver_results.jsonl
+    python -m draidbench.resilver_model rank --model model.json --device-count 120 --fill 0.5
+"""
+import argparse
+import glob
+import json
+import sys
+
+import numpy as np
+
+from .config import parse_syntax
+from .pool import parse_size
+from .scenarios import SCENARIOS
+
+FEATURES = ("overhead_s", "heal_transfer", "seq_transfer", "heal_stripes")
+PRIOR = np.array([0.0, 1.0, 1.0, 1.0])
+RECORDSIZE = 128 * 1024
+SEEK_S = 0.008
+DISK_BW = 250e6
+DISK_BYTES = parse_size("14t")
+RIDGE = 1e-3
+
+
+def load_logs(paths, scenario="worst-case"):
+    """Datensätze aus den Text-Logs (write_log_entry bzw. messwerte/), über messwerte.parse_logs."""
+    from .messwerte import parse_logs
+
+    for run in parse_logs(paths):
+        if run["duration"] is None:
+            continue
+        yield {
+            "zfs_syntax": run["zfs_syntax"],
+            "fill": run["fill"],
+            "numjobs": run["numjobs"],
+            "vdevs": run["vdevs"],
+            "scenario": scenario,
+            "duration": run["duration"],
+            "source": run["source"],
+        }
+
+
+def load_results(path):
+    """Einzelmessungen aus einem ResultStore-JSONL (ohne Wiederholungs-Zusammenfassungen)."""
+    from .store import ResultStore
+
+    for record in ResultStore(path).records():
+        if "duration" in record and "repetition" not in record and record.get("zfs_syntax"):
+            yield record
+
+
+def raw_bytes(record, disk_bytes=DISK_BYTES):
+    """Rohbelegung A: gemessen (fill_control), sonst Füllstand x Pool-Rohgröße."""
+    info = record.get("fill_info") or {}
+    if info.get("allocated_bytes") is not None:
+        return info["allocated_bytes"]
+    parity, data, spares, children = parse_syntax(record["zfs_syntax"])
+    size = info.get("pool_size_bytes") or (children - spares) * disk_bytes * (record.get("vdevs") or 1)
+    return (record.get("fill") or 0.0) * size
+
+
+def rebuild_mode(record):
+    """(sequentiell, verteilte Spare) laut Szenario."""
+    scenario = SCENARIOS.get(record.get("scenario"))
+    sequential = bool(record.get("sequential", getattr(scenario, "sequential", False)))
+    to_spare = bool(getattr(scenario, "to_spare", False))
+    parity, data, spares, children = parse_syntax(record["zfs_syntax"])
+    # physische Spare nur bei mehreren vdevs (generate_draid2_configs)
+    distributed = to_spare and spares > 0 and (record.get("vdevs") or 1) == 1
+    return sequential, distributed
+
+
+def feature_matrix(records, disk_bw=DISK_BW, disk_bytes=DISK_BYTES):
+    """Merkmalsmatrix (n x len(FEATURES)), vektorisiert über alle Datensätze."""
+    n = len(records)
+    layout = np.array([parse_syntax(r["zfs_syntax"]) for r in records], dtype=np.float64).reshape(n, 4)
+    parity, data, spares, children = layout.T
+    vdevs = np.array([r.get("vdevs", 1) or 1 for r in records], dtype=np.float64)
+    raw = np.array([raw_bytes(r, disk_bytes) for r in records], dtype=np.float64) / vdevs
+    modes = np.array([rebuild_mode(r) for r in records], dtype=bool).reshape(n, 2)
+    sequential, distributed = modes.T
+
+    surviving = np.maximum(children - spares - 1, 1)
+    lost = raw / np.maximum(children - spares, 1)
+    read = lost * data / surviving
+    write = np.where(distributed, lost / surviving, lost)
+    transfer = np.maximum(read, write) / disk_bw
+    stripes = raw / ((data + parity) * RECORDSIZE)
+
+    X = np.empty((n, len(FEATURES)))
+    X[:, 0] = 1.0
+    X[:, 1] = np.where(sequential, 0.0, transfer)
+    X[:, 2] = np.where(sequential, transfer, 0.0)
+    X[:, 3] = np.where(sequential, 0.0, stripes * SEEK_S / surviving)
+    return X
+
+
+def fit(X, y, ridge=RIDGE, prior=PRIOR):
+    """Least Squares mit Ridge-Bindung an `prior` (als zusätzliche Zeilen)."""
+    scale = np.sqrt(ridge * max(len(y), 1))
+    A = np.vstack([X, scale * np.eye(X.shape[1])])
+    b = np.concatenate([y, scale * prior])
+    coef, *_ = np.linalg.lstsq(A, b, rcond=None)
+    return coef
+
+
+def cross_validate(X, y, folds=5, seed=0, **fit_opts):
+    """k-fache Kreuzvalidierung; Fehlermaße des Modells und des Mittelwert-Modells."""
+    n = len(y)
+    folds = max(2, min(folds, n))
+    order = np.random.default_rng(seed).permutation(n)
+    predicted = np.empty(n)
+    baseline = np.empty(n)
+    for test in np.array_split(order, folds):
+        train = np.setdiff1d(order, test)
+        predicted[test] = X[test] @ fit(X[train], y[train], **fit_opts)
+        baseline[test] = y[train].mean()
+
+    def errors(pred):
+        err = pred - y
+        return {
+            "rmse_s": float(np.sqrt(np.mean(err ** 2))),
+            "mae_s": float(np.mean(np.abs(err))),
+            "median_ape": float(np.median(np.abs(err) / np.maximum(y, 1e-9))),
+        }
+
+    return {"n": n, "folds": folds, "model": errors(predicted), "mean_baseline": errors(baseline)}
+
+
+class ResilverModel:
+    def __init__(self, coef=PRIOR, disk_bw=DISK_BW, disk_bytes=DISK_BYTES, cv=None):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.disk_bw = disk_bw
+        self.disk_bytes = disk_bytes
+        self.cv = cv
+
+    @classmethod
+    def fit_records(cls, records, disk_bw=DISK_BW, disk_bytes=DISK_BYTES, folds=5, ridge=RIDGE):
+        records = list(records)
+        if not records:
+            raise ValueError("Keine Messungen zum Anpassen gefunden.")
+        X = feature_matrix(records, disk_bw, disk_bytes)
+        y = np.array([r["duration"] for r in records], dtype=np.float64)
+        cv = cross_validate(X, y, folds, ridge=ridge) if len(y) >= 2 else None
+        return cls(fit(X, y, ridge), disk_bw, disk_bytes, cv)
+
+    def predict(self, records):
+        """Vorhergesagte Resilver-Zeit in Sekunden je Datensatz (Array)."""
+        records = list(records)
+        if not records:
+            return np.empty(0)
+        return feature_matrix(records, self.disk_bw, self.disk_bytes) @ self.coef
+
+    def predict_cell(self, cfg, level, scenario_name):
+        record = {k: cfg[k] for k in ("zfs_syntax", "vdevs")}
+        record.update(fill=level, scenario=scenario_name)
+        return float(self.predict([record])[0])
+
+    def has_skill(self):
+        """True, wenn das Modell in der Kreuzvalidierung den Mittelwert schlägt (RMSE)."""
+        if not self.cv:
+            return False
+        return self.cv["model"]["rmse_s"] < self.cv["mean_baseline"]["rmse_s"]
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"features": FEATURES, "coef": self.coef.tolist(), "disk_bw": self.disk_bw,
+                       "disk_bytes": self.disk_bytes, "cv": self.cv}, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["coef"], data["disk_bw"], data["disk_bytes"], data.get("cv"))
+
+
+def cell_order(model, configs, fill_levels, scenario_name, max_seconds=None, descending=False):
+    """Sortiert die Konfigurationen nach vorhergesagter Dauer (größter Füllstand).
+
+    Gibt (configs, skip) zurück; skip(cfg, level) ist True für Punkte, deren
+    Vorhersage `max_seconds` übersteigt. Schlägt das Modell in der
+    Kreuzvalidierung den Mittelwert nicht, wird nur sortiert und nichts
+    ausgelassen.
+    """
+    if max_seconds is not None and not model.has_skill():
+        print("[WARNUNG] " + "=" * 70)
+        print("[WARNUNG] Das Modell ist laut Kreuzvalidierung nicht besser als der Mittelwert")
+        print("[WARNUNG] (oder ungeprüft). --model-max-seconds wird ignoriert, es wird nichts")
+        print("[WARNUNG] ausgelassen; das Modell bestimmt nur die Reihenfolge.")
+        print("[WARNUNG] " + "=" * 70)
+        max_seconds = None
+    level = max(fill_levels)
+    ranked = sorted(configs, key=lambda cfg: model.predict_cell(cfg, level, scenario_name), reverse=descending)
+    for cfg in ranked:
+        print(f"[MODELL] {cfg['zfs_syntax']}: ~{model.predict_cell(cfg, level, scenario_name):.0f} s "
+              f"bei {level:.0%} Füllstand")
+
+    def skip(cfg, level):
+        return max_seconds is not None and model.predict_cell(cfg, level, scenario_name) > max_seconds
+
+    return ranked, skip
+
+
+def _print_cv(cv):
+    if not cv:
+        print("[WARNUNG] Zu wenige Messungen für eine Kreuzvalidierung.")
+        return
+    print(f"[INFO] {cv['folds']}-fache Kreuzvalidierung über {cv['n']} Messungen:")
+    for name in ("model", "mean_baseline"):
+        e = cv[name]
+        print(f"  {name:14s} RMSE {e['rmse_s']:10.3f} s  MAE {e['mae_s']:10.3f} s  "
+              f"Median-Fehler {e['median_ape']:.1%}")
+    if cv["model"]["rmse_s"] >= cv["mean_baseline"]["rmse_s"]:
+        print("[WARNUNG] Modell nicht besser als der Mittelwert: nur zum Sortieren verwenden, "
+              "--model-max-seconds wird ignoriert.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modell der dRAID-Resilver-Zeit")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("fit", help="an Messungen anpassen und kreuzvalidieren")
+    p.add_argument("--logs", nargs="*", default=["messwerte/*.log"], help="Text-Logs (Glob-Muster)")
+    p.add_argument("--log-scenario", default="worst-case", help="Szenario der Text-Logs")
+    p.add_argument("--results", nargs="*", default=[], help="ResultStore-JSONL-Dateien")
+    p.add_argument("--disk-bw", default="250M", help="Bandbreite pro Disk (Bytes/s, z.B. 250M)")
+    p.add_argument("--disk-size", default="14t", help="Disk-Größe, falls die Belegung nicht gemessen ist")
+    p.add_argument("--folds", type=int, default=5)
+    p.add_argument("--save", default="resilver_model.json")
+
+    p = sub.add_parser("rank", help="Layouts nach vorhergesagter Resilver-Zeit sortieren")
+    p.add_argument("--model", default="resilver_model.json")
+    p.add_argument("--device-count", type=int, required=True)
+    p.add_argument("--layout", default="single")
+    p.add_argument("--scenario", default="worst-case-wipe")
+    p.add_argument("--spares", type=int, default=None)
+    p.add_argument("--fill", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    if args.command == "fit":
+        paths = sorted({p for pattern in args.logs for p in glob.glob(pattern)})
+        records = list(load_logs(paths, args.log_scenario))
+        for path in args.results:
+            records.extend(load_results(path))
+        try:
+            model = ResilverModel.fit_records(records, parse_size(args.disk_bw), parse_size(args.disk_size),
+                                              args.folds)
+        except ValueError as e:
+            print(f"[FEHLER] {e}")
+            return 1
+        print(f"[INFO] {len(records)} Messungen aus {len(paths)} Logs und {len(args.results)} Ergebnisdateien.")
+        for name, c in zip(FEATURES, model.coef):
+            print(f"  {name:14s} {c:12.4f}")
+        _print_cv(model.cv)
+        model.save(args.save)
+        print(f"[INFO] Modell gespeichert: {args.save}")
+        return 0
+
+    from .sweep import LAYOUTS
+
+    model = ResilverModel.load(args.model)
+    scenario = SCENARIOS[args.scenario]
+    spares = scenario.spares if args.spares is None else args.spares
+    placeholder = [f"disk{i}" for i in range(args.device_count)]
+    cell_order(model, LAYOUTS[args.layout](placeholder, spares=spares), [args.fill], scenario.name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
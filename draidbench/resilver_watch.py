@@ -0,0 +1,132 @@
+"""Bausteine, um Start und Ende eines Resilvers über `zpool events -f` zu erkennen.
+
+Gewartet wird in aio.wait_for_resilver(). Sind keine Events verfügbar
+(altes ZFS, kein Zugriff auf /dev/zfs-Events), wird auf adaptives Polling
+von `zpool status` zurückgefallen: anfangs alle 50 ms, danach mit
+wachsendem Abstand bis max. 2 s.
+
+Mit `scrub=True` (sequentieller Rebuild, `zpool replace -s`) wird danach
+der Scrub, den ZFS selbst startet, getrennt gemessen: die Redundanz ist
+nach dem Rebuild wiederhergestellt, geprüft sind die Daten erst nach dem
+Scrub.
+
+Das zpool-Binary kann über die Umgebungsvariable ZPOOL_BIN oder den
+Parameter `zpool_bin` ersetzt werden, z.B. durch ein Stub-Skript, das
+aufgezeichnete Event-Streams wieder abspielt.
+"""
+import os
+import re
+import time
+
+ZPOOL_BIN = os.environ.get("ZPOOL_BIN", "zpool")
+
+RESILVER_START = "resilver_start"
+RESILVER_FINISH = "resilver_finish"
+SCRUB_START = "scrub_start"
+SCRUB_FINISH = "scrub_finish"
+
+POLL_MIN_INTERVAL = 0.05
+POLL_MAX_INTERVAL = 2.0
+POLL_BACKOFF = 1.5
+
+# wenn nach dieser Zeit kein resilver_start kam, wird einmal der Status geprüft
+START_GRACE = 5.0
+# "method", wenn weder Event noch Status einen Resilver gezeigt haben (leerer Pool)
+NO_RESILVER = "none"
+# "method", wenn der Resilver beim ersten Poll schon fertig war (fast leerer Pool)
+COMPLETED_BEFORE_POLL = "polling-completed"
+# "scan: resilvered 1.50M in 00:00:01 with 0 errors on Sat Oct 17 18:55:07 2026"
+RESILVERED_ON_RE = re.compile(r"scan:\s+resilvered\b.*\bon\s+(\w{3}\s+\w{3}\s+\d+\s+[\d:]{8}\s+\d{4})")
+
+
+def resilver_in_progress(status):
+    """Prüft, ob laut `zpool status`-Text ein Resilver/Rebuild läuft."""
+    for line in status.splitlines():
+        line = line.strip()
+        if not line.startswith("scan:"):
+            continue
+        if ("resilver" in line or "rebuild" in line) and "in progress" in line:
+            return True
+    # alte Ausgabeformate ohne "scan:"-Zeile
+    return "resilver in progress" in status
+
+
+def resilver_completed_at(status):
+    """Unix-Zeit (Sekunden, lokale Zeit) eines abgeschlossenen Resilvers laut "scan:"-Zeile, sonst None."""
+    m = RESILVERED_ON_RE.search(status)
+    if not m:
+        return None
+    try:
+        return time.mktime(time.strptime(m.group(1), "%a %b %d %H:%M:%S %Y"))
+    except ValueError:
+        return None
+
+
+def scrub_in_progress(status):
+    """Prüft, ob laut `zpool status`-Text ein Scrub läuft."""
+    return any(line.strip().startswith("scan:") and "scrub in progress" in line for line in status.splitlines())
+
+
+def parse_events(lines):
+    """Zerlegt die Ausgabe von `zpool events -v -H` in Event-Dicts.
+
+    Jedes Event beginnt mit einer Kopfzeile "<datum> <zeit> <klasse>",
+    gefolgt von eingerückten "key = value"-Zeilen.
+    """
+    event = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        if not line[0].isspace():
+            if event is not None:
+                yield event
+            parts = line.split()
+            event = {"class": parts[-1] if parts else "", "header": line}
+            continue
+        if event is None or "=" not in line:
+            continue
+        key, _, value = line.strip().partition("=")
+        event[key.strip()] = value.strip().strip('"')
+    if event is not None:
+        yield event
+
+
+def event_kind(event):
+    cls = event.get("class", "")
+    if cls.endswith(RESILVER_START):
+        return RESILVER_START
+    if cls.endswith(RESILVER_FINISH):
+        return RESILVER_FINISH
+    if cls.endswith(SCRUB_START):
+        return SCRUB_START
+    if cls.endswith(SCRUB_FINISH):
+        return SCRUB_FINISH
+    return None
+
+
+def event_id(event):
+    try:
+        return int(event.get("eid", ""), 0)
+    except ValueError:
+        return None
+
+
+def redundancy_times(begin, finish_ts, scrub_start_ts=None, scrub_finish_ts=None):
+    """Kennzahlen zur wiederhergestellten Redundanz (Sekunden ab Beginn des Resilvers).
+
+    redundancy_s: bis alle Daten wieder redundant liegen (Ende Resilver/Rebuild).
+    verified_s: bis die Prüfsummen verifiziert sind; beim heilenden Resilver
+    dasselbe, beim sequentiellen Rebuild erst nach dem Scrub.
+    """
+    times = {"redundancy_s": finish_ts - begin, "verified_s": finish_ts - begin}
+    if scrub_finish_ts is not None:
+        scrub_begin = scrub_start_ts if scrub_start_ts is not None else finish_ts
+        times.update({
+            "rebuild_s": finish_ts - begin,
+            "scrub_s": scrub_finish_ts - scrub_begin,
+            "scrub_wait_s": scrub_begin - finish_ts,
+            "verified_s": scrub_finish_ts - begin,
+        })
+    return times
+
@@ -0,0 +1,121 @@
+"""Szenarien für den Resilver-Test.
+
+Ein Szenario legt nur fest, wie der Ausfall simuliert und wie die Disk
+ersetzt wird. `replace()` ist der Auslöser, ab dem die Resilver-Zeit
+gemessen wird. Neue Szenarien werden mit @register eingetragen.
+"""
+import time
+
+from .shell import run_cmd
+from .wipe import wipe_disks
+
+SCENARIOS = {}
+
+
+def register(cls):
+    SCENARIOS[cls.name] = cls
+    return cls
+
+
+def get_scenario(name):
+    try:
+        return SCENARIOS[name]()
+    except KeyError:
+        raise ValueError(f"Unbekanntes Szenario: {name} (verfügbar: {', '.join(sorted(SCENARIOS))})")
+
+
+class Scenario:
+    name = None
+    spares = 0
+    description = ""
+    # zpool checkpoint verbietet attach/replace, siehe fill_cache.py
+    supports_checkpoint = True
+    # für resilver_model: sequentieller Rebuild statt heilendem Resilver,
+    # Ziel ist eine (ggf. verteilte) Spare statt derselben Disk
+    sequential = False
+    to_spare = False
+    # nach dem Resilver auf den Scrub warten und ihn getrennt messen
+    verify_scrub = False
+
+    def failed_disk(self, cfg):
+        return cfg["used_disks"][0]
+
+    def fail(self, pool_name, cfg):
+        """Simuliert den Ausfall. Standard: Disk offline nehmen."""
+        failed_path = self.failed_disk(cfg)
+        print(f"[INFO] Nehme Disk offline: {failed_path}")
+        run_cmd(f"zpool offline {pool_name} {failed_path}")
+        time.sleep(0.5)
+
+    def replace(self, pool_name, cfg):
+        """Löst den Resilver aus."""
+        raise NotImplementedError
+
+    def finish(self, pool_name, cfg):
+        """Aufräumen nach dem Resilver, bevor der Pool gelöscht wird."""
+
+
+@register
+class BestCaseWithSpare(Scenario):
+    name = "best-case-spare"
+    spares = 1
+    description = "Disk offline, zpool replace auf Spare (physisch oder verteilt)"
+    supports_checkpoint = False
+    to_spare = True
+
+    def spare_target(self, cfg):
+        # physische Spare (poolsAutomatisieren3) oder verteilte dRAID-Spare
+        if cfg.get("spare_disk"):
+            return cfg["spare_disk"]
+        if cfg.get("vdevs", 1) > 1:
+            # mehrere vdevs bekommen eine physische Spare, die verteilte des ersten vdevs wäre geraten
+            raise ValueError(f"{cfg['zfs_syntax']} mit {cfg['vdevs']} vdevs hat keine physische Spare "
+                             f"(spare_disk) für {self.name}")
+        return f"draid{cfg['parity']}-0-0"
+
+    def replace(self, pool_name, cfg):
+        failed_path = self.failed_disk(cfg)
+        spare = self.spare_target(cfg)
+        print(f"[INFO] Ersetze durch Ersatz-Disk: {spare}")
+        run_cmd(f"zpool replace {pool_name} {failed_path} {spare}")
+
+
+@register
+class SequentialRebuild(BestCaseWithSpare):
+    name = "sequential-rebuild"
+    spares = 1
+    description = "Disk offline, zpool replace -s auf die Spare: sequentieller Rebuild, danach Scrub"
+    sequential = True
+    # der Rebuild prüft keine Prüfsummen, ZFS startet danach selbst einen Scrub
+    verify_scrub = True
+
+    def replace(self, pool_name, cfg):
+        failed_path = self.failed_disk(cfg)
+        spare = self.spare_target(cfg)
+        print(f"[INFO] Sequentieller Rebuild auf Ersatz-Disk: {spare}")
+        run_cmd(f"zpool replace -s {pool_name} {failed_path} {spare}")
+
+
+@register
+class WorstCaseNoSpare(Scenario):
+    name = "worst-case"
+    spares = 0
+    description = "Disk offline und wieder online, nur die Lücke wird resilvert"
+
+    def replace(self, pool_name, cfg):
+        failed_path = self.failed_disk(cfg)
+        print(f"[INFO] Bringe Disk wieder online: {failed_path}")
+        run_cmd(f"zpool online {pool_name} {failed_path}")
+
+
+@register
+class WorstCaseWipe(WorstCaseNoSpare):
+    name = "worst-case-wipe"
+    spares = 1
+    description = "Disk offline, Labels löschen, wieder online -> voller Resilver"
+
+    def fail(self, pool_name, cfg):
+        super().fail(pool_name, cfg)
+        failed_path = self.failed_disk(cfg)
+        print(f"[INFO] Wipe Disk {failed_path} (simulierter Replacement)...")
+        wipe_disks([failed_path])
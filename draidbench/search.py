@@ -0,0 +1,307 @@
+"""Adaptive Suche im bs x numjobs x iodepth-Raum statt vollem Gitter.
+
+Successive Halving mit Verfeinerung: Start auf einem groben Gitter (jeder
+`stride`-te Wert jeder Achse) mit kurzer Laufzeit. Pro Runde bleibt das
+beste 1/`eta` der Kandidaten übrig, die Schrittweite auf dem Gitter
+halbiert sich, die Nachbarn der `beam` besten Überlebenden kommen als
+neue Kandidaten dazu und die Laufzeit pro Punkt wächst um den Faktor `eta`. Am Ende wird
+der Sieger mit voller Laufzeit nachgemessen.
+
+Ziele:
+  bw   maximale Bandbreite
+  lat  kleinste p99-Latenz bei Bandbreite >= bw_floor
+
+Jeder ausgewertete Punkt wird als JSONL-Zeile geloggt. Mit --synthetic
+ersetzt eine synthetische Durchsatz-Fläche mit bekanntem Optimum fio;
+dann wird das Ergebnis gegen das volle Gitter geprüft:
+
+    python -m draidbench.search --synthetic
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import sys
+
+from . import aio
+from .combination import FIO_ARGS, run_point
+from .fio_table import FioTable
+from .pool import parse_size
+from .shell import CommandError
+
+OBJECTIVES = ("bw", "lat")
+DEFAULT_BS = ["4k", "8k", "16k", "32k", "64k", "128k", "256k", "512k", "1m", "2m", "4m"]
+DEFAULT_NUMJOBS = ["1", "2", "4", "8", "16", "32", "64", "128"]
+DEFAULT_IODEPTH = ["1", "2", "4", "8", "16", "32", "64"]
+
+
+class Space:
+    """Gitter aus sortierten Wertelisten je Achse, Punkte sind Index-Tupel."""
+
+    def __init__(self, bs, numjobs, iodepth):
+        self.axes = ("bs", "numjobs", "iodepth")
+        self.values = [sorted(v, key=parse_size) for v in (bs, numjobs, iodepth)]
+
+    def point(self, index):
+        return {axis: values[i] for axis, values, i in zip(self.axes, self.values, index)}
+
+    def grid(self, stride=1):
+        """Jeder `stride`-te Wert je Achse, der größte Wert ist immer dabei."""
+        axes = []
+        for values in self.values:
+            picks = list(range(0, len(values), stride))
+            if picks[-1] != len(values) - 1:
+                picks.append(len(values) - 1)
+            axes.append(picks)
+        return list(itertools.product(*axes))
+
+    def neighbours(self, index, step):
+        """Alle Gitterpunkte im Würfel mit Kantenlänge 2*step um `index`, auch diagonal.
+
+        Diagonale Schritte braucht das Latenzziel: die Bandbreiten-Grenze
+        verläuft schräg, z.B. mehr bs bei weniger numjobs.
+        """
+        for deltas in itertools.product((-step, 0, step), repeat=len(index)):
+            moved = tuple(i + d for i, d in zip(index, deltas))
+            if moved != index and all(0 <= i < len(v) for i, v in zip(moved, self.values)):
+                yield moved
+
+    def size(self):
+        return math.prod(len(v) for v in self.values)
+
+
+# schlechter als jeder gültige Punkt (Latenzen in ns liegen weit darunter)
+INFEASIBLE = 1e15
+
+
+def score(metrics, objective="bw", bw_floor=0):
+    """Größer ist besser.
+
+    Bei "lat" liegen Punkte unter der Bandbreiten-Untergrenze hinter allen
+    gültigen, untereinander nach Abstand zur Untergrenze sortiert, damit
+    die Suche auch aus einem ungültigen Startgitter herausfindet.
+    """
+    if objective == "bw":
+        return metrics["bw_bytes"]
+    lat = metrics.get("lat_p99_ns")
+    if not lat:
+        return -math.inf
+    if metrics["bw_bytes"] < bw_floor:
+        return -INFEASIBLE * (2 - metrics["bw_bytes"] / bw_floor)
+    return -lat
+
+
+class SyntheticSurface:
+    """Durchsatz-Fläche mit bekanntem Optimum als Ersatz für fio.
+
+    Bandbreite ist eine Glocke über log2(bs/numjobs/iodepth) um `peak_at`,
+    die Latenz wächst mit numjobs*iodepth und bs. Das Messrauschen fällt
+    mit 1/sqrt(Laufzeit).
+    """
+
+    def __init__(self, peak_at=("256k", "8", "16"), peak_bw=2 * 1024 ** 3, noise=0.1, seed=0):
+        self.center = [math.log2(parse_size(v)) for v in peak_at]
+        self.peak_bw = peak_bw
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.evaluations = 0
+        self.runtime_s = 0.0
+
+    def true_metrics(self, point):
+        x = [math.log2(parse_size(point[a])) for a in ("bs", "numjobs", "iodepth")]
+        spread = (2.5, 2.0, 2.5)
+        bw = self.peak_bw * math.exp(-sum((xi - ci) ** 2 / (2 * s ** 2)
+                                          for xi, ci, s in zip(x, self.center, spread)))
+        queue = parse_size(point["numjobs"]) * parse_size(point["iodepth"])
+        lat = 50e3 * (1 + queue / 16) * (1 + parse_size(point["bs"]) / 1024 ** 2)
+        return {"bw_bytes": bw, "lat_p99_ns": lat}
+
+    async def __call__(self, point, runtime):
+        self.evaluations += 1
+        self.runtime_s += runtime
+        metrics = self.true_metrics(point)
+        sigma = self.noise / math.sqrt(max(runtime, 1))
+        return {k: v * max(0.0, 1 + self.random.gauss(0, sigma)) for k, v in metrics.items()}
+
+
+def fio_evaluator(operation, target, dest_folder, fio_args=FIO_ARGS, cv=0.05, on_result=None):
+    """Auswertung eines Punkts mit fio (siehe combination.run_point).
+
+    on_result(record, fio-json) bekommt jeden Lauf, das json selbst wird
+    nicht aufgehoben.
+    """
+    os.makedirs(dest_folder, exist_ok=True)
+    counter = itertools.count()
+
+    async def evaluate(point, runtime):
+        result_file = os.path.join(
+            dest_folder, f"search_{next(counter):03d}_{point['bs']}_{point['numjobs']}_{point['iodepth']}.json")
+        result_data, record = await run_point(operation, point, target, result_file, max_runtime=runtime,
+                                              min_runtime=min(5.0, runtime), cv=cv, fio_args=fio_args)
+        if on_result is not None:
+            on_result(record, result_data)
+        return record
+
+    return evaluate
+
+
+async def successive_halving(space, evaluate, objective="bw", bw_floor=0, stride=4, eta=3, beam=2,
+                             min_runtime=5, max_runtime=30, log_path=None):
+    """Sucht das Optimum. Gibt (bester Punkt, Metriken, alle Auswertungen) zurück.
+
+    Die Metriken sind die der letzten Messung des besten Punkts.
+    """
+    if eta < 2:
+        raise ValueError(f"eta muss mindestens 2 sein, nicht {eta}")
+    evaluations = []
+    latest = {}
+    log = open(log_path, "a") if log_path else None
+
+    async def measure(index, runtime, rung):
+        point = space.point(index)
+        try:
+            metrics = await evaluate(point, runtime)
+            value = score(metrics, objective, bw_floor)
+        except CommandError as e:
+            print(f"[FEHLER] {e}")
+            metrics, value = {"bw_bytes": 0, "error": str(e)}, -math.inf
+        entry = dict(point, rung=rung, runtime=runtime, score=value, **metrics)
+        evaluations.append(entry)
+        latest[index] = entry
+        print(f"[SUCHE] Runde {rung}: {point} -> {metrics['bw_bytes'] / 1024 ** 2:.1f} MiB/s")
+        if log is not None:
+            log.write(json.dumps(entry) + "\n")
+            log.flush()
+        return entry["score"]
+
+    try:
+        step = stride
+        candidates = space.grid(stride)
+        rung = 0
+        while True:
+            runtime = min(max_runtime, min_runtime * eta ** rung)
+            scores = {c: await measure(c, runtime, rung) for c in candidates}
+            ranked = sorted(candidates, key=scores.get, reverse=True)
+            survivors = ranked[:max(1, math.ceil(len(ranked) / eta))]
+            if step == 1 and len(survivors) == 1:
+                break
+            if step > 1:
+                step //= 2
+                refined = {n for s in survivors[:beam] for n in space.neighbours(s, step)}
+                candidates = survivors + sorted(refined - set(survivors))
+            else:
+                candidates = survivors
+            rung += 1
+
+        best = survivors[0]
+        if runtime < max_runtime:
+            await measure(best, max_runtime, rung + 1)
+        final = latest[best]
+    finally:
+        if log is not None:
+            log.close()
+    return space.point(best), final, evaluations
+
+
+def validate_synthetic(space, surface, objective="bw", bw_floor=0, **search_opts):
+    """Vergleicht die Suche auf der synthetischen Fläche mit dem vollen Gitter."""
+    truth = max(space.grid(1), key=lambda i: score(surface.true_metrics(space.point(i)), objective, bw_floor))
+    true_best = space.point(truth)
+    true_score = score(surface.true_metrics(true_best), objective, bw_floor)
+
+    found, _, _ = asyncio.run(successive_halving(space, surface, objective, bw_floor, **search_opts))
+    found_score = score(surface.true_metrics(found), objective, bw_floor)
+    max_runtime = search_opts.get("max_runtime", 30)
+    report = {
+        "true_best": true_best,
+        "found": found,
+        "score_ratio": found_score / true_score if objective == "bw" else true_score / found_score,
+        "evaluations": surface.evaluations,
+        "grid_points": space.size(),
+        "runtime_fraction": surface.runtime_s / (space.size() * max_runtime),
+    }
+    return report
+
+
+def run_search(operation, bs, numjobs, iodepth, target, dest_folder, objective="bw", bw_floor=0,
+               on_result=None, fio_args=FIO_ARGS, **search_opts):
+    """Synchroner Einstieg mit fio; Strg+C beendet den laufenden fio-Prozess."""
+    space = Space(bs, numjobs, iodepth)
+    evaluate = fio_evaluator(operation, target, dest_folder, fio_args, on_result=on_result)
+
+    async def search():
+        return await successive_halving(space, evaluate, objective, bw_floor, **search_opts)
+
+    async def cleanup():
+        pass
+
+    outcome, interrupted = aio.run_guarded(search, cleanup)
+    if interrupted:
+        raise KeyboardInterrupt
+    return outcome
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Adaptive fio-Parametersuche (Successive Halving)")
+    parser.add_argument("--operation", default="write")
+    parser.add_argument("--bs", nargs="+", default=DEFAULT_BS)
+    parser.add_argument("--numjobs", nargs="+", default=DEFAULT_NUMJOBS)
+    parser.add_argument("--iodepth", nargs="+", default=DEFAULT_IODEPTH)
+    parser.add_argument("--objective", choices=OBJECTIVES, default="bw")
+    parser.add_argument("--bw-floor", default="0", help="Untergrenze für --objective lat, z.B. 500M (Bytes/s)")
+    parser.add_argument("--stride", type=int, default=4, help="Abstand im Startgitter")
+    parser.add_argument("--eta", type=int, default=3, help="Anteil 1/eta überlebt jede Runde")
+    parser.add_argument("--beam", type=int, default=2, help="nur um die besten N wird verfeinert")
+    parser.add_argument("--min-runtime", type=float, default=5)
+    parser.add_argument("--max-runtime", type=float, default=30)
+    parser.add_argument("--target", default="/mnt/draidBenchmark/testbereichjustus")
+    parser.add_argument("--dest", default="search_results")
+    parser.add_argument("--log", default=None, help="JSONL-Log aller Auswertungen (Standard: im --dest)")
+    parser.add_argument("--synthetic", action="store_true", help="synthetische Fläche statt fio, mit Prüfung")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.eta < 2:
+        print(f"[FEHLER] --eta muss mindestens 2 sein (1/eta überlebt jede Runde), nicht {args.eta}.")
+        return 1
+    space = Space(args.bs, args.numjobs, args.iodepth)
+    os.makedirs(args.dest, exist_ok=True)
+    opts = {
+        "stride": args.stride,
+        "eta": args.eta,
+        "beam": args.beam,
+        "min_runtime": args.min_runtime,
+        "max_runtime": args.max_runtime,
+        "log_path": args.log or os.path.join(args.dest, "search_log.jsonl"),
+    }
+    bw_floor = parse_size(args.bw_floor)
+
+    if args.synthetic:
+        report = validate_synthetic(space, SyntheticSurface(seed=args.seed), args.objective, bw_floor, **opts)
+        print(json.dumps(report, indent=2))
+        ok = report["score_ratio"] >= 0.95 and report["evaluations"] < report["grid_points"]
+        print("[INFO] Validierung " + ("bestanden" if ok else "fehlgeschlagen"))
+        return 0 if ok else 1
+
+    table = FioTable(os.path.join(args.dest, "search_results.csv"))
+    try:
+        best, final, evaluations = run_search(args.operation, args.bs, args.numjobs, args.iodepth, args.target,
+                                              args.dest, args.objective, bw_floor,
+                                              on_result=lambda record, data: table.add(
+                                                  data, operation=args.operation, **record),
+                                              **opts)
+    except KeyboardInterrupt:
+        return 130
+    print(f"\n[ERGEBNIS] {best}: {final['bw_bytes'] / 1024 ** 2:.1f} MiB/s "
+          f"nach {len(evaluations)} fio-Läufen (volles Gitter: {space.size()})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
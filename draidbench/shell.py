@@ -0,0 +1,80 @@
+"""Ausführen von Shell-Kommandos mit einheitlicher Fehlerbehandlung.
+
+Jedes Kommando läuft in einer eigenen Prozessgruppe. Bei Timeout oder
+Strg+C wird die ganze Gruppe beendet, nicht nur die Shell (sonst liefen
+z.B. fio oder `zfs send` hinter einem `sh -c` weiter), wie in aio.run().
+"""
+import os
+import signal
+import subprocess
+
+# Zeit zwischen SIGTERM und SIGKILL an die Prozessgruppe
+KILL_GRACE = 5
+
+
+class CommandError(Exception):
+    """Ein Kommando ist mit Returncode != 0 beendet worden."""
+
+    def __init__(self, cmd, returncode, stderr):
+        super().__init__(f"Fehler bei Kommandoausführung: {cmd} (rc={returncode})")
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+def _killpg(proc):
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(KILL_GRACE)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def _run(cmd, timeout=None):
+    """(returncode, stdout, stderr); returncode None nach Timeout."""
+    proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                            start_new_session=True)
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _killpg(proc)
+        # Pipes nicht mehr abwarten: ein Enkel außerhalb der Gruppe könnte sie offen halten
+        for stream in (proc.stdout, proc.stderr):
+            stream.close()
+        return None, "", "timeout"
+    except BaseException:
+        # Strg+C erreicht die eigene Prozessgruppe nicht, also selbst beenden
+        _killpg(proc)
+        raise
+    return proc.returncode, stdout, stderr
+
+
+def run_status(cmd, timeout=None):
+    """Führt ein Kommando aus und gibt nur den Returncode zurück (None nach Timeout)."""
+    return _run(cmd, timeout)[0]
+
+
+def run_cmd(cmd, check=True, timeout=None):
+    """Führt ein Shell-Kommando aus und gibt stdout zurück.
+
+    Mit check=True wird bei Fehlern CommandError geworfen, mit check=False
+    wird der Fehler ignoriert. Nach `timeout` Sekunden wird die
+    Prozessgruppe des Kommandos beendet und es gilt als fehlgeschlagen
+    (rc=None).
+    """
+    returncode, stdout, stderr = _run(cmd, timeout)
+    if returncode is None:
+        print(f"[FEHLER] Timeout nach {timeout} s: {cmd}")
+        if check:
+            raise CommandError(cmd, None, "timeout")
+        return ""
+    if check and returncode != 0:
+        print(f"[FEHLER] Befehl fehlgeschlagen: {cmd}")
+        print(stderr)
+        raise CommandError(cmd, returncode, stderr)
+    return stdout.strip()
@@ -0,0 +1,107 @@
+"""Persistenter Ergebnisspeicher (JSONL) für die Test-Matrix.
+
+Jede Zeile ist ein abgeschlossener Matrix-Punkt mit stabilem Schlüssel.
+Zeilen werden mit einem einzigen write() angehängt und per fsync
+gesichert; eine beim Absturz abgeschnittene letzte Zeile wird beim
+Laden ignoriert. Ein neu gestarteter Lauf überspringt alle Schlüssel,
+die schon im Speicher stehen.
+"""
+import hashlib
+import json
+import os
+import re
+import socket
+import time
+
+KEY_FILL_RE = re.compile(r"\|fill=([^|]+)")
+
+
+def disk_set_hash(dev_paths):
+    """Kurzer Hash über die verwendeten Disks (reihenfolgeabhängig, wie der Pool)."""
+    h = hashlib.sha256("\n".join(dev_paths).encode())
+    return h.hexdigest()[:12]
+
+
+def upgrade_record(record):
+    """Ältere Datensätze haben unter "fill" die Füll-Angaben statt des Füllstands."""
+    fill = record.get("fill")
+    if isinstance(fill, dict):
+        record["fill_info"] = fill
+        record.setdefault("fill_ratio", fill.get("fill_ratio"))
+        level = fill.get("target_ratio")
+        match = KEY_FILL_RE.search(record.get("key") or "")
+        if level is None and match:
+            level = float(match.group(1))
+        record["fill"] = level
+    return record
+
+
+def cell_key(cfg, level, numjobs, scenario_name, disk_hash=None, workload=None, tunables=None):
+    """Stabiler Schlüssel eines Matrix-Punkts.
+
+    Messungen unter Last (load_tag) bekommen "|load=...", mit gesetzten
+    Modulparametern (tunables_tag) "|tun=...".
+    """
+    disk_hash = disk_hash or disk_set_hash(cfg["used_disks"])
+    key = f"{cfg['zfs_syntax']}|fill={level:g}|numjobs={numjobs}|{scenario_name}|disks={disk_hash}"
+    if workload:
+        key += f"|load={workload}"
+    if tunables:
+        key += f"|tun={tunables}"
+    return key
+
+
+class ResultStore:
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self._load()
+
+    def _load(self):
+        try:
+            f = open(self.path)
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # abgebrochener Schreibvorgang am Dateiende
+                    continue
+                if record.get("key"):
+                    self.done.add(record["key"])
+
+    def is_done(self, key):
+        return key in self.done
+
+    def records(self):
+        """Alle gespeicherten Ergebnisse, zeilenweise gelesen."""
+        try:
+            f = open(self.path)
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    yield upgrade_record(json.loads(line))
+                except ValueError:
+                    continue
+
+    def append(self, key, record):
+        # host/finished_at bleiben erhalten, wenn sie schon gesetzt sind (verteilte Läufe)
+        record = {"host": socket.gethostname(), "finished_at": time.time(), **record, "key": key}
+        line = json.dumps(record, sort_keys=True) + "\n"
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # abgeschnittene letzte Zeile abschließen, sonst klebt der neue Datensatz daran
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                line = "\n" + line
+            os.write(fd, line.encode())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self.done.add(key)
@@ -0,0 +1,458 @@
+"""Test-Matrix Konfiguration x Füllstand x Numjobs und Kommandozeile."""
+import argparse
+import itertools
+import os
+import re
+from datetime import datetime
+
+from . import aio, config as cfg_mod
+from .devices import PROVIDERS, make_provider
+from .fill import PATTERNS
+from .fill_cache import MODES as FILL_CACHE_MODES, FillCache
+from .load import DEFAULTS as LOAD_DEFAULTS, load_tag
+from .pool import restore_cache_settings, tune_cache_for_benchmark
+from .repeat import RepetitionController, print_progress, sample_key, stored_samples
+from .scenarios import SCENARIOS, get_scenario
+from .store import ResultStore, cell_key, disk_set_hash
+from .tunables import KNOWN as KNOWN_TUNABLES, STATE_FILE as TUNABLES_STATE, Tunables, expand_sets, tunables_tag
+
+LAYOUTS = {
+    "single": cfg_mod.generate_rg_configs,
+    "multi-vdev": cfg_mod.generate_draid2_configs,
+}
+
+
+def write_log_entry(logfile, cfg, level, numjobs, duration, status):
+    with open(logfile, "a") as f:
+        f.write(f"--- Config: {cfg['zfs_syntax']} | Fill: {int(level*100)}% | Numjobs: {numjobs} ---\n")
+        f.write(f"VDEVs: {cfg['vdevs']}, Data: {cfg['data']}, Children: {cfg['children']}\n")
+        f.write(f"Resilver-Zeit: {duration:.2f} Sekunden\n")
+        f.write(status + "\n\n")
+
+
+def make_record(cfg, level, numjobs, scenario, result):
+    """Ergebnis eines Matrix-Punkts für den ResultStore."""
+    record = {k: cfg[k] for k in ("zfs_syntax", "vdevs", "children", "spares", "parity", "data")}
+    record.update({
+        "fill": level,
+        "numjobs": numjobs,
+        "scenario": scenario.name,
+        "disk_hash": disk_set_hash(cfg["used_disks"]),
+    })
+    record.update({k: v for k, v in result.items() if k not in ("trigger_ts", "start_ts", "finish_ts")})
+    if "fill_info" in result:
+        record["fill_ratio"] = (result["fill_info"] or {}).get("fill_ratio")
+    return record
+
+
+def make_summary_record(cfg, level, numjobs, scenario, controller):
+    """Zusammenfassung wiederholter Messungen; "duration" ist der Mittelwert ohne Ausreißer."""
+    record = {k: cfg[k] for k in ("zfs_syntax", "vdevs", "children", "spares", "parity", "data")}
+    summary = controller.result()
+    record.update({
+        "fill": level,
+        "numjobs": numjobs,
+        "scenario": scenario.name,
+        "disk_hash": disk_set_hash(cfg["used_disks"]),
+        "duration": summary["mean"],
+        "repetition": summary,
+    })
+    return record
+
+
+def safe_name(key):
+    return re.sub(r"[^A-Za-z0-9_.=-]+", "_", key)
+
+
+def cell_fill_opts(fill_opts, key):
+    """fill_opts mit eigenem fio-Log-Verzeichnis pro Matrix-Punkt."""
+    fill_opts = dict(fill_opts or {})
+    log_root = fill_opts.pop("log_root", None)
+    if log_root:
+        fill_opts["log_dir"] = os.path.join(log_root, safe_name(key))
+    return fill_opts
+
+
+def cell_resilver_opts(resilver_opts, key):
+    """resilver_opts mit eigener Telemetrie-Datei und eigenem Last-Log-Verzeichnis pro Matrix-Punkt."""
+    resilver_opts = dict(resilver_opts or {})
+    telemetry_dir = resilver_opts.pop("telemetry_dir", None)
+    if telemetry_dir and resilver_opts.get("telemetry_interval"):
+        os.makedirs(telemetry_dir, exist_ok=True)
+        resilver_opts["telemetry_path"] = os.path.join(telemetry_dir, safe_name(key) + ".npz")
+    if resilver_opts.get("load"):
+        load = dict(resilver_opts["load"])
+        log_root = load.pop("log_root", None)
+        if log_root:
+            load["log_dir"] = os.path.join(log_root, safe_name(key))
+        resilver_opts["load"] = load
+    return resilver_opts
+
+
+def cell_workload(resilver_opts):
+    """load_tag der Hintergrundlast (None ohne Last), Teil des Schlüssels."""
+    return load_tag((resilver_opts or {}).get("load"))
+
+
+def cell_tunables(tuner, settings):
+    """Ergebnisfelder zu den Modulparametern: aktuelle Scan-/Rebuild-Werte und der gesetzte Satz."""
+    if tuner is None:
+        return {}
+    names = list(KNOWN_TUNABLES) + [name for name in settings or {} if name not in KNOWN_TUNABLES]
+    return {"tunables": tuner.snapshot(names), "tunables_tag": tunables_tag(settings)}
+
+
+def run_cell(cfg, scenario, level, numjobs, fill_opts=None, fill_cache=None, resilver_opts=None,
+             fill_timeout=None):
+    """Synchrone Hülle um aio.run_cell() für Aufrufer ohne Event-Loop (distributed.py).
+
+    SIGINT/SIGTERM brechen den Punkt ab, Pool und Füllung werden
+    weggeräumt, danach kommt ein KeyboardInterrupt beim Aufrufer an.
+    """
+    async def cleanup():
+        if fill_cache is not None:
+            fill_cache.invalidate()
+        await aio.teardown(cfg["pool_name"], cfg["mountpoint"])
+
+    result, interrupted = aio.run_guarded(
+        lambda: aio.run_cell(cfg, scenario, level, numjobs, fill_opts, fill_cache, resilver_opts, fill_timeout),
+        cleanup)
+    if interrupted:
+        raise KeyboardInterrupt
+    return result
+
+
+async def run_repeated_async(cfg, scenario, level, numjobs, key, logfile, fill_opts=None, store=None,
+                             fill_cache=None, resilver_opts=None, fill_timeout=None, repeat=None, extra=None):
+    """Misst einen Matrix-Punkt wiederholt, bis das KI der Dauer eng genug ist (siehe repeat.py).
+
+    Schon gespeicherte Messungen "<key>|rep=N" zählen mit, die Zusammenfassung
+    kommt unter `key` in den Store.
+    """
+    controller = RepetitionController(**repeat)
+    if store is not None:
+        for duration in stored_samples(store, key):
+            controller.add(duration)
+    while controller.more():
+        n = len(controller.samples) + 1
+        rep_key = sample_key(key, n)
+        print(f"[WIEDERHOLUNG {n}/{controller.max_runs}]")
+        result = await aio.run_cell(cfg, scenario, level, numjobs, cell_fill_opts(fill_opts, rep_key),
+                                    fill_cache, cell_resilver_opts(resilver_opts, rep_key), fill_timeout)
+        result.update(extra or {})
+        controller.add(result["duration"])
+        if store is not None:
+            store.append(rep_key, dict(make_record(cfg, level, numjobs, scenario, result), sample=n))
+        write_log_entry(logfile, cfg, level, numjobs, result["duration"], result["status"])
+        print_progress(controller)
+    if store is not None:
+        store.append(key, make_summary_record(cfg, level, numjobs, scenario, controller))
+    return controller.result()
+
+
+async def run_sweep_async(configs, scenario, fill_levels, numjobs_list, logfile, fill_opts=None,
+                          store=None, fill_cache=None, resilver_opts=None, fill_timeout=None, repeat=None,
+                          skip=None, tunables=None, tuner=None):
+    """Läuft die ganze Matrix ab, jeder Matrix-Punkt über aio.run_cell().
+
+    numjobs_list=None nutzt die Anzahl vdevs. Mit `store` werden fertige
+    Matrix-Punkte übersprungen und neue Ergebnisse sofort gesichert, ein
+    abgebrochener Lauf setzt dort fort. Mit `repeat` (Argumente für RepetitionController) wird jeder Punkt bis
+    zum Ziel-Konfidenzintervall wiederholt. `skip(cfg, level)` kann Punkte
+    auslassen (z.B. laut resilver_model zu teuer). `tunables` ist eine
+    Liste von Parametersätzen (tunables.expand_sets), jeder Punkt läuft mit
+    jedem Satz; `tuner` (tunables.Tunables) setzt sie und protokolliert die
+    Scan-/Rebuild-Parameter im Ergebnis. Zurückgesetzt wird vom Aufrufer.
+    """
+    if tunables and tuner is None:
+        tuner = Tunables()
+
+    if fill_cache is not None and not fill_cache.usable_for(scenario):
+        print(f"[WARNUNG] Fill-Cache '{fill_cache.mode}' passt nicht zu {scenario.name}, fülle jedes Mal neu.")
+        fill_cache = None
+
+    for i, cfg in enumerate(configs):
+        print(f"\n[CONFIG {i+1}/{len(configs)}] {cfg['zfs_syntax']}")
+        disk_hash = disk_set_hash(cfg["used_disks"])
+        for level in fill_levels:
+            for numjobs, settings in itertools.product(numjobs_list or [cfg["vdevs"]], tunables or [None]):
+                key = cell_key(cfg, level, numjobs, scenario.name, disk_hash, cell_workload(resilver_opts),
+                               tunables_tag(settings))
+                if store is not None and store.is_done(key):
+                    print(f"[INFO] Überspringe (bereits gemessen): {key}")
+                    continue
+                if skip is not None and skip(cfg, level):
+                    print(f"[INFO] Überspringe (Vorhersage über --model-max-seconds): {key}")
+                    continue
+                try:
+                    print(f"\n[TEST] {int(level*100)}% Füllstand | Numjobs: {numjobs}"
+                          + (f" | {tunables_tag(settings)}" if settings else ""))
+                    if settings:
+                        tuner.apply(settings)
+                    if repeat:
+                        await run_repeated_async(cfg, scenario, level, numjobs, key, logfile, fill_opts, store,
+                                                 fill_cache, resilver_opts, fill_timeout, repeat,
+                                                 cell_tunables(tuner, settings))
+                        continue
+                    result = await aio.run_cell(cfg, scenario, level, numjobs, cell_fill_opts(fill_opts, key),
+                                                fill_cache, cell_resilver_opts(resilver_opts, key), fill_timeout)
+                    result.update(cell_tunables(tuner, settings))
+                    if store is not None:
+                        store.append(key, make_record(cfg, level, numjobs, scenario, result))
+                    write_log_entry(logfile, cfg, level, numjobs, result["duration"], result["status"])
+
+                except Exception as e:
+                    print(f"[FEHLER] Test fehlgeschlagen: {e}")
+                    if fill_cache is not None:
+                        fill_cache.invalidate()
+                    await aio.teardown(cfg["pool_name"], cfg["mountpoint"])
+            if fill_cache is not None:
+                await fill_cache.drop()
+
+
+def add_load_arguments(parser):
+    """Optionen für Hintergrundlast und Modulparameter (auch für distributed.py enqueue)."""
+    parser.add_argument("--load", action="store_true",
+                        help="Resilver unter fio-Hintergrundlast, verglichen mit einer Basislinie vor dem Ausfall")
+    parser.add_argument("--load-rw", default=LOAD_DEFAULTS["rw"], help="fio --rw der Hintergrundlast")
+    parser.add_argument("--load-bs", default=LOAD_DEFAULTS["bs"])
+    parser.add_argument("--load-numjobs", type=int, default=LOAD_DEFAULTS["numjobs"])
+    parser.add_argument("--load-iodepth", type=int, default=LOAD_DEFAULTS["iodepth"])
+    parser.add_argument("--load-rwmixread", type=int, default=LOAD_DEFAULTS["rwmixread"],
+                        help="Leseanteil in %% für rw/randrw")
+    parser.add_argument("--load-ioengine", default=LOAD_DEFAULTS["ioengine"])
+    parser.add_argument("--load-direct", type=int, choices=(0, 1), default=LOAD_DEFAULTS["direct"])
+    parser.add_argument("--load-size", default=LOAD_DEFAULTS["size"], help="Dateigröße pro fio-Job")
+    parser.add_argument("--load-ramp", type=float, default=LOAD_DEFAULTS["ramp_s"],
+                        help="Einschwingzeit der Last in s vor der Basislinie")
+    parser.add_argument("--load-baseline", type=float, default=LOAD_DEFAULTS["baseline_s"],
+                        help="Dauer der Basislinie vor dem Ausfall in s")
+    parser.add_argument("--tunable", action="append", default=[], metavar="NAME=WERT[,WERT...]",
+                        help="ZFS-Modulparameter (oder sysctl mit Punkt) pro Matrix-Punkt durchprobieren; "
+                             "mehrfach angeben = alle Kombinationen")
+
+
+def build_parser(defaults=None, add_help=True):
+    parser = argparse.ArgumentParser(description="dRAID Resilver-Benchmark", add_help=add_help)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="worst-case-wipe")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="single")
+    parser.add_argument("--fill-levels", type=float, nargs="+", default=[0.01])
+    parser.add_argument("--numjobs", type=int, nargs="*", default=[1, 4, 8, 16, 32, 64, 128],
+                        help="leer lassen (--numjobs) = Anzahl vdevs")
+    parser.add_argument("--spares", type=int, default=None, help="Standard: laut Szenario")
+    parser.add_argument("--pool-name", default=cfg_mod.POOL_NAME)
+    parser.add_argument("--mountpoint", default=cfg_mod.MOUNTPOINT)
+    parser.add_argument("--fill-bs", default="2M")
+    parser.add_argument("--fill-direct", action=argparse.BooleanOptionalAction, default=None,
+                        help="O_DIRECT beim Füllen (Standard: native ja, fio nein)")
+    parser.add_argument("--fill-engine", choices=("fio", "native"), default="fio",
+                        help="native: eingebaute Engine mit bytegenauer Zielgröße")
+    parser.add_argument("--fill-pattern", choices=PATTERNS, default="incompressible",
+                        help="Datenmuster der native-Engine")
+    parser.add_argument("--fill-log-dir", default="fill_logs",
+                        help="fio json+ und bw/iops/lat-Logs pro Matrix-Punkt ('' = aus)")
+    parser.add_argument("--fill-log-interval", type=int, default=1000,
+                        help="fio --log_avg_msec in ms")
+    parser.add_argument("--fill-tolerance", type=float, default=None,
+                        help="erlaubte Abweichung von allocated/size zum Füllstand (Standard 0.005)")
+    parser.add_argument("--fill-cache", choices=FILL_CACHE_MODES, default=None,
+                        help="pro Konfiguration/Füllstand nur einmal füllen (numjobs wirkt dann nur auf die erste Füllung)")
+    parser.add_argument("--fill-cache-dir", default="fillcache", help="Ablage der zfs-send-Streams")
+    parser.add_argument("--fill-timeout", type=float, default=None, help="fio nach N s abbrechen")
+    parser.add_argument("--resilver-timeout", type=float, default=None,
+                        help="Resilver nach N s als fehlgeschlagen werten")
+    parser.add_argument("--progress-interval", type=float, default=1.0,
+                        help="Abstand der Fortschritts-Samples in s (0 = aus)")
+    parser.add_argument("--telemetry-interval", type=float, default=0.1,
+                        help="Abstand der /proc/diskstats-Samples in s (0 = aus, braucht numpy)")
+    parser.add_argument("--telemetry-dir", default="telemetry",
+                        help="volle Per-Disk-Zeitreihen als .npz ('' = nur Zusammenfassung)")
+    parser.add_argument("--devices", choices=PROVIDERS, default="jbod",
+                        help="Herkunft der Disks: echte JBOD, Sparse-Dateien, Loop-Devices oder Dry-Run-Stubs")
+    parser.add_argument("--device-count", type=int, default=12, help="Anzahl Devices (außer jbod)")
+    parser.add_argument("--device-size", default="8G", help="Größe der Sparse-Dateien")
+    parser.add_argument("--device-dir", default="/var/tmp/draidbench-devs")
+    parser.add_argument("--device-delay-ms", type=int, default=0, help="dm-delay pro Loop-Device")
+    parser.add_argument("--dry-run-resilver-seconds", type=float, default=2.0)
+    parser.add_argument("--dry-run-canned-dir", default=None,
+                        help="aufgezeichnete Ausgaben für die Dry-Run-Stubs")
+    parser.add_argument("--pack-size", type=int, default=0,
+                        help="Disks pro Pool; >0 = mehrere Pools parallel auf disjunkten Gruppen")
+    parser.add_argument("--pack-isolate", choices=("hba", "enclosure", "none"), default="hba",
+                        help="Gruppen nicht über HBA/Enclosure-Grenzen verteilen")
+    parser.add_argument("--pack-max-groups", type=int, default=None)
+    parser.add_argument("--repeat-max", type=int, default=1,
+                        help="Punkt bis zu N mal wiederholen, bis das 95%%-KI eng genug ist (1 = einmal)")
+    parser.add_argument("--repeat-min", type=int, default=3)
+    parser.add_argument("--repeat-ci", type=float, default=0.1,
+                        help="Ziel-Breite des 95%%-KI relativ zum Mittelwert")
+    parser.add_argument("--model", default=None,
+                        help="resilver_model.json: Konfigurationen nach vorhergesagter Resilver-Zeit ordnen")
+    parser.add_argument("--model-order", choices=("asc", "desc"), default="asc",
+                        help="kurze (asc) oder lange (desc) vorhergesagte Resilver zuerst")
+    parser.add_argument("--model-max-seconds", type=float, default=None,
+                        help="Punkte mit längerer vorhergesagter Resilver-Zeit auslassen "
+                             "(nur, wenn das Modell in der Kreuzvalidierung den Mittelwert schlägt)")
+    add_load_arguments(parser)
+    parser.add_argument("--load-log-dir", default="load_logs",
+                        help="fio-Logs der Last pro Matrix-Punkt ('' = nur Zusammenfassung)")
+    parser.add_argument("--tunables-state", default=TUNABLES_STATE,
+                        help="Originalwerte der gesetzten Parameter, für die Wiederherstellung nach einem Absturz")
+    parser.add_argument("--sysfs-root", default=None,
+                        help="Wurzel für /sys/module/zfs/parameters und /proc/sys "
+                             "(Standard: DRAIDBENCH_SYSFS_ROOT bzw. /)")
+    parser.add_argument("--tune-cache", action="store_true", help="vm.dirty_* für den Lauf absenken")
+    parser.add_argument("--logfile", default=None)
+    parser.add_argument("--results", default="resilver_results.jsonl",
+                        help="JSONL-Ergebnisspeicher, fertige Punkte werden übersprungen")
+    if defaults:
+        parser.set_defaults(**defaults)
+    return parser
+
+
+def fill_opts_from_args(args):
+    return {
+        "bs": args.fill_bs,
+        "direct": args.fill_direct,
+        "engine": args.fill_engine,
+        "pattern": args.fill_pattern,
+        "log_root": args.fill_log_dir or None,
+        "log_avg_msec": args.fill_log_interval,
+        "tolerance": args.fill_tolerance,
+    }
+
+
+def load_opts_from_args(args):
+    if not args.load:
+        return None
+    return {
+        "rw": args.load_rw,
+        "bs": args.load_bs,
+        "numjobs": args.load_numjobs,
+        "iodepth": args.load_iodepth,
+        "rwmixread": args.load_rwmixread,
+        "ioengine": args.load_ioengine,
+        "direct": args.load_direct,
+        "size": args.load_size,
+        "ramp_s": args.load_ramp,
+        "baseline_s": args.load_baseline,
+        "log_root": args.load_log_dir or None,
+    }
+
+
+def resilver_opts_from_args(args):
+    return {
+        "timeout": args.resilver_timeout,
+        "progress_interval": args.progress_interval,
+        "telemetry_interval": args.telemetry_interval,
+        "telemetry_dir": args.telemetry_dir or None,
+        "load": load_opts_from_args(args),
+    }
+
+
+def repeat_from_args(args):
+    if args.repeat_max <= 1:
+        return None
+    return {"rel_width": args.repeat_ci, "min_runs": max(2, min(args.repeat_min, args.repeat_max)),
+            "max_runs": args.repeat_max}
+
+
+def provider_from_args(args):
+    return make_provider(args.devices, count=args.device_count, size=args.device_size,
+                         directory=args.device_dir, delay_ms=args.device_delay_ms,
+                         resilver_seconds=args.dry_run_resilver_seconds,
+                         canned_dir=args.dry_run_canned_dir)
+
+
+def main(argv=None, defaults=None):
+    args = build_parser(defaults).parse_args(argv)
+    scenario = get_scenario(args.scenario)
+    spares = scenario.spares if args.spares is None else args.spares
+    tunable_sets = expand_sets(args.tunable) if args.tunable else None
+
+    provider = provider_from_args(args)
+    tuner = None
+    try:
+        dev_paths = provider.setup()
+        # Dry-Run: Mountpoint im Stub-Verzeichnis statt des echten
+        args.mountpoint = provider.mountpoint or args.mountpoint
+        tuner = Tunables(args.sysfs_root, args.tunables_state)
+        tuner.recover()
+        if args.tune_cache:
+            tune_cache_for_benchmark(tuner)
+        if len(dev_paths) < 5:
+            print("[FEHLER] Nicht genug gültige Disks gefunden!")
+            return 1
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        logfile = args.logfile or f"resilver_{scenario.name}_Fill:{args.fill_levels[0]}_{timestamp}.log"
+
+        if args.pack_size:
+            if tunable_sets:
+                print("[FEHLER] --tunable geht nicht mit --pack-size: Modulparameter gelten für alle Pools.")
+                return 1
+            if repeat_from_args(args):
+                print("[FEHLER] --repeat-max geht nicht mit --pack-size: Gruppen messen jeden Punkt einmal.")
+                return 1
+            if args.model:
+                print("[FEHLER] --model geht nicht mit --pack-size: die Gruppen arbeiten die Matrix "
+                      "in fester Reihenfolge ab.")
+                return 1
+            from .packing import partition_disks, run_packed, teardown_groups
+            if args.fill_cache:
+                print("[WARNUNG] Fill-Cache wird im Pack-Modus nicht genutzt.")
+            groups = partition_disks(dev_paths, args.pack_size, args.pack_isolate, args.pack_max_groups)
+            if not groups:
+                print("[FEHLER] Keine Disk-Gruppe passt in --pack-size!")
+                return 1
+
+            async def packed():
+                await run_packed(groups, args.layout, scenario, spares, args.fill_levels, args.numjobs, logfile,
+                                 fill_opts=fill_opts_from_args(args), store=ResultStore(args.results),
+                                 resilver_opts=resilver_opts_from_args(args), fill_timeout=args.fill_timeout,
+                                 pool_name=args.pool_name, mountpoint=args.mountpoint, isolate=args.pack_isolate)
+
+            _, interrupted = aio.run_guarded(
+                packed, lambda: teardown_groups(groups, args.pool_name, args.mountpoint))
+            if interrupted:
+                return 130
+            print(f"\n Tests abgeschlossen: {logfile}")
+            return 0
+
+        configs = LAYOUTS[args.layout](dev_paths, spares=spares,
+                                       pool_name=args.pool_name, mountpoint=args.mountpoint)
+        fill_cache = FillCache(args.fill_cache, args.fill_cache_dir) if args.fill_cache else None
+        skip = None
+        if args.model:
+            from .resilver_model import ResilverModel, cell_order
+            configs, skip = cell_order(ResilverModel.load(args.model), configs, args.fill_levels, scenario.name,
+                                       args.model_max_seconds, descending=args.model_order == "desc")
+
+        async def sweep():
+            await run_sweep_async(configs, scenario, args.fill_levels, args.numjobs, logfile,
+                                  fill_opts=fill_opts_from_args(args), store=ResultStore(args.results),
+                                  fill_cache=fill_cache, resilver_opts=resilver_opts_from_args(args),
+                                  fill_timeout=args.fill_timeout, repeat=repeat_from_args(args), skip=skip,
+                                  tunables=tunable_sets, tuner=tuner)
+
+        async def cleanup():
+            if fill_cache is not None:
+                fill_cache.invalidate()
+            await aio.teardown(args.pool_name, args.mountpoint)
+
+        _, interrupted = aio.run_guarded(sweep, cleanup)
+        if interrupted:
+            return 130
+
+        print(f"\n Tests abgeschlossen: {logfile}")
+        return 0
+    finally:
+        if tuner is not None:
+            if args.tune_cache:
+                restore_cache_settings()
+            tuner.restore()
+        provider.cleanup()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+"""Per-Disk-I/O-Telemetrie aus /proc/diskstats während des Resilvers.
+
+Pro Tick wird /proc/diskstats genau einmal gelesen (kein Fork pro Disk)
+und die Zähler der überwachten Devices in ein vorab angelegtes
+NumPy-Array geschrieben. Raten werden erst am Ende vektorisiert aus den
+Differenzen berechnet; getaktet wird von aio._sample_diskstats(). Der
+Pfad der diskstats-Datei ist ein Parameter, damit eine synthetische
+Datei genutzt werden kann.
+"""
+import os
+import time
+
+import numpy as np
+
+DISKSTATS = "/proc/diskstats"
+SECTOR = 512
+
+# Spalten in /proc/diskstats (0-basiert nach split())
+COL_NAME = 2
+COLUMNS = {
+    "reads": 3,
+    "read_sectors": 5,
+    "writes": 7,
+    "write_sectors": 9,
+    "io_ticks_ms": 12,
+}
+CHUNK = 1024
+
+
+def kernel_name(dev_path):
+    """/dev/disk/by-id/wwn-... -> sdX"""
+    return os.path.basename(os.path.realpath(dev_path))
+
+
+class DiskstatsCollector:
+    def __init__(self, devices, interval=0.1, diskstats=DISKSTATS):
+        self.devices = list(devices)
+        self.names = [kernel_name(d) for d in self.devices]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.interval = interval
+        self.diskstats = diskstats
+        self.cols = list(COLUMNS.values())
+        self.times = np.zeros(CHUNK)
+        self.counters = np.zeros((CHUNK, len(self.names), len(self.cols)), dtype=np.uint64)
+        self.ticks = 0
+
+    def _grow(self):
+        self.times = np.concatenate([self.times, np.zeros(CHUNK)])
+        self.counters = np.concatenate([self.counters, np.zeros_like(self.counters[:CHUNK])])
+
+    def read_once(self, f, now=None):
+        """Liest einen Stand; `now` ersetzt time.monotonic(), z.B. beim Einspielen aufgezeichneter Stände."""
+        f.seek(0)
+        data = f.read()
+        now = time.monotonic() if now is None else now
+        if self.ticks == len(self.times):
+            self._grow()
+        row = self.counters[self.ticks]
+        index = self.index
+        for line in data.splitlines():
+            fields = line.split()
+            i = index.get(fields[COL_NAME]) if len(fields) > COLUMNS["io_ticks_ms"] else None
+            if i is not None:
+                row[i] = [int(fields[c]) for c in self.cols]
+        self.times[self.ticks] = now
+        self.ticks += 1
+
+    def rates(self):
+        """Raten pro Intervall als Arrays (Ticks-1 x Disks).
+
+        read_mbs/write_mbs in MB/s (10^6), read_iops/write_iops, util in %.
+        """
+        n = self.ticks
+        t = self.times[:n]
+        c = self.counters[:n].astype(np.float64)
+        dt = np.diff(t)[:, None]
+        dt[dt <= 0] = np.nan
+        d = np.diff(c, axis=0)
+        # Zähler-Überlauf oder verschwundene Disk -> keine Rate
+        d[d < 0] = np.nan
+        keys = list(COLUMNS)
+        col = {k: d[:, :, i] for i, k in enumerate(keys)}
+        return {
+            "t": t[1:] - t[0] if n else t,
+            "read_mbs": col["read_sectors"] * SECTOR / 1e6 / dt,
+            "write_mbs": col["write_sectors"] * SECTOR / 1e6 / dt,
+            "read_iops": col["reads"] / dt,
+            "write_iops": col["writes"] / dt,
+            "util": np.clip(col["io_ticks_ms"] / (dt * 1000.0) * 100.0, 0, 100),
+        }
+
+    def summary(self):
+        """Kompakte Zusammenfassung pro Disk für den Ergebnisspeicher."""
+        rates = self.rates()
+        result = {"devices": self.devices, "interval": self.interval, "ticks": self.ticks}
+        for key in ("read_mbs", "write_mbs", "read_iops", "write_iops", "util"):
+            values = rates[key]
+            if values.size == 0:
+                result[key] = {"mean": [], "max": []}
+                continue
+            result[key] = {
+                "mean": np.nanmean(values, axis=0).round(3).tolist(),
+                "max": np.nanmax(values, axis=0).round(3).tolist(),
+            }
+        return result
+
+    def save(self, path):
+        """Volle Zeitreihe als .npz ablegen."""
+        np.savez_compressed(path, devices=np.array(self.devices), **self.rates())
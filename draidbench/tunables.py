@@ -0,0 +1,206 @@
+"""ZFS-Modulparameter und sysctls setzen und exakt wiederherstellen.
+
+Modulparameter liegen unter /sys/module/zfs/parameters/<name>, sysctls
+("vm.dirty_ratio") unter /proc/sys/vm/dirty_ratio. Die Wurzel lässt sich
+über DRAIDBENCH_SYSFS_ROOT bzw. `root` umbiegen (Dry-Run, Tests mit einem
+Verzeichnisbaum aus normalen Dateien).
+
+Vor dem ersten Schreiben eines Parameters wird sein Wert gelesen und in der
+Zustandsdatei (`state_path`, JSON, per fsync gesichert) vermerkt. restore()
+schreibt genau diese Werte zurück, auch bei normalem Programmende (atexit).
+Ist ein Lauf hart abgebrochen worden, stellt recover() beim nächsten Start
+die Werte aus der Zustandsdatei wieder her.
+
+Sweep über Parameter (siehe sweep.py --tunable):
+
+    --tunable zfs_resilver_min_time_ms=1000,3000,5000 --tunable zfs_scan_vdev_limit=4M,16M
+"""
+import atexit
+import itertools
+import json
+import os
+import re
+
+from .pool import parse_size
+
+ROOT_ENV = "DRAIDBENCH_SYSFS_ROOT"
+ZFS_PARAMETERS = "sys/module/zfs/parameters"
+PROC_SYS = "proc/sys"
+STATE_FILE = "tunables_state.json"
+# Scan-/Rebuild-Parameter, die bei jeder Messung mitprotokolliert werden
+# (Standardwerte von OpenZFS 2.2, auch für den Dry-Run)
+KNOWN = {
+    "zfs_resilver_min_time_ms": 3000,
+    "zfs_scrub_min_time_ms": 1000,
+    "zfs_scan_vdev_limit": 16777216,
+    "zfs_scan_mem_lim_fact": 20,
+    "zfs_scan_legacy": 0,
+    "zfs_resilver_disable_defer": 0,
+    "zfs_rebuild_max_segment": 1048576,
+    "zfs_rebuild_vdev_limit": 67108864,
+    "zfs_rebuild_scrub_enabled": 1,
+    "zfs_vdev_scrub_min_active": 1,
+    "zfs_vdev_scrub_max_active": 3,
+    "zfs_vdev_rebuild_min_active": 1,
+    "zfs_vdev_rebuild_max_active": 3,
+}
+# Kernel-Standardwerte der sysctls aus pool.CACHE_SETTINGS, nur für den Dry-Run
+SYSCTL_DEFAULTS = {
+    "vm.dirty_ratio": 20,
+    "vm.dirty_background_ratio": 10,
+    "vm.dirty_expire_centisecs": 3000,
+    "vm.dirty_writeback_centisecs": 500,
+}
+SIZE_RE = re.compile(r"^\d+(\.\d+)?[kKmMgGtT]$")
+
+
+def normalize_value(value):
+    """Wert als Text für sysfs; Größen wie "16M" werden zu Bytes."""
+    value = str(value).strip()
+    return str(parse_size(value)) if SIZE_RE.match(value) else value
+
+
+def tunables_tag(settings):
+    """Kurzer, stabiler Name eines Parametersatzes für Schlüssel und Auswertung."""
+    if not settings:
+        return None
+    return ",".join(f"{name}={value}" for name, value in sorted(settings.items()))
+
+
+def parse_axis(spec):
+    """"name=v1,v2" -> (name, [v1, v2]) mit normalisierten Werten."""
+    name, sep, values = spec.partition("=")
+    if not sep or not name.strip() or not values.strip():
+        raise ValueError(f"Erwartet NAME=WERT[,WERT...]: {spec}")
+    return name.strip(), [normalize_value(v) for v in values.split(",") if v.strip()]
+
+
+def expand_sets(specs):
+    """Alle Kombinationen der Achsen als Liste von Dicts (kartesisches Produkt)."""
+    axes = [parse_axis(spec) for spec in specs]
+    names = [name for name, _ in axes]
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values for _, values in axes))]
+
+
+def make_fake_root(root, params=None):
+    """Legt einen Verzeichnisbaum mit Parametern als normalen Dateien an (Dry-Run, Tests)."""
+    params = dict(KNOWN, **SYSCTL_DEFAULTS) if params is None else params
+    tunables = Tunables(root)
+    for name, value in params.items():
+        path = tunables.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(f"{value}\n")
+    return root
+
+
+class Tunables:
+    """Liest/schreibt Parameter unter `root` und merkt sich die Originalwerte."""
+
+    def __init__(self, root=None, state_path=None):
+        self.root = root or os.environ.get(ROOT_ENV) or "/"
+        self.state_path = state_path
+        self.original = {}
+        self._registered = False
+
+    def path(self, name):
+        if "." in name:
+            return os.path.join(self.root, PROC_SYS, *name.split("."))
+        return os.path.join(self.root, ZFS_PARAMETERS, name)
+
+    def read(self, name):
+        try:
+            with open(self.path(name)) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            raise ValueError(f"Unbekannter Parameter: {name} ({self.path(name)})")
+
+    def write(self, name, value):
+        with open(self.path(name), "w") as f:
+            f.write(f"{value}\n")
+
+    def snapshot(self, names=None):
+        """Aktuelle Werte (Text); nicht vorhandene Parameter fehlen im Ergebnis."""
+        values = {}
+        for name in (KNOWN if names is None else names):
+            try:
+                values[name] = self.read(name)
+            except (ValueError, OSError):
+                continue
+        return values
+
+    def apply(self, settings):
+        """Setzt `settings` und gibt die danach gelesenen Werte zurück.
+
+        Der Originalwert jedes Parameters wird vor dem ersten Schreiben
+        gesichert (Zustandsdatei), spätere apply() überschreiben ihn nicht.
+        """
+        new = {name: self.read(name) for name in settings if name not in self.original}
+        if new:
+            self.original.update(new)
+            self._save()
+            if not self._registered:
+                atexit.register(self.restore)
+                self._registered = True
+        applied = {}
+        for name, value in settings.items():
+            self.write(name, normalize_value(value))
+            applied[name] = self.read(name)
+        return applied
+
+    def restore(self, names=None):
+        """Schreibt die Originalwerte zurück (alle oder nur `names`). True, wenn alles geklappt hat."""
+        names = list(self.original) if names is None else [n for n in names if n in self.original]
+        if not names:
+            return True
+        ok = True
+        for name in names:
+            try:
+                self.write(name, self.original[name])
+            except OSError as e:
+                print(f"[WARNUNG] Konnte {name} nicht auf {self.original[name]} zurücksetzen: {e}")
+                ok = False
+                continue
+            del self.original[name]
+        self._save()
+        return ok
+
+    def _save(self):
+        if not self.state_path:
+            return
+        if not self.original:
+            try:
+                os.unlink(self.state_path)
+            except FileNotFoundError:
+                pass
+            return
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"root": self.root, "original": self.original}, f, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.state_path)
+
+    def recover(self):
+        """Stellt die Werte eines abgebrochenen Laufs aus der Zustandsdatei wieder her."""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except ValueError:
+            print(f"[WARNUNG] Zustandsdatei {self.state_path} unlesbar, wird verworfen.")
+            os.unlink(self.state_path)
+            return {}
+        print(f"[WARNUNG] Vorheriger Lauf hat Parameter nicht zurückgesetzt, stelle wieder her: "
+              f"{tunables_tag(state['original'])}")
+        if not os.path.isdir(state["root"]):
+            # z.B. die gelöschte Fake-Wurzel eines Dry-Runs
+            print(f"[WARNUNG] {state['root']} existiert nicht mehr, Zustandsdatei wird verworfen.")
+            os.unlink(self.state_path)
+            return {}
+        previous = Tunables(state["root"], self.state_path)
+        previous.original = dict(state["original"])
+        if not previous.restore():
+            print(f"[WARNUNG] Nicht alle Parameter wiederhergestellt, siehe {self.state_path}.")
+        return state["original"]
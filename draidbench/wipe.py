@@ -0,0 +1,114 @@
+"""Löschen alter ZFS-Labels auf vielen Disks gleichzeitig.
+
+ZFS legt je zwei 256-KiB-Labels an den Anfang und das Ende eines vdevs,
+dazu kommt der 3.5-MiB-Bootblock hinter L0/L1. Bei ganzen Disks liegt
+der vdev in Partition 1, bei Image-Dateien direkt in der Datei. Statt
+`wipefs -a` pro Disk werden deshalb nur die vorderen und hinteren 4 MiB
+des Devices und jeder Partition mit Nullen überschrieben (O_DIRECT,
+gepuffert als Fallback), parallel in einem Threadpool.
+"""
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .devices import dry_run_active
+
+LABEL_REGION = 4 * 1024 ** 2
+SECTOR = 512
+ALIGN = 4096
+WIPE_WORKERS = 32
+
+# ein gemeinsamer, seitenausgerichteter Null-Puffer für alle Threads (nur gelesen)
+_ZEROS = memoryview(mmap.mmap(-1, LABEL_REGION))
+
+
+def partition_ranges(dev_path, sysfs_root="/sys"):
+    """(start, länge) in Bytes aller Partitionen laut sysfs, leer für Dateien."""
+    name = os.path.basename(os.path.realpath(dev_path))
+    disk_dir = os.path.join(sysfs_root, "block", name)
+    ranges = []
+    try:
+        entries = os.listdir(disk_dir)
+    except OSError:
+        return ranges
+    for entry in sorted(entries):
+        if not entry.startswith(name):
+            continue
+        try:
+            with open(os.path.join(disk_dir, entry, "start")) as f:
+                start = int(f.read()) * SECTOR
+            with open(os.path.join(disk_dir, entry, "size")) as f:
+                size = int(f.read()) * SECTOR
+        except (OSError, ValueError):
+            continue
+        ranges.append((start, size))
+    return ranges
+
+
+def wipe_regions(size, ranges):
+    """Zu löschende (offset, länge)-Bereiche: Anfang und Ende des Devices und jeder Partition."""
+    regions = set()
+    for start, length in [(0, size)] + list(ranges):
+        n = min(LABEL_REGION, length)
+        regions.add((start, n))
+        regions.add((start + length - n, n))
+    return sorted(r for r in regions if r[1] > 0)
+
+
+def _open(path):
+    if hasattr(os, "O_DIRECT"):
+        try:
+            return os.open(path, os.O_WRONLY | os.O_DIRECT), True
+        except OSError:
+            pass
+    return os.open(path, os.O_WRONLY), False
+
+
+def wipe_labels(dev_path, sysfs_root="/sys"):
+    """Überschreibt die Label-Bereiche eines Devices, gibt die Anzahl Bytes zurück."""
+    fd, direct = _open(dev_path)
+    try:
+        size = os.lseek(fd, 0, os.SEEK_END)
+        written = 0
+        view = _ZEROS
+        for offset, length in wipe_regions(size, partition_ranges(dev_path, sysfs_root)):
+            if direct and (offset % ALIGN or length % ALIGN):
+                # unausgerichteter Bereich (krumme Partitionsgrenze), gepuffert nachholen
+                buffered = os.open(dev_path, os.O_WRONLY)
+                try:
+                    written += os.pwrite(buffered, view[:length], offset)
+                    os.fsync(buffered)
+                finally:
+                    os.close(buffered)
+                continue
+            written += os.pwrite(fd, view[:length], offset)
+        os.fsync(fd)
+        return written
+    finally:
+        os.close(fd)
+
+
+def wipe_disks(disks, workers=WIPE_WORKERS, sysfs_root="/sys"):
+    """Löscht die Labels aller Disks parallel. Fehler werden gemeldet, nicht geworfen.
+
+    Gibt {disk: Fehlertext} für fehlgeschlagene Disks zurück.
+    """
+    if dry_run_active():
+        print(f"[INFO] Dry-Run: Wipe von {len(disks)} Disks übersprungen.")
+        return {}
+
+    def one(disk):
+        try:
+            wipe_labels(disk, sysfs_root)
+            return None
+        except OSError as e:
+            return str(e)
+
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(disks)))) as pool:
+        for disk, error in zip(disks, pool.map(one, disks)):
+            if error:
+                errors[disk] = error
+    if errors:
+        print(f"[WARNUNG] Wipe fehlgeschlagen auf {len(errors)} Disks, z.B. {next(iter(errors.items()))}")
+    return errors
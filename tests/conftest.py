@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from draidbench.devices import DryRunProvider
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture_path(*parts):
+    return os.path.join(FIXTURES, *parts)
+
+
+@pytest.fixture
+def dry_run():
+    """Startet die Dry-Run-Stubs (optional mit aufgezeichneten Ausgaben) und räumt sie wieder ab."""
+    providers = []
+
+    def start(count=3, resilver_seconds=0.5, canned=None):
+        provider = DryRunProvider(count, resilver_seconds, canned_dir=fixture_path(canned) if canned else None)
+        providers.append(provider)
+        return provider.setup()
+
+    yield start
+    for provider in providers:
+        provider.cleanup()
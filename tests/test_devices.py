@@ -0,0 +1,25 @@
+import os
+
+from draidbench.devices import DryRunProvider, dry_run_active
+from draidbench.fill import native_fill
+from draidbench.wipe import wipe_disks
+
+
+def test_dry_run_stays_in_stub_dir(tmp_path):
+    victim = tmp_path / "disk.img"
+    victim.write_bytes(b"\xff" * 8192)
+    provider = DryRunProvider(3)
+    disks = provider.setup()
+    try:
+        assert dry_run_active()
+        assert provider.mountpoint.startswith(provider.stub_dir + os.sep)
+        assert len(disks) == 3
+        # weder Wipe noch native Füllung schreiben im Dry-Run
+        assert wipe_disks([str(victim)]) == {}
+        assert victim.read_bytes() == b"\xff" * 8192
+        assert native_fill(str(tmp_path), 1 << 20, 2)["bytes"] == 0
+        assert sorted(os.listdir(tmp_path)) == ["disk.img"]
+    finally:
+        provider.cleanup()
+    assert not dry_run_active()
+    assert provider.mountpoint is None
@@ -0,0 +1,78 @@
+import os
+
+from draidbench import discovery
+
+# VPD-Seite 0x83: T10-Vendor-ID (Typ 1) und NAA-Designator (Typ 3) der LU
+VPD_PG83 = bytes([0x00, 0x83, 0x00, 0x18,
+                  0x02, 0x01, 0x00, 0x08]) + b"SEAGATE " + bytes([0x01, 0x03, 0x00, 0x08,
+                                                                  0x50, 0x00, 0xc5, 0x00, 0x2b, 0x3c, 0x4d, 0x5e])
+
+
+def make_tree(root, disks):
+    """disks: {sdX: (wwid oder None, vpd oder None, by-id-Name oder None)}"""
+    sysfs = os.path.join(root, "sys")
+    dev = os.path.join(root, "dev")
+    by_id = os.path.join(dev, "disk", "by-id")
+    os.makedirs(by_id)
+    for name, (wwid, vpd, link) in disks.items():
+        device = os.path.join(sysfs, "block", name, "device")
+        os.makedirs(device)
+        open(os.path.join(dev, name), "w").close()
+        if wwid is not None:
+            with open(os.path.join(device, "wwid"), "w") as f:
+                f.write(wwid + "\n")
+        if vpd is not None:
+            with open(os.path.join(device, "vpd_pg83"), "wb") as f:
+                f.write(vpd)
+        if link is not None:
+            os.symlink(os.path.join("..", "..", name), os.path.join(by_id, link))
+    # Partition und Nicht-SCSI-Gerät werden ignoriert
+    os.makedirs(os.path.join(sysfs, "block", "nvme0n1"))
+    os.symlink("../../sda1", os.path.join(by_id, "wwn-0x5000c500aaaaaaaa-part1"))
+    return sysfs, dev
+
+
+def test_fake_tree(tmp_path):
+    sysfs, dev = make_tree(str(tmp_path), {
+        "sda": ("naa.5000C500AAAAAAAA", None, "wwn-0x5000c500aaaaaaaa"),
+        "sdb": (None, VPD_PG83, "wwn-0x5000c5002b3c4d5e"),
+        "sdc": (None, None, "wwn-0x5000c500cccccccc"),
+        "sdd": (None, None, "wwn-0x5000c500dddddddd"),
+        "sde": ("t10.ATA     SSD", None, None),
+    })
+    asked = []
+
+    def smartctl(path):
+        asked.append(os.path.basename(path))
+        # sdd antwortet nicht (Timeout/fehlerhaft) -> keine ID
+        return "0x5000c500cccccccc" if path.endswith("sdc") else None
+
+    cache = str(tmp_path / "cache.json")
+    paths = discovery.get_valid_disk_paths(sysfs, dev, cache_file=cache, smartctl=smartctl)
+    by_id = os.path.join(dev, "disk", "by-id")
+    assert paths == [os.path.join(by_id, n) for n in
+                     ("wwn-0x5000c500aaaaaaaa", "wwn-0x5000c5002b3c4d5e", "wwn-0x5000c500cccccccc")]
+    assert sorted(asked) == ["sdc", "sdd", "sde"]
+
+    # zweiter Lauf kommt aus dem Cache, ohne smartctl
+    asked.clear()
+    assert discovery.get_valid_disk_paths(sysfs, dev, cache_file=cache, smartctl=smartctl) == paths
+    assert asked == []
+
+    # neue Disk ändert den Schlüssel -> Cache ungültig
+    os.makedirs(os.path.join(sysfs, "block", "sdf", "device"))
+    discovery.get_valid_disk_paths(sysfs, dev, cache_file=cache, smartctl=smartctl)
+    assert "sdf" in asked
+
+
+def test_parse_vpd_pg83():
+    assert discovery.parse_vpd_pg83(VPD_PG83) == "0x5000c5002b3c4d5e"
+    assert discovery.parse_vpd_pg83(b"\x00\x80\x00\x00") is None
+
+
+def test_smartctl_timeout(tmp_path, monkeypatch):
+    script = tmp_path / "smartctl"
+    script.write_text("#!/bin/sh\nsleep 10\n")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    assert discovery.smartctl_lun_id("/dev/sdz", timeout=0.2) is None
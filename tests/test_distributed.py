@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import threading
+
+from draidbench import distributed
+from draidbench.distributed import Queue, matrix_cells, remote_cell_key, switch_tunables
+from draidbench.store import ResultStore
+from draidbench.load import load_tag
+from draidbench.tunables import Tunables, expand_sets, make_fake_root
+
+
+def test_expired_lease_fails_after_max_attempts(tmp_path):
+    queue = Queue(str(tmp_path / "q.db"))
+    assert queue.conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    cells = matrix_cells("worst-case", "single", 7, [0.1], [1])
+    assert queue.enqueue(cells[:1]) == 1
+    # Lease läuft sofort ab: der Worker "stirbt" zweimal
+    assert queue.lease("a", 7, lease_seconds=-1, max_attempts=2) is not None
+    assert queue.lease("b", 7, lease_seconds=-1, max_attempts=2) is not None
+    assert queue.lease("c", 7, lease_seconds=-1, max_attempts=2) is None
+    assert queue.status() == {"failed": 1}
+    assert queue.open_cells(7) == 0
+    error = queue.conn.execute("SELECT error FROM cells").fetchone()[0]
+    assert error == "Lease von b abgelaufen"
+
+
+def test_fail_requeues_until_max_attempts(tmp_path):
+    queue = Queue(str(tmp_path / "q.db"))
+    queue.enqueue(matrix_cells("worst-case", "single", 7, [0.1], [1])[:1])
+    key, _ = queue.lease("a", 7)
+    queue.fail(key, "a", "boom", max_attempts=2)
+    assert queue.status() == {"pending": 1}
+    key, _ = queue.lease("a", 7)
+    queue.fail(key, "a", "boom", max_attempts=2)
+    assert queue.status() == {"failed": 1}
+
+
+def test_key_and_cell_carry_load_and_tunables(tmp_path):
+    plain = matrix_cells("worst-case", "single", 7, [0.1], [1])
+    loaded = matrix_cells("worst-case", "single", 7, [0.1], [1],
+                          load={"rw": "randwrite", "bs": "4k", "log_root": "load_logs"},
+                          tunable_sets=expand_sets(["zfs_scan_vdev_limit=4M,16M"]))
+    assert len(loaded) == 2 * len(plain)
+    assert "log_root" not in loaded[0]["load"]
+    keys = {remote_cell_key(cell) for cell in plain + loaded}
+    assert len(keys) == 3 * len(plain)
+    assert remote_cell_key(loaded[0]).endswith(
+        f"|load={load_tag(loaded[0]['load'])}|tun=zfs_scan_vdev_limit=4194304")
+    # Punkte ohne Last und Parameter behalten ihren bisherigen Schlüssel
+    assert remote_cell_key(plain[0]) == remote_cell_key({k: v for k, v in plain[0].items()
+                                                         if k not in ("load", "tunables")})
+    queue = Queue(str(tmp_path / "q.db"))
+    assert queue.enqueue(plain + loaded) == len(keys)
+    _, cell = queue.lease("a", 7)
+    assert cell["load"] is None and cell["tunables"] is None
+
+
+def test_switch_tunables_restores_stale(tmp_path):
+    tuner = Tunables(make_fake_root(str(tmp_path / "root")), str(tmp_path / "state.json"))
+    settings = switch_tunables(tuner, {}, {"zfs_scan_vdev_limit": "4194304", "zfs_scan_legacy": "1"})
+    settings = switch_tunables(tuner, settings, {"zfs_scan_vdev_limit": "8388608"})
+    assert tuner.read("zfs_scan_vdev_limit") == "8388608"
+    assert tuner.read("zfs_scan_legacy") == "0"
+    assert switch_tunables(tuner, settings, None) == {}
+    assert tuner.read("zfs_scan_vdev_limit") == "16777216"
+    assert tuner.original == {}
+
+
+def test_concurrent_leases_hand_out_each_cell_once(tmp_path):
+    path = str(tmp_path / "q.db")
+    cells = matrix_cells("worst-case", "single", 7, [0.1, 0.2, 0.3, 0.4], [1, 2])
+    Queue(path).enqueue(cells)
+    leased = {}
+
+    def drain(worker):
+        # eigene Verbindung je Thread, wie getrennte Worker-Prozesse
+        queue = Queue(path)
+        leased[worker] = []
+        while (item := queue.lease(worker, 7)) is not None:
+            leased[worker].append(item[0])
+            queue.complete(item[0], worker, {"duration": 1.0})
+
+    threads = [threading.Thread(target=drain, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    keys = [key for worker_keys in leased.values() for key in worker_keys]
+    assert sorted(keys) == sorted(remote_cell_key(cell) for cell in cells)
+    assert Queue(path).status() == {"done": len(cells)}
+
+
+def _run_worker(queue_path, worker, cwd):
+    os.chdir(cwd)
+    raise SystemExit(distributed.main([
+        "worker", "--queue", queue_path, "--worker-id", worker, "--devices", "dry-run", "--device-count", "7",
+        "--numjobs", "1", "--fill-levels", "0.1", "--dry-run-resilver-seconds", "0.3", "--telemetry-interval", "0",
+        "--fill-log-dir", "", "--load-log-dir", "", "--tunables-state", os.path.join(cwd, "state.json")]))
+
+
+def test_worker_processes_drain_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(distributed, "POLL_SECONDS", 0.2)
+    path = str(tmp_path / "q.db")
+    cells = matrix_cells("worst-case", "single", 7, [0.1], [1])
+    Queue(path).enqueue(cells)
+    context = multiprocessing.get_context("fork")
+    workers = []
+    for i in range(3):
+        cwd = tmp_path / f"w{i}"
+        cwd.mkdir()
+        workers.append(context.Process(target=_run_worker, args=(path, f"w{i}", str(cwd))))
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(120)
+        assert process.exitcode == 0
+
+    queue = Queue(path)
+    assert queue.status() == {"done": len(cells)}
+    # jeder Punkt genau einmal gelesen und gemessen
+    assert {row[0] for row in queue.conn.execute("SELECT attempts FROM cells")} == {1}
+    results = dict(queue.results())
+    assert sorted(results) == sorted(remote_cell_key(cell) for cell in cells)
+
+    assert distributed.main(["export", "--queue", path, "--results", str(tmp_path / "all.jsonl")]) == 0
+    records = list(ResultStore(str(tmp_path / "all.jsonl")).records())
+    assert sorted(r["key"] for r in records) == sorted(results)
+    for record in records:
+        assert record["worker"] in ("w0", "w1", "w2")
+        assert record["host"] and record["finished_at"] == results[record["key"]]["finished_at"]
+        assert record["duration"] > 0
@@ -0,0 +1,49 @@
+import asyncio
+
+from draidbench import aio
+from draidbench.fill_cache import FillCache
+
+CFG = {"zfs_syntax": "draid2:4d:1s:7c", "pool_name": "mypool",
+       "used_disks": ["/var/tmp/devs/d0.img", "/var/tmp/devs/d1.img", "/dev/mapper/slow2"]}
+
+
+def test_stream_key_includes_fill_params(tmp_path):
+    cache = FillCache("send", str(tmp_path))
+    fio = cache.stream_path(CFG, 0.5, {"engine": "fio", "bs": "2M"})
+    assert fio == cache.stream_path(CFG, 0.5)
+    assert fio != cache.stream_path(CFG, 0.5, {"engine": "fio", "bs": "128K"})
+    assert fio != cache.stream_path(CFG, 0.5, {"engine": "native", "bs": "2M"})
+    native = {"engine": "native", "bs": "2M", "pattern": "incompressible"}
+    assert cache.stream_path(CFG, 0.5, native) != cache.stream_path(CFG, 0.5, dict(native, pattern="zero"))
+
+
+def test_import_dirs_follow_devices(tmp_path):
+    assert FillCache("checkpoint", str(tmp_path)).import_dirs(CFG) == ["/dev/mapper", "/var/tmp/devs"]
+    assert FillCache("checkpoint", str(tmp_path), import_dir="/dev/disk/by-id").import_dirs(CFG) == ["/dev/disk/by-id"]
+
+
+def test_prepare_passes_timeout_and_records_timings(tmp_path, monkeypatch):
+    calls = []
+
+    async def create_pool(cfg):
+        return {"wipe_s": 0.5, "create_s": 1.0, "setup_s": 1.5}
+
+    async def fill_pool(level, numjobs, pool_name, mountpoint, **kwargs):
+        calls.append(kwargs)
+        return {"fill_ratio": level}
+
+    async def run(cmd, **kwargs):
+        return ""
+
+    monkeypatch.setattr(aio, "create_pool", create_pool)
+    monkeypatch.setattr(aio, "fill_pool", fill_pool)
+    monkeypatch.setattr(aio, "run", run)
+    cache = FillCache("checkpoint", str(tmp_path))
+    cfg = dict(CFG, mountpoint=str(tmp_path / "mnt"))
+    assert asyncio.run(cache.prepare(cfg, 0.1, 1, {"bs": "2M"}, timeout=42)) is False
+    assert calls == [{"timeout": 42, "bs": "2M"}]
+    assert cache.timings == {"wipe_s": 0.5, "create_s": 1.0, "setup_s": 1.5}
+    # wiederverwendeter Pool: kein Setup
+    assert asyncio.run(cache.prepare(cfg, 0.1, 1, {"bs": "2M"}, timeout=42)) is True
+    assert cache.timings == {"wipe_s": 0.0, "create_s": 0.0, "setup_s": 0.0}
+    assert asyncio.run(cache.restore(cfg)) >= 0
@@ -0,0 +1,75 @@
+import io
+import json
+import math
+
+import pytest
+
+from conftest import fixture_path
+from draidbench import fio_logs
+
+FIO_DIR = fixture_path("fio")
+
+
+def test_summarize_json():
+    summary = fio_logs.summarize_json(fixture_path("fio", "fill.json"))
+    assert summary["bw_bytes"] == 305783040 + 298844160
+    assert summary["iops"] == pytest.approx(145.81 + 142.5)
+    assert summary["io_bytes"] == 2 * 1073741824
+    # schlechtester Job je Perzentil
+    assert summary["clat_percentiles_ns"]["99"] == 45350912
+    assert summary["clat_percentiles_ns"]["99.9"] == 98566144
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 4096])
+def test_json_jobs_streamed_across_chunks(monkeypatch, chunk):
+    monkeypatch.setattr(fio_logs, "JSON_CHUNK", chunk)
+    with open(fixture_path("fio", "fill.json")) as f:
+        text = f.read()
+    expected = json.loads(text[text.index("{"):])["jobs"]
+    assert list(fio_logs.iter_json_jobs(io.StringIO(text))) == expected
+
+
+def test_json_without_jobs():
+    assert list(fio_logs.iter_json_jobs(io.StringIO('{"fio version": "fio-3.36"}'))) == []
+
+
+def test_parse_fio_run_timeseries():
+    run = fio_logs.parse_fio_run(FIO_DIR)
+    ts = run["timeseries"]
+    assert ts["t_s"] == [0, 1, 2, 3]
+    # Sekundenmittel je Job, über die Jobs summiert
+    assert ts["bw_bytes"][0] == 301000 * 1024
+    assert ts["bw_bytes"][1] == ((299000 + 280000) / 2 + (250000 + 270000) / 2) * 1024
+    assert ts["iops"][3] == (300000 // 2048 + 305000 // 2048) / 2 + (280000 // 2048 + 290000 // 2048) / 2
+    assert ts["lat_t_s"] == [0, 1, 2, 3]
+    assert ts["lat_p50_us"][0] == 21000
+    assert ts["lat_p50_us"][1] == pytest.approx((25000 + 28000) / 2)
+    assert run["summary"]["io_bytes"] == 2 * 1073741824
+
+
+def test_latency_series_keeps_gaps(tmp_path):
+    a = tmp_path / "x_lat.1.log"
+    b = tmp_path / "x_lat.2.log"
+    a.write_text("100, 10, 1, 4096, 0\n3100, 30, 1, 4096, 0\n")
+    b.write_text("200, 20, 1, 4096, 0\n250, 99, 0, 4096, 0\n")
+    seconds, lat = fio_logs.latency_series([str(a), str(b)])
+    assert seconds == [0, 1, 2, 3]
+    assert lat[50.0][0] == 15
+    assert math.isnan(lat[50.0][1]) and math.isnan(lat[50.0][2])
+    assert lat[50.0][3] == 30
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 129, 1000, 123456, 98566144])
+def test_plat_bins_roundtrip(value):
+    index = fio_logs.plat_val_to_idx(value)
+    assert fio_logs.plat_idx_to_val(index, edge=0.0) <= value < fio_logs.plat_idx_to_val(index, edge=1.0) + 1
+
+
+def test_hist_percentiles_from_tail():
+    bins = [0] * fio_logs.FIO_IO_U_PLAT_NR
+    bins[fio_logs.plat_val_to_idx(100_000)] = 980
+    bins[fio_logs.plat_val_to_idx(10_000_000)] = 20
+    result = fio_logs.hist_percentiles(bins, (50.0, 99.0))
+    assert result[50.0] == pytest.approx(100_000, rel=0.02)
+    assert result[99.0] == pytest.approx(10_000_000, rel=0.02)
+    assert fio_logs.hist_percentiles([0] * 8, (99.0,)) == {99.0: None}
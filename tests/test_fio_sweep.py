@@ -0,0 +1,42 @@
+import pytest
+
+from draidbench import fio_sweep, search
+
+
+def test_search_options_have_defaults_and_sizes():
+    spec = fio_sweep.normalize_spec({"mode": "search", "objective": "lat", "bw_floor": "500M"})
+    assert spec["bw_floor"] == 500 * 1024 ** 2
+    assert (spec["stride"], spec["eta"], spec["beam"]) == (4, 3, 2)
+
+
+@pytest.mark.parametrize("data", [
+    {"objective": "iops"},
+    {"mode": "search", "eta": 1},
+    {"mode": "search", "targets": ["/mnt/a", "/mnt/b"]},
+])
+def test_invalid_search_spec_is_rejected(data):
+    with pytest.raises(ValueError):
+        fio_sweep.normalize_spec(data)
+
+
+def test_search_options_reach_run_search(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_run_search(*args, **kwargs):
+        calls.append((args, kwargs))
+        return {"bs": "4k"}, {"bw_bytes": 0}, []
+
+    monkeypatch.setattr(search, "run_search", fake_run_search)
+    spec = fio_sweep.normalize_spec({"mode": "search", "objective": "lat", "bw_floor": "1M", "stride": 2,
+                                     "eta": 4, "beam": 1, "dest": str(tmp_path / "out")})
+    fio_sweep.run_spec(spec)
+    (args, kwargs), = calls
+    assert args[6:8] == ("lat", 1024 ** 2)
+    assert (kwargs["stride"], kwargs["eta"], kwargs["beam"]) == (2, 4, 1)
+
+
+def test_cli_targets_are_checked_in_search_mode(tmp_path, capsys):
+    path = tmp_path / "sweep.toml"
+    path.write_text('mode = "search"\n')
+    assert fio_sweep.main([str(path), "--plan", "--targets", "/mnt/a", "/mnt/b"]) == 2
+    assert "[FEHLER]" in capsys.readouterr().out
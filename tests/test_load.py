@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from draidbench import fio_logs, load
+from draidbench.devices import DRY_RUN_ENV
+
+T0 = 1_700_000_000
+
+
+def _write_hist(path, lines):
+    with open(path, "w") as f:
+        for t_ms, latencies in lines:
+            bins = [0] * fio_logs.FIO_IO_U_PLAT_NR
+            for ns, count in latencies.items():
+                bins[fio_logs.plat_val_to_idx(ns)] += count
+            f.write(f"{t_ms}, 1, 4096, {', '.join(map(str, bins))}\n")
+
+
+def _write_log(path, seconds, value):
+    with open(path, "w") as f:
+        for sec in seconds:
+            f.write(f"{sec * 1000}, {value}, 1, 4096, 0\n")
+
+
+def test_load_tag_covers_engine_direct_size():
+    base = {"rw": "randwrite", "bs": "4k"}
+    tag = load.load_tag(base)
+    assert "psync" in tag and "direct0" in tag
+    assert load.load_tag(dict(base, ioengine="libaio")) != tag
+    assert load.load_tag(dict(base, direct=1)) != tag
+    assert load.load_tag(dict(base, size="8g")) != tag
+    # Ramp und Basislinie ändern die Last nicht
+    assert load.load_tag(dict(base, ramp_s=1, baseline_s=3)) == tag
+    assert load.load_tag(None) is None
+
+
+def test_window_stats_percentiles_from_histogram(tmp_path):
+    seconds = range(T0, T0 + 6)
+    _write_log(tmp_path / "load_bw.1.log", seconds, 1000)
+    _write_log(tmp_path / "load_iops.1.log", seconds, 250)
+    # Job 1 schnell, Job 2 mit 2 % langsamen I/Os; Sekundenmittel läge bei ~300 us
+    _write_hist(tmp_path / "load_clat_hist.1.log",
+                [(sec * 1000, {100_000: 980}) for sec in seconds])
+    _write_hist(tmp_path / "load_clat_hist.2.log",
+                [(sec * 1000, {10_000_000: 20}) for sec in seconds]
+                + [((T0 + 9) * 1000, {900_000_000: 1000})])
+    stats = load.window_stats(str(tmp_path), T0, T0 + 5)
+    assert stats["seconds"] == 5
+    assert stats["bw_bytes"] == pytest.approx(1000 * 1024)
+    # Zeilen bei T0+1 .. T0+5 decken [T0, T0+5) ab, die Ausreißer danach nicht
+    assert stats["lat_ios"] == 5 * 1000
+    assert stats["lat_p50_us"] == pytest.approx(100, rel=0.02)
+    assert stats["lat_p99_us"] == pytest.approx(10_000, rel=0.02)
+
+
+def test_window_stats_without_logs(tmp_path):
+    stats = load.window_stats(str(tmp_path), T0, T0 + 5)
+    assert stats["seconds"] == 0 and stats["lat_ios"] == 0
+    assert stats["lat_p99_us"] is None
+
+
+def test_start_needs_mounted_pool(tmp_path, monkeypatch):
+    monkeypatch.delenv(DRY_RUN_ENV, raising=False)
+    background = load.BackgroundLoad(str(tmp_path / "nicht-gemountet"), {"log_dir": str(tmp_path / "logs")})
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(background.start())
+    assert background.task is None
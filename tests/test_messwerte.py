@@ -0,0 +1,9 @@
+import subprocess
+import sys
+
+
+def test_import_needs_no_numpy():
+    # messwerte läuft auf Rechnern ohne numpy und darf resilver_model nicht laden
+    code = ("import sys, draidbench.messwerte; "
+            "assert 'numpy' not in sys.modules and 'draidbench.resilver_model' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], check=True)
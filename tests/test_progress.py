@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from conftest import fixture_path
+from draidbench import aio
+from draidbench.progress import ProgressSampler, parse_status_json, parse_status_text
+from draidbench.resilver_watch import resilver_in_progress, scrub_in_progress
+
+G = 1024 ** 3
+T = 1024 ** 4
+
+
+def status(name):
+    with open(fixture_path("status", name)) as f:
+        return f.read()
+
+
+def test_old_format():
+    sample = parse_status_text(status("resilver_old.txt"))
+    assert sample["phase"] == "resilver"
+    assert sample["scanned"] == int(1.23 * T)
+    assert sample["scan_rate"] == int(2.34 * G)
+    assert sample["issued"] == 456 * G
+    assert sample["issue_rate"] == int(1.11 * G)
+    assert sample["total"] == int(5.67 * T)
+    assert sample["resilvered"] == int(89.0 * G)
+    assert sample["pct"] == 12.34
+    assert sample["eta_s"] == 5025
+
+
+def test_openzfs_22_format():
+    sample = parse_status_text(status("resilver_22.txt"))
+    assert sample["phase"] == "resilver"
+    assert sample["scanned"] == int(2.59 * T)
+    assert sample["issued"] == int(1.35 * T)
+    assert sample["issue_rate"] == 600 * 1024 ** 2
+    assert sample["total"] == int(8.02 * T)
+    assert sample["eta_s"] == 26 * 3600 + 3 * 60 + 4
+
+
+@pytest.mark.parametrize("name", ["rebuild_draid.txt", "rebuild_draid_p.txt"])
+def test_draid_sequential_rebuild(name):
+    text = status(name)
+    sample = parse_status_text(text)
+    assert sample["phase"] == "rebuild"
+    assert sample["scanned"] == pytest.approx(1.19 * T, rel=1e-3)
+    assert sample["issued"] == pytest.approx(1.18 * T, rel=1e-3)
+    assert sample["issue_rate"] == pytest.approx(5.04 * G, rel=1e-3)
+    assert sample["total"] == pytest.approx(3.45 * T, rel=1e-3)
+    assert sample["pct"] == 34.33
+    assert resilver_in_progress(text)
+
+
+def test_scrub():
+    text = status("scrub_22.txt")
+    sample = parse_status_text(text)
+    assert sample["phase"] == "scrub"
+    assert sample["total"] == int(3.45 * T)
+    assert sample["resilvered"] == 0
+    assert scrub_in_progress(text) and not resilver_in_progress(text)
+
+
+def test_no_scan():
+    # Aufzeichnung aus messwerte/: Disk offline, kein Scan
+    text = status("messwerte_offline.txt")
+    assert parse_status_text(text) is None
+    assert not resilver_in_progress(text)
+
+
+def test_json_resilver():
+    sample = parse_status_json(status("status_j_resilver.json"), "mypool")
+    assert sample["phase"] == "resilver"
+    assert sample["total"] == 3793315332096
+    assert sample["issued"] == 948603453440
+    assert sample["pct"] == pytest.approx(25.007, abs=1e-3)
+
+
+def test_json_rebuild():
+    sample = parse_status_json(status("status_j_rebuild.json"), "mypool")
+    assert sample["phase"] == "rebuild"
+    assert sample["scanned"] == 1308622848000
+    assert sample["total"] == 3793315332096
+
+
+def test_json_idle():
+    assert parse_status_json(status("status_j_idle.json"), "mypool") is None
+    assert parse_status_json(status("status_j_idle.json"), "otherpool") is None
+
+
+def _fake_zpool(monkeypatch, json_outputs):
+    outputs = iter(json_outputs)
+
+    async def run(cmd, **kwargs):
+        return next(outputs) if " -j " in cmd else status("resilver_22.txt")
+
+    monkeypatch.setattr(aio, "run", run)
+
+
+def test_json_after_warning_line(monkeypatch):
+    _fake_zpool(monkeypatch, ["WARNING: Pool mypool hat einen Checkpoint\n" + status("status_j_resilver.json")])
+    sampler = ProgressSampler("mypool")
+    sample = asyncio.run(aio._status_sample(sampler))
+    assert sample["total"] == 3793315332096
+    assert sampler.use_json is True
+
+
+def test_json_decided_only_after_success(monkeypatch):
+    # vorübergehender Fehler: Text für dieses Sample, danach wieder JSON
+    _fake_zpool(monkeypatch, ["cannot open 'mypool': busy\n", status("status_j_resilver.json")])
+    sampler = ProgressSampler("mypool")
+    assert asyncio.run(aio._status_sample(sampler))["issue_rate"] == 600 * 1024 ** 2
+    assert sampler.use_json is None
+    assert asyncio.run(aio._status_sample(sampler))["total"] == 3793315332096
+    assert sampler.use_json is True
+
+
+def test_text_fallback_without_json_support(monkeypatch):
+    _fake_zpool(monkeypatch, ["invalid option 'j'\n"] * aio.JSON_PROBES)
+    sampler = ProgressSampler("mypool")
+    for _ in range(aio.JSON_PROBES + 1):
+        assert asyncio.run(aio._status_sample(sampler))["phase"] == "resilver"
+    assert sampler.use_json is False
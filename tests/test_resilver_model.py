@@ -0,0 +1,23 @@
+from draidbench.resilver_model import ResilverModel, cell_order
+
+CONFIGS = [{"zfs_syntax": "draid2:4d:1s:11c", "vdevs": 1}, {"zfs_syntax": "draid2:1d:1s:11c", "vdevs": 1}]
+
+
+def cv(model_rmse, baseline_rmse):
+    errors = {"mae_s": 0.0, "median_ape": 0.0}
+    return {"n": 10, "folds": 5, "model": dict(errors, rmse_s=model_rmse),
+            "mean_baseline": dict(errors, rmse_s=baseline_rmse)}
+
+
+def test_max_seconds_skips_with_a_skilled_model():
+    model = ResilverModel(cv=cv(10.0, 100.0))
+    _, skip = cell_order(model, CONFIGS, [0.5], "worst-case-wipe", max_seconds=0)
+    assert all(skip(cfg, 0.5) for cfg in CONFIGS)
+
+
+def test_max_seconds_ignored_without_skill(capsys):
+    for model in (ResilverModel(cv=cv(100.0, 10.0)), ResilverModel()):
+        ranked, skip = cell_order(model, CONFIGS, [0.5], "worst-case-wipe", max_seconds=0)
+        assert not any(skip(cfg, 0.5) for cfg in CONFIGS)
+        assert len(ranked) == len(CONFIGS)
+    assert "--model-max-seconds wird ignoriert" in capsys.readouterr().out
@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+from draidbench import aio
+from draidbench.resilver_watch import COMPLETED_BEFORE_POLL, NO_RESILVER, parse_events, resilver_completed_at
+
+
+def test_events_replay(dry_run, monkeypatch):
+    # aufgezeichneter Stream: altes Finish (eid 2), fremder Pool, dann 2 s Resilver
+    monkeypatch.setenv("DRYRUN_REPLAY_SCALE", "0.25")
+    dry_run(canned="events")
+
+    async def trigger():
+        pass
+
+    result = asyncio.run(aio.wait_for_resilver("draidBenchmark", trigger, timeout=30))
+    assert result["method"] == "events"
+    assert result["start_ts"] is not None
+    assert 0.3 < result["duration"] < 1.5
+
+
+def test_simulated_resilver(dry_run):
+    disks = dry_run(resilver_seconds=0.5)
+
+    async def trigger():
+        await aio.run(f"zpool create -f mypool draid2 {' '.join(disks)}")
+        await aio.run(f"zpool online mypool {disks[0]}")
+
+    result = asyncio.run(aio.wait_for_resilver("mypool", trigger, timeout=30))
+    assert result["method"] == "events"
+    assert 0.4 < result["duration"] < 2.0
+
+
+def test_no_resilver(dry_run, monkeypatch):
+    # leerer Pool: kein Event und kein laufender Resilver im Status
+    monkeypatch.setattr(aio, "START_GRACE", 0.2)
+    disks = dry_run()
+
+    async def trigger():
+        await aio.run(f"zpool create -f mypool draid2 {' '.join(disks)}")
+
+    result = asyncio.run(aio.wait_for_resilver("mypool", trigger, timeout=30))
+    assert result["method"] == NO_RESILVER
+    assert result["duration"] == 0
+    assert result["finish_ts"] == result["trigger_ts"]
+
+
+def test_parse_events_fixture():
+    from conftest import fixture_path
+
+    with open(fixture_path("events", "zpool_events_follow.txt")) as f:
+        events = list(parse_events(f))
+    assert [e["eid"] for e in events] == ["0x2", "0x3", "0x4", "0x5", "0x6"]
+    assert events[2]["pool"] == "backup"
+
+
+def _without_events(monkeypatch):
+    async def no_events(zpool_bin):
+        return None
+
+    monkeypatch.setattr(aio, "_baseline_eid", no_events)
+
+
+def test_polling_scrub_after_rebuild(dry_run, monkeypatch):
+    _without_events(monkeypatch)
+    disks = dry_run(resilver_seconds=0.5)
+
+    async def trigger():
+        await aio.run(f"zpool create -f mypool draid2 {' '.join(disks)}")
+        await aio.run(f"zpool replace -s mypool {disks[0]} {disks[1]}")
+
+    result = asyncio.run(aio.wait_for_resilver("mypool", trigger, timeout=30, scrub=True))
+    assert result["method"] == "polling"
+    # Scrub-Beginn ist der erste Poll, der ihn sah, nicht das Ende des Rebuilds
+    assert result["scrub_wait_s"] > 0
+    assert 0.2 < result["scrub_s"] < 1.5
+
+
+def test_polling_without_scrub(dry_run, monkeypatch):
+    _without_events(monkeypatch)
+    monkeypatch.setattr(aio, "START_GRACE", 0.2)
+    disks = dry_run(resilver_seconds=0.5)
+
+    async def trigger():
+        await aio.run(f"zpool create -f mypool draid2 {' '.join(disks)}")
+        await aio.run(f"zpool online mypool {disks[0]}")
+
+    result = asyncio.run(aio.wait_for_resilver("mypool", trigger, timeout=30, scrub=True))
+    assert result["method"] == "polling"
+    assert "scrub_s" not in result
+    assert result["verified_s"] == result["redundancy_s"]
+
+
+def test_resilver_completed_at():
+    status = "  scan: resilvered 1.50M in 00:00:01 with 0 errors on Sat Oct  3 18:55:07 2026\n"
+    assert resilver_completed_at(status) == time.mktime((2026, 10, 3, 18, 55, 7, 0, 0, -1))
+    assert resilver_completed_at("  scan: scrub repaired 0B in 00:00:01 with 0 errors on Sat Oct  3 18:55:07 2026") is None
+    assert resilver_completed_at("  scan: resilver in progress since Sat Oct  3 18:55:07 2026") is None
+
+
+def test_polling_resilver_finished_before_first_poll(dry_run, monkeypatch):
+    # sub-Sekunden-Resilver, der schon vorbei ist, wenn zum ersten Mal gepollt wird
+    _without_events(monkeypatch)
+    disks = dry_run(resilver_seconds=0.05)
+
+    async def trigger():
+        await aio.run(f"zpool create -f mypool draid2 {' '.join(disks)}")
+        await aio.run(f"zpool online mypool {disks[0]}")
+        await asyncio.sleep(0.3)
+
+    result = asyncio.run(aio.wait_for_resilver("mypool", trigger, timeout=30))
+    assert result["method"] == COMPLETED_BEFORE_POLL
+    assert result["finish_ts"] > result["trigger_ts"]
+    assert result["duration"] >= 0.3
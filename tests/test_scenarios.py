@@ -0,0 +1,23 @@
+import pytest
+
+from draidbench.config import generate_draid2_configs, generate_rg_configs
+from draidbench.scenarios import get_scenario
+
+DISKS = [f"/dev/disk/by-id/d{i}" for i in range(13)]
+
+
+@pytest.mark.parametrize("name", ["best-case-spare", "sequential-rebuild"])
+def test_spare_target(name):
+    scenario = get_scenario(name)
+    single = generate_rg_configs(DISKS[:7])[0]
+    assert scenario.spare_target(single) == "draid2-0-0"
+    multi = [cfg for cfg in generate_draid2_configs(DISKS) if cfg["vdevs"] > 1][0]
+    assert scenario.spare_target(multi) == DISKS[-1]
+
+
+@pytest.mark.parametrize("name", ["best-case-spare", "sequential-rebuild"])
+def test_multi_vdev_without_spare_disk(name):
+    multi = [cfg for cfg in generate_draid2_configs(DISKS) if cfg["vdevs"] > 1][0]
+    del multi["spare_disk"]
+    with pytest.raises(ValueError, match="keine physische Spare"):
+        get_scenario(name).spare_target(multi)
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from draidbench.search import Space, SyntheticSurface, successive_halving
+
+
+def test_final_metrics_belong_to_best_point():
+    space = Space(["4k", "64k", "1m"], ["1", "4", "16"], ["1", "8", "32"])
+    surface = SyntheticSurface(noise=0.0)
+    # min = max: kein Nachmessen, die letzte Auswertung ist irgendein Kandidat
+    best, final, evaluations = asyncio.run(successive_halving(space, surface, stride=1, min_runtime=30,
+                                                              max_runtime=30))
+    assert {axis: final[axis] for axis in space.axes} == best
+    assert final["score"] == max(e["score"] for e in evaluations if e["rung"] == final["rung"])
+    assert evaluations[-1] is not final
+
+
+def test_final_metrics_from_full_runtime_remeasure():
+    space = Space(["4k", "64k", "1m"], ["1", "4", "16"], ["1", "8", "32"])
+    best, final, evaluations = asyncio.run(successive_halving(space, SyntheticSurface(noise=0.0), stride=1,
+                                                              min_runtime=5, max_runtime=30))
+    assert {axis: final[axis] for axis in space.axes} == best
+    assert final["runtime"] == 30
+
+
+def test_eta_below_two_is_rejected():
+    space = Space(["4k"], ["1"], ["1"])
+    with pytest.raises(ValueError):
+        asyncio.run(successive_halving(space, SyntheticSurface(), eta=1))
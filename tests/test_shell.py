@@ -0,0 +1,68 @@
+import asyncio
+import os
+import subprocess
+import time
+
+import pytest
+
+from draidbench import aio
+from draidbench.pool import kill_mount_users, pool_exists
+from draidbench.shell import CommandError, run_cmd, run_status
+
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Zombie bis zum Abräumen durch init zählt als beendet
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split()[2] != "Z"
+    except OSError:
+        return False
+
+
+def test_timeout_kills_process_group(tmp_path):
+    pidfile = tmp_path / "pid"
+    start = time.monotonic()
+    assert run_cmd(f"sleep 30 & echo $! > {pidfile}; wait", check=False, timeout=0.5) == ""
+    assert time.monotonic() - start < 10
+    pid = int(pidfile.read_text())
+    for _ in range(50):
+        if not alive(pid):
+            break
+        time.sleep(0.05)
+    assert not alive(pid)
+
+
+def test_timeout_raises_with_check():
+    with pytest.raises(CommandError) as info:
+        run_cmd("sleep 30", timeout=0.2)
+    assert info.value.returncode is None
+
+
+def test_status_and_output():
+    assert run_status("exit 3") == 3
+    assert run_status("sleep 30", timeout=0.2) is None
+    assert run_cmd("echo hallo") == "hallo"
+    with pytest.raises(CommandError):
+        run_cmd("echo kaputt >&2; exit 1")
+
+
+def test_pool_exists_uses_zpool_bin(dry_run):
+    disks = dry_run()
+    assert not pool_exists("mypool")
+    asyncio.run(aio.run(f"zpool create -f mypool draid2 {' '.join(disks)}"))
+    assert pool_exists("mypool")
+
+
+def test_kill_mount_users_spares_own_process(tmp_path, monkeypatch):
+    victim = subprocess.Popen(["sleep", "30"])
+    fuser = tmp_path / "fuser"
+    # wie fuser: PIDs auf stdout, Mountpoint und Zugriffsart auf stderr
+    fuser.write_text(f"#!/bin/sh\necho \"$2:\" >&2\necho \" {os.getpid()} {victim.pid}\"\n")
+    fuser.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    kill_mount_users("/mnt/draidBenchmark0")
+    assert victim.wait(timeout=10) == -9
@@ -0,0 +1,21 @@
+import json
+
+from draidbench.store import ResultStore
+
+
+def test_legacy_fill_dict_is_upgraded(tmp_path):
+    path = tmp_path / "results.jsonl"
+    legacy = [
+        {"key": "draid2:4d:1s:7c|fill=0.5|numjobs=4|worst-case|disks=abc", "duration": 12.0,
+         "fill": {"engine": "fio", "target_ratio": 0.5, "fill_ratio": 0.49}},
+        {"key": "draid2:4d:1s:7c|fill=0.25|numjobs=4|worst-case|disks=abc", "duration": 8.0,
+         "fill": {"engine": "fio", "target_bytes": 1024}},
+        {"key": "draid2:4d:1s:7c|fill=0.1|numjobs=4|worst-case|disks=abc", "duration": 3.0,
+         "fill": 0.1, "fill_info": {"fill_ratio": 0.1}},
+    ]
+    path.write_text("".join(json.dumps(r) + "\n" for r in legacy) + '{"abgeschnitten')
+    records = list(ResultStore(str(path)).records())
+    assert [r["fill"] for r in records] == [0.5, 0.25, 0.1]
+    assert records[0]["fill_info"]["engine"] == "fio"
+    assert records[0]["fill_ratio"] == 0.49
+    assert records[2]["fill_info"] == {"fill_ratio": 0.1}
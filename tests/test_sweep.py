@@ -0,0 +1,13 @@
+import pytest
+
+from draidbench import sweep
+
+
+@pytest.mark.parametrize("option", [["--repeat-max", "3"], ["--model", "model.json"],
+                                    ["--tunable", "zfs_scan_legacy=1"]])
+def test_pack_mode_rejects_unsupported_options(tmp_path, monkeypatch, capsys, option):
+    monkeypatch.chdir(tmp_path)
+    argv = ["--devices", "dry-run", "--device-count", "14", "--pack-size", "7", "--pack-isolate", "none",
+            "--numjobs", "1", "--fill-levels", "0.1", "--tunables-state", str(tmp_path / "state.json")] + option
+    assert sweep.main(argv) == 1
+    assert "geht nicht mit --pack-size" in capsys.readouterr().out
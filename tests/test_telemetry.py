@@ -0,0 +1,41 @@
+import math
+
+import pytest
+
+from conftest import fixture_path
+from draidbench.telemetry import DiskstatsCollector
+
+
+def replay(collector, snapshots):
+    """Spielt aufgezeichnete /proc/diskstats-Stände mit festen Zeitstempeln ein."""
+    for name, now in snapshots:
+        with open(fixture_path("diskstats", name)) as f:
+            collector.read_once(f, now=now)
+
+
+def test_rates_from_recorded_snapshots():
+    collector = DiskstatsCollector(["/dev/sda", "/dev/sdb", "/dev/sdc"])
+    replay(collector, [("t0.txt", 100.0), ("t1.txt", 101.0), ("t2.txt", 101.5)])
+    rates = collector.rates()
+    assert rates["t"].tolist() == [1.0, 1.5]
+    # sda: 512000 Sektoren lesend in 1 s, dann 1024000 in 0,5 s
+    assert rates["read_mbs"][:, 0].tolist() == pytest.approx([512000 * 512 / 1e6, 1024000 * 512 / 1e6 / 0.5])
+    assert rates["read_iops"][:, 0].tolist() == pytest.approx([1000, 4000])
+    assert rates["write_mbs"][0, 0] == 0
+    # sdb schreibt: 256000 Sektoren/1 s und 500 Writes
+    assert rates["write_mbs"][0, 1] == pytest.approx(256000 * 512 / 1e6)
+    assert rates["write_iops"][:, 1].tolist() == pytest.approx([500, 2000])
+    assert rates["util"][:, 0].tolist() == pytest.approx([90.0, 100.0])
+    assert rates["util"][:, 1].tolist() == pytest.approx([50.0, 100.0])
+    # sdc: Zähler zurückgesetzt (Disk neu erkannt) -> keine Rate statt negativer Werte
+    assert rates["read_mbs"][0, 2] == 0
+    assert math.isnan(rates["read_mbs"][1, 2])
+
+
+def test_summary_ignores_partitions_and_other_devices():
+    collector = DiskstatsCollector(["/dev/sda"])
+    replay(collector, [("t0.txt", 0.0), ("t1.txt", 1.0)])
+    summary = collector.summary()
+    assert summary["ticks"] == 2
+    assert summary["read_iops"]["mean"] == [1000.0]
+    assert summary["util"]["max"] == [90.0]
@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from draidbench import tunables
+from draidbench.tunables import Tunables, expand_sets, make_fake_root
+
+
+@pytest.fixture
+def root(tmp_path):
+    return make_fake_root(str(tmp_path / "root"))
+
+
+def test_apply_and_restore(root, tmp_path):
+    state = str(tmp_path / "state.json")
+    tuner = Tunables(root, state)
+    applied = tuner.apply({"zfs_scan_vdev_limit": "4M", "vm.dirty_ratio": 5})
+    assert applied == {"zfs_scan_vdev_limit": "4194304", "vm.dirty_ratio": "5"}
+    assert json.load(open(state))["original"] == {"zfs_scan_vdev_limit": "16777216", "vm.dirty_ratio": "20"}
+    # ein zweites apply() überschreibt den gesicherten Originalwert nicht
+    tuner.apply({"zfs_scan_vdev_limit": "8M"})
+    assert tuner.restore(["zfs_scan_vdev_limit"])
+    assert tuner.read("zfs_scan_vdev_limit") == "16777216"
+    assert tuner.read("vm.dirty_ratio") == "5"
+    assert tuner.restore()
+    assert tuner.read("vm.dirty_ratio") == "20"
+    assert not os.path.exists(state)
+
+
+def test_recover_after_crash(root, tmp_path, monkeypatch):
+    state = str(tmp_path / "state.json")
+    monkeypatch.setattr(tunables.atexit, "register", lambda func: None)
+    Tunables(root, state).apply({"zfs_resilver_min_time_ms": 5000})
+    # abgebrochener Lauf: kein restore(), die Zustandsdatei bleibt liegen
+    assert Tunables(root, state).recover() == {"zfs_resilver_min_time_ms": "3000"}
+    assert Tunables(root).read("zfs_resilver_min_time_ms") == "3000"
+    assert not os.path.exists(state)
+
+
+def test_recover_with_missing_root(tmp_path):
+    state = tmp_path / "state.json"
+    state.write_text(json.dumps({"root": str(tmp_path / "weg"), "original": {"zfs_scan_legacy": "0"}}))
+    assert Tunables(str(tmp_path), str(state)).recover() == {}
+    assert not state.exists()
+
+
+def test_unknown_parameter(root, tmp_path):
+    tuner = Tunables(root, str(tmp_path / "state.json"))
+    with pytest.raises(ValueError):
+        tuner.apply({"zfs_gibt_es_nicht": 1})
+    assert tuner.original == {}
+    assert "zfs_gibt_es_nicht" not in tuner.snapshot(["zfs_gibt_es_nicht"])
+
+
+def test_root_from_environment(root, monkeypatch):
+    monkeypatch.setenv(tunables.ROOT_ENV, root)
+    assert Tunables().read("zfs_rebuild_scrub_enabled") == "1"
+
+
+def test_expand_sets_normalizes_sizes():
+    sets = expand_sets(["zfs_scan_vdev_limit=4M,1g", "zfs_resilver_min_time_ms=1000"])
+    assert sets == [
+        {"zfs_scan_vdev_limit": "4194304", "zfs_resilver_min_time_ms": "1000"},
+        {"zfs_scan_vdev_limit": "1073741824", "zfs_resilver_min_time_ms": "1000"},
+    ]
+    assert tunables.tunables_tag(sets[0]) == "zfs_resilver_min_time_ms=1000,zfs_scan_vdev_limit=4194304"
+    with pytest.raises(ValueError):
+        expand_sets(["zfs_scan_vdev_limit"])